@@ -32,6 +32,16 @@ from app import models
 
 target_metadata = SQLModel.metadata
 
+# index créés par migration uniquement (optionnels), ignorés par l'autogénération
+UNMANAGED_INDEXES = {"ix_order_created_at_brin"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Exclut de l'autogénération les objets gérés hors des modèles.
+    """
+    return not (type_ == "index" and name in UNMANAGED_INDEXES)
+
 def run_migrations_offline() -> None:
     """
     Exécute les migrations Alembic en mode "offline".
@@ -52,6 +62,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
     with context.begin_transaction():
         context.run_migrations()
@@ -79,7 +90,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
         with context.begin_transaction():
             context.run_migrations()
 
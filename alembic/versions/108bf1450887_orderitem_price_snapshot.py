@@ -0,0 +1,39 @@
+"""orderitem price snapshot
+
+Revision ID: 108bf1450887
+Revises: 972d6bcf306e
+Create Date: 2026-10-17 22:38:47.525598
+
+Prix unitaire et nom du produit figés sur chaque ligne de commande. Les
+colonnes sont ajoutées sans contrainte NOT NULL : les lignes existantes sont
+reprises ensuite, par lots, avec
+    python -m app.commands backfill-order-items
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "108bf1450887"
+down_revision: Union[str, Sequence[str], None] = "972d6bcf306e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("orderitem", sa.Column("unit_price", sa.Float(), nullable=True))
+    op.add_column(
+        "orderitem",
+        sa.Column("product_name", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("orderitem", "product_name")
+    op.drop_column("orderitem", "unit_price")
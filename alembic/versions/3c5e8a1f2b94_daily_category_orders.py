@@ -0,0 +1,39 @@
+"""daily category orders
+
+Revision ID: 3c5e8a1f2b94
+Revises: 9fc7211692d7
+Create Date: 2026-10-18 09:12:41.208317
+
+Nombre de commandes par jour et par catégorie, cumulé avec `dailysales`.
+Elle est alimentée au fil des commandes ; l'historique existant est repris avec
+    python -m app.commands rebuild-daily-sales
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c5e8a1f2b94"
+down_revision: Union[str, Sequence[str], None] = "9fc7211692d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "dailycategoryorders",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("category", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "category"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("dailycategoryorders")
@@ -0,0 +1,46 @@
+"""distinct customers registers
+
+Revision ID: 5a7d2e9c4f16
+Revises: 3c5e8a1f2b94
+Create Date: 2026-10-18 10:03:17.552904
+
+Esquisses HyperLogLog des clients stockées registre par registre, pour être
+tenues à jour à chaque création de commande. Les anciennes esquisses (un
+bloc d'octets par jour) ne sont pas converties ; l'historique est repris avec
+    python -m app.commands rebuild-distinct-customers
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a7d2e9c4f16"
+down_revision: Union[str, Sequence[str], None] = "3c5e8a1f2b94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_table("dailycustomers")
+    op.create_table(
+        "dailycustomers",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "bucket"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("dailycustomers")
+    op.create_table(
+        "dailycustomers",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("registers", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
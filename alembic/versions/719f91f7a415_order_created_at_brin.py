@@ -0,0 +1,38 @@
+"""order created_at brin
+
+Revision ID: 719f91f7a415
+Revises: f7dd89112e32
+Create Date: 2026-10-17 10:41:27.905113
+
+Index BRIN optionnel sur order.created_at (PostgreSQL uniquement).
+
+Les requêtes par plage de dates sont servies par l'index B-tree
+ix_order_created_at_id (colonne de tête created_at). Sur une très grosse table
+où created_at suit l'ordre d'insertion, un BRIN de quelques Ko peut le relayer :
+    alembic -x order_brin=true upgrade head
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision: str = "719f91f7a415"
+down_revision: Union[str, Sequence[str], None] = "f7dd89112e32"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BRIN_INDEX = "ix_order_created_at_brin"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    brin = context.get_x_argument(as_dictionary=True).get("order_brin", "false")
+    if op.get_bind().dialect.name == "postgresql" and brin.lower() == "true":
+        op.create_index(BRIN_INDEX, "order", ["created_at"], postgresql_using="brin")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"DROP INDEX IF EXISTS {BRIN_INDEX}")
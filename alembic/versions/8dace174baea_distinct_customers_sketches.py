@@ -0,0 +1,37 @@
+"""distinct customers sketches
+
+Revision ID: 8dace174baea
+Revises: e67d5cfedac7
+Create Date: 2026-10-17 23:05:27.184884
+
+Esquisses HyperLogLog quotidiennes des clients ayant commandé. Les jours
+révolus sont calculés à la première lecture ; pour les calculer d'avance :
+    python -m app.commands rebuild-distinct-customers
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8dace174baea"
+down_revision: Union[str, Sequence[str], None] = "e67d5cfedac7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "dailycustomers",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("registers", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("dailycustomers")
@@ -0,0 +1,41 @@
+"""order open queue index
+
+Revision ID: 972d6bcf306e
+Revises: e0d307739e0c
+Create Date: 2026-10-17 22:31:04.569252
+
+Index partiel de la file de la cuisine : commandes non servies triées par
+ancienneté (created_at, id). Les commandes servies, qui sont l'essentiel de
+la table, n'y figurent pas.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "972d6bcf306e"
+down_revision: Union[str, Sequence[str], None] = "e0d307739e0c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_ORDERS = sa.text("status <> 'Servie'")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_order_open_created_at_id",
+        "order",
+        ["created_at", "id"],
+        unique=False,
+        postgresql_where=OPEN_ORDERS,
+        sqlite_where=OPEN_ORDERS,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_order_open_created_at_id", table_name="order")
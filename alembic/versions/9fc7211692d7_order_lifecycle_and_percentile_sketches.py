@@ -0,0 +1,46 @@
+"""order lifecycle and percentile sketches
+
+Revision ID: 9fc7211692d7
+Revises: 8dace174baea
+Create Date: 2026-10-17 23:10:07.211672
+
+Dates de passage aux statuts « Prete » et « Servie » sur `order` (NULL pour
+les commandes antérieures) et esquisses DDSketch quotidiennes du montant et
+du temps de préparation. L'historique des montants est repris avec
+    python -m app.commands rebuild-percentiles
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9fc7211692d7"
+down_revision: Union[str, Sequence[str], None] = "8dace174baea"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "dailyquantiles",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("metric", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("category", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "metric", "category", "bucket"),
+    )
+    op.add_column("order", sa.Column("ready_at", sa.DateTime(), nullable=True))
+    op.add_column("order", sa.Column("served_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("order", "served_at")
+    op.drop_column("order", "ready_at")
+    op.drop_table("dailyquantiles")
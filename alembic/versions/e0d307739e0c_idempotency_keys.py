@@ -0,0 +1,48 @@
+"""idempotency keys
+
+Revision ID: e0d307739e0c
+Revises: 719f91f7a415
+Create Date: 2026-10-17 22:26:40.000869
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e0d307739e0c"
+down_revision: Union[str, Sequence[str], None] = "719f91f7a415"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # réponses enregistrées pour l'en-tête Idempotency-Key
+    op.create_table(
+        "idempotencykey",
+        sa.Column("key", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column(
+            "request_hash", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False
+        ),
+        sa.Column("status_code", sa.Integer(), nullable=False),
+        sa.Column("response_body", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        op.f("ix_idempotencykey_expires_at"),
+        "idempotencykey",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_idempotencykey_expires_at"), table_name="idempotencykey")
+    op.drop_table("idempotencykey")
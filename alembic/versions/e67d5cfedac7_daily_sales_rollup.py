@@ -0,0 +1,42 @@
+"""daily sales rollup
+
+Revision ID: e67d5cfedac7
+Revises: 108bf1450887
+Create Date: 2026-10-17 22:52:12.557323
+
+Table de cumul des ventes par jour et par produit. Elle est alimentée au fil
+des commandes ; l'historique existant est repris avec
+    python -m app.commands rebuild-daily-sales
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e67d5cfedac7"
+down_revision: Union[str, Sequence[str], None] = "108bf1450887"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "dailysales",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("category", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "product_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("dailysales")
@@ -0,0 +1,39 @@
+"""order keyset indexes
+
+Revision ID: f7dd89112e32
+Revises: 197587401d52
+Create Date: 2026-10-17 09:12:04.318220
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f7dd89112e32"
+down_revision: Union[str, Sequence[str], None] = "197587401d52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # index composites pour la pagination keyset sur (created_at, id)
+    op.create_index(
+        "ix_order_created_at_id", "order", ["created_at", "id"], unique=False
+    )
+    op.create_index(
+        "ix_order_user_id_created_at_id",
+        "order",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_order_user_id_created_at_id", table_name="order")
+    op.drop_index("ix_order_created_at_id", table_name="order")
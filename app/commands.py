@@ -0,0 +1,161 @@
+"""
+Commandes de maintenance, à lancer hors de l'API :
+
+    python -m app.commands backfill-order-items [--batch-size 1000]
+    python -m app.commands partition-orders [--months-ahead 3]
+    python -m app.commands maintain-partitions [--months-ahead 3] [--retention-months 24]
+    python -m app.commands rebuild-daily-sales [--from 2025-01-01] [--to 2025-02-01]
+    python -m app.commands rebuild-distinct-customers [--from 2025-01-01] [--to 2025-02-01]
+    python -m app.commands rebuild-percentiles [--from 2025-01-01] [--to 2025-02-01]
+"""
+
+import argparse
+import logging
+from datetime import date
+
+from dotenv import load_dotenv
+from sqlmodel import Session
+
+from app.db import engine
+from app.services.daily_sales import reconstruire
+from app.services.distinct_customers import reconstruire_esquisses
+from app.services.order_snapshot import reprendre_instantanes
+from app.services.partitions import (
+    PARTITION_MONTHS_AHEAD,
+    PARTITION_RETENTION_MONTHS,
+    maintenir_partitions,
+    partitionner,
+)
+from app.services.quantiles import reconstruire_quantiles
+
+load_dotenv()
+
+
+def backfill_order_items(session: Session, args: argparse.Namespace):
+    """
+    Reprend l'instantané prix / nom des lignes de commande antérieures.
+    """
+    total = reprendre_instantanes(session, args.batch_size)
+    print(f"{total} lignes de commande reprises")
+
+
+def partition_orders(session: Session, args: argparse.Namespace):
+    """
+    Convertit order / orderitem en tables partitionnées par mois (PostgreSQL).
+    """
+    if partitionner(session, args.months_ahead):
+        print("Tables order et orderitem partitionnées par mois")
+    else:
+        print("Tables déjà partitionnées")
+
+
+def maintain_partitions(session: Session, args: argparse.Namespace):
+    """
+    Crée les partitions à venir et archive celles hors rétention.
+    """
+    creees, archivees = maintenir_partitions(
+        session, args.months_ahead, args.retention_months
+    )
+    print(f"{len(creees)} partitions créées, {len(archivees)} archivées")
+    for nom in archivees:
+        print(f"  archivée : {nom}")
+
+
+def rebuild_daily_sales(session: Session, args: argparse.Namespace):
+    """
+    Recalcule le cumul quotidien des ventes depuis les commandes.
+    """
+    total = reconstruire(session, args.debut, args.fin)
+    print(f"{total} lignes de cumul quotidien écrites")
+
+
+def rebuild_distinct_customers(session: Session, args: argparse.Namespace):
+    """
+    Recalcule les esquisses quotidiennes de clients distincts.
+    """
+    total = reconstruire_esquisses(session, args.debut, args.fin)
+    print(f"{total} registres d'esquisses quotidiennes écrits")
+
+
+def rebuild_percentiles(session: Session, args: argparse.Namespace):
+    """
+    Recalcule les esquisses de percentiles (montant, temps de préparation).
+    """
+    total = reconstruire_quantiles(session, args.debut, args.fin)
+    print(f"{total} commandes reprises dans les esquisses de percentiles")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Construit l'analyseur des sous-commandes.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m app.commands", description="Commandes de maintenance."
+    )
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    backfill = commandes.add_parser(
+        "backfill-order-items",
+        help="Complète unit_price / product_name des lignes de commande antérieures.",
+    )
+    backfill.add_argument("--batch-size", type=int, default=1000)
+    backfill.set_defaults(func=backfill_order_items)
+
+    partition = commandes.add_parser(
+        "partition-orders",
+        help="Partitionne order / orderitem par mois (PostgreSQL, une seule fois).",
+    )
+    partition.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    partition.set_defaults(func=partition_orders)
+
+    maintain = commandes.add_parser(
+        "maintain-partitions",
+        help="Crée les partitions à venir, archive les plus anciennes.",
+    )
+    maintain.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    maintain.add_argument(
+        "--retention-months", type=int, default=PARTITION_RETENTION_MONTHS
+    )
+    maintain.set_defaults(func=maintain_partitions)
+
+    rebuild = commandes.add_parser(
+        "rebuild-daily-sales",
+        help="Recalcule dailysales et dailycategoryorders sur [--from, --to) (tout par défaut).",
+    )
+    rebuild.add_argument("--from", dest="debut", type=date.fromisoformat)
+    rebuild.add_argument("--to", dest="fin", type=date.fromisoformat)
+    rebuild.set_defaults(func=rebuild_daily_sales)
+
+    clients = commandes.add_parser(
+        "rebuild-distinct-customers",
+        help="Recalcule la table dailycustomers sur [--from, --to) (tout par défaut).",
+    )
+    clients.add_argument("--from", dest="debut", type=date.fromisoformat)
+    clients.add_argument("--to", dest="fin", type=date.fromisoformat)
+    clients.set_defaults(func=rebuild_distinct_customers)
+
+    quantiles = commandes.add_parser(
+        "rebuild-percentiles",
+        help="Recalcule la table dailyquantiles sur [--from, --to) (tout par défaut).",
+    )
+    quantiles.add_argument("--from", dest="debut", type=date.fromisoformat)
+    quantiles.add_argument("--to", dest="fin", type=date.fromisoformat)
+    quantiles.set_defaults(func=rebuild_percentiles)
+    return parser
+
+
+def main(argv=None):
+    """
+    Point d'entrée : exécute la sous-commande demandée.
+    """
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+    with Session(engine) as session:
+        try:
+            args.func(session, args)
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,218 @@
+import logging
 import os
+import threading
+import time
 
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL n'est pas défini. A configurer dans le dans .env")
 
-engine = create_engine(DATABASE_URL, echo=True)
+logger = logging.getLogger(__name__)
 
+# Réglages du pool de connexions (surchargés via .env)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# log SQL brut sur stdout (à réserver au debug local, cf. app.instrumentation)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+# mode asynchrone : AsyncSession + driver async (asyncpg / aiosqlite)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+# au-delà de ce temps d'attente (ms) pour obtenir une connexion, on log un warning
+DB_POOL_WAIT_WARN_MS = float(os.getenv("DB_POOL_WAIT_WARN_MS", "100"))
 
-def get_session():
+
+def engine_options(url: str) -> dict:
+    """
+    Construit les options du pool de connexions pour une URL donnée.
+
+    SQLite utilise un pool spécifique (pas de taille ni d'overflow), on ne
+    passe donc ces réglages qu'aux autres bases (PostgreSQL).
+
+    Args:
+        url (str): URL de connexion à la base.
+
+    Returns:
+        dict: Arguments à transmettre à create_engine.
+    """
+    options: dict = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+engine = create_engine(DATABASE_URL, echo=DB_ECHO, **engine_options(DATABASE_URL))
+
+# drivers async correspondant aux drivers sync supportés
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Convertit une URL de connexion sync en URL pour le driver async.
+
+    DATABASE_URL_ASYNC, si défini, est utilisé tel quel.
+
+    Args:
+        url (str): URL sync (ex: postgresql+psycopg2://..., sqlite:///...).
+
+    Raises:
+        RuntimeError: Si aucun driver async n'est connu pour cette base.
+
+    Returns:
+        str: URL utilisable par create_async_engine.
     """
-    Crée et retourne une session SQLModel liée à l'engine configuré.
+    explicit = os.getenv("DATABASE_URL_ASYNC")
+    if explicit:
+        return explicit
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"Pas de driver async connu pour la base '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+_async_engine: AsyncEngine | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Retourne l'engine async, créé au premier appel.
+
+    La création est différée pour ne pas exiger asyncpg/aiosqlite
+    quand l'application tourne en mode sync.
 
     Returns:
+        AsyncEngine: engine SQLAlchemy async.
+    """
+    global _async_engine
+    if _async_engine is None:
+        url = async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(url, echo=DB_ECHO, **engine_options(url))
+    return _async_engine
+
+
+class PoolStats:
+    """
+    Statistiques d'attente au checkout du pool de connexions.
+
+    Attributs:
+        checkouts (int): Nombre de connexions obtenues.
+        total_wait (float): Temps total d'attente (secondes).
+        max_wait (float): Plus long temps d'attente observé (secondes).
+        slow_checkouts (int): Nombre d'attentes au-delà de DB_POOL_WAIT_WARN_MS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Remet les compteurs à zéro."""
+        with self._lock:
+            self.checkouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.slow_checkouts = 0
+
+    def record(self, wait: float):
+        """
+        Enregistre le temps d'attente d'un checkout.
+
+        Args:
+            wait (float): Temps d'attente en secondes.
+        """
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait * 1000 >= DB_POOL_WAIT_WARN_MS:
+                self.slow_checkouts += 1
+                logger.warning("Attente pool de connexions : %.1f ms", wait * 1000)
+
+    def snapshot(self) -> dict:
+        """
+        Retourne l'état courant des compteurs et du pool.
+
+        Returns:
+            dict: Compteurs d'attente (en ms) et statut du pool.
+        """
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_avg_ms": round(
+                    self.total_wait * 1000 / self.checkouts if self.checkouts else 0.0,
+                    3,
+                ),
+                "wait_max_ms": round(self.max_wait * 1000, 3),
+                "slow_checkouts": self.slow_checkouts,
+                "pool": (get_async_engine() if DB_ASYNC else engine).pool.status(),
+            }
+
+
+pool_stats = PoolStats()
+
+
+def get_session():
+    """
+    Fournit une session SQLModel liée à la requête en cours.
+
+    La session est fermée dès que la réponse est construite : la connexion
+    revient au pool et toute transaction non validée est annulée.
+
+    Yields:
         Session: objet session SQLModel utilisable pour les transactions.
     """
-    return Session(engine)
+    session = Session(engine)
+    try:
+        # checkout explicite pour mesurer l'attente sur le pool
+        started = time.perf_counter()
+        session.connection()
+        pool_stats.record(time.perf_counter() - started)
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+async def get_async_session():
+    """
+    Équivalent async de get_session, utilisé quand DB_ASYNC est activé.
+
+    expire_on_commit est désactivé : les objets restent lisibles après
+    commit sans relancer de requête hors du contexte async.
+
+    Yields:
+        AsyncSession: session SQLModel async.
+    """
+    session = AsyncSession(get_async_engine(), expire_on_commit=False)
+    try:
+        started = time.perf_counter()
+        await session.connection()
+        pool_stats.record(time.perf_counter() - started)
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
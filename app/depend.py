@@ -0,0 +1,127 @@
+"""
+Dépendances partagées entre les routers.
+
+`db_endpoint` permet d'écrire chaque endpoint une seule fois, avec une
+`Session` sync, et de le servir en async quand `DB_ASYNC` est activé :
+la session injectée devient une `AsyncSession` et le corps de l'endpoint
+est exécuté via `AsyncSession.run_sync`, ce qui libère la boucle
+d'événements pendant les allers-retours avec la base au lieu de bloquer
+un thread du threadpool.
+
+`run_sync` exécute ce corps sur le thread de la boucle (dans un greenlet) :
+seules les attentes de la base la libèrent, un calcul CPU la bloque. Les
+endpoints qui hachent ou vérifient un mot de passe (bcrypt) ne sont donc pas
+décorés : ils restent servis dans le threadpool avec une `Session` sync, dans
+les deux modes.
+
+Les endpoints async (long-poll) reçoivent `Depends(get_db_session)` : la
+session du mode courant, sync ou async, et appellent les fonctions de lecture
+sync via `run_db`.
+"""
+
+import functools
+import inspect
+
+from fastapi import Depends, params
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import DB_ASYNC, get_async_session, get_session
+
+
+def _session_params(signature: inspect.Signature) -> list[str]:
+    """
+    Liste les paramètres injectés avec Depends(get_session).
+    """
+    return [
+        name
+        for name, param in signature.parameters.items()
+        if isinstance(param.default, params.Depends)
+        and param.default.dependency is get_session
+    ]
+
+
+def to_async_endpoint(func):
+    """
+    Construit la version async d'un endpoint (ou d'une dépendance) sync.
+
+    Args:
+        func (Callable): Fonction sync recevant une Session via Depends(get_session).
+
+    Returns:
+        Callable: Coroutine dont la session est une AsyncSession ; le corps
+        de `func` est exécuté dans `run_sync` avec la session sync associée.
+    """
+    signature = inspect.signature(func)
+    names = _session_params(signature)
+    if not names:
+        return func
+
+    parameters = [
+        (
+            param.replace(default=Depends(get_async_session), annotation=AsyncSession)
+            if name in names
+            else param
+        )
+        for name, param in signature.parameters.items()
+    ]
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        async_session = kwargs[names[0]]
+
+        def call(sync_session):
+            for name in names:
+                kwargs[name] = sync_session
+            return func(*args, **kwargs)
+
+        return await async_session.run_sync(call)
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)  # type: ignore[attr-defined]
+    return wrapper
+
+
+def db_endpoint(func):
+    """
+    Décorateur appliqué aux endpoints utilisant la base.
+
+    Retourne l'endpoint inchangé en mode sync, sa version async sinon.
+    """
+    if not DB_ASYNC:
+        return func
+    return to_async_endpoint(func)
+
+
+# session injectée dans les endpoints async : AsyncSession si DB_ASYNC
+get_db_session = get_async_session if DB_ASYNC else get_session
+
+
+async def run_db(session, func, *args):
+    """
+    Exécute une fonction sync `func(session, *args)` depuis un endpoint async.
+
+    Args:
+        session (Session | AsyncSession): Session injectée par get_db_session.
+        func (Callable): Fonction recevant une Session sync en premier argument.
+
+    Returns:
+        Any: Résultat de `func`. En mode async, `func` s'exécute sur le thread
+        de la boucle (run_sync) : seules ses attentes de la base la libèrent ;
+        en mode sync, elle s'exécute dans le threadpool.
+    """
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(func, *args)
+    return await run_in_threadpool(func, session, *args)
+
+
+async def release_db(session):
+    """
+    Termine la transaction en cours : la connexion retourne au pool.
+
+    À appeler avant une attente longue (long-poll), après des lectures seules ;
+    la session reste utilisable et reprend une connexion à la requête suivante.
+    """
+    if isinstance(session, AsyncSession):
+        await session.commit()
+    else:
+        await run_in_threadpool(session.commit)
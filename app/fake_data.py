@@ -175,7 +175,9 @@ def create_fake_order_items(orders, products):
                 order_id=order.id,
                 product_id=product.id,
                 quantity=quantity,
-                created_at=fake.date_time(),
+                unit_price=product.unit_price,
+                product_name=product.name,
+                created_at=order.created_at,
             )
 
             order_items.append(order_item_data)
@@ -0,0 +1,206 @@
+"""
+Instrumentation des requêtes SQL.
+
+Remplace `echo=True` : chaque statement exécuté par un engine SQLAlchemy est
+chronométré via les événements `before_cursor_execute` / `after_cursor_execute`
+et rattaché à la requête HTTP en cours (ContextVar). En fin de requête :
+- en mode debug (`SQL_DEBUG`), les compteurs sont renvoyés en en-têtes
+  `X-DB-Statements`, `X-DB-Time-Ms`, `X-DB-Slowest-Ms` et `X-DB-N-Plus-One` ;
+- dans tous les cas, ils sont agrégés par route et exposés par `GET /metrics/sql`.
+
+Un même statement exécuté au moins `SQL_N_PLUS_ONE_THRESHOLD` fois dans une
+requête est signalé comme motif N+1 (warning + compteur par route).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SQL_DEBUG = os.getenv("SQL_DEBUG", "false").lower() in ("1", "true", "yes")
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+# longueur max du SQL conservé pour le statement le plus lent
+SQL_MAX_LENGTH = 300
+
+
+class RequestStats:
+    """
+    Compteurs SQL d'une requête HTTP.
+
+    Attributs:
+        statements (int): Nombre de statements exécutés.
+        total_time (float): Temps cumulé passé en base (secondes).
+        slowest_time (float): Durée du statement le plus lent (secondes).
+        slowest_sql (str | None): SQL du statement le plus lent.
+        by_statement (Counter): Nombre d'exécutions par texte SQL.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql: Optional[str] = None
+        self.by_statement: Counter = Counter()
+
+    def record(self, statement: str, duration: float):
+        """
+        Ajoute un statement exécuté.
+
+        Args:
+            statement (str): SQL paramétré.
+            duration (float): Durée d'exécution en secondes.
+        """
+        self.statements += 1
+        self.total_time += duration
+        self.by_statement[statement] += 1
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_sql = statement
+
+    def n_plus_one(self) -> list[tuple[str, int]]:
+        """
+        Retourne les statements répétés au-delà du seuil N+1.
+
+        Returns:
+            list[tuple[str, int]]: (SQL, nombre d'exécutions).
+        """
+        return [
+            (sql, count)
+            for sql, count in self.by_statement.items()
+            if count >= SQL_N_PLUS_ONE_THRESHOLD
+        ]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("sql_stats", default=None)
+
+
+def start_request() -> RequestStats:
+    """
+    Démarre la collecte pour la requête en cours.
+
+    Returns:
+        RequestStats: Compteurs de la requête (partagés avec le threadpool).
+    """
+    stats = RequestStats()
+    _current.set(stats)
+    return stats
+
+
+def current_stats() -> Optional[RequestStats]:
+    """Retourne les compteurs de la requête en cours, s'il y en a."""
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+class SqlMetrics:
+    """
+    Agrégats SQL par route, partagés par tous les workers du process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+
+    def reset(self):
+        """Vide les agrégats."""
+        with self._lock:
+            self._routes.clear()
+
+    def add(self, route: str, stats: RequestStats):
+        """
+        Agrège les compteurs d'une requête terminée.
+
+        Args:
+            route (str): Méthode et chemin de la route (ex: "POST /orders/").
+            stats (RequestStats): Compteurs de la requête.
+        """
+        suspects = stats.n_plus_one()
+        for sql, count in suspects:
+            logger.warning("N+1 probable sur %s : %d x %s", route, count, sql)
+        with self._lock:
+            entry = self._routes.setdefault(
+                route,
+                {
+                    "requests": 0,
+                    "statements": 0,
+                    "db_time_ms": 0.0,
+                    "max_statements": 0,
+                    "slowest_ms": 0.0,
+                    "slowest_sql": None,
+                    "n_plus_one": 0,
+                },
+            )
+            entry["requests"] += 1
+            entry["statements"] += stats.statements
+            entry["db_time_ms"] += stats.total_time * 1000
+            entry["max_statements"] = max(entry["max_statements"], stats.statements)
+            entry["n_plus_one"] += bool(suspects)
+            if stats.slowest_time * 1000 > entry["slowest_ms"]:
+                entry["slowest_ms"] = stats.slowest_time * 1000
+                entry["slowest_sql"] = (stats.slowest_sql or "")[:SQL_MAX_LENGTH]
+
+    def snapshot(self) -> dict:
+        """
+        Retourne les agrégats par route (temps en ms, moyennes par requête).
+
+        Returns:
+            dict: Agrégats indexés par route.
+        """
+        with self._lock:
+            return {
+                route: {
+                    **entry,
+                    "db_time_ms": round(entry["db_time_ms"], 3),
+                    "slowest_ms": round(entry["slowest_ms"], 3),
+                    "avg_statements": round(entry["statements"] / entry["requests"], 2),
+                }
+                for route, entry in self._routes.items()
+            }
+
+
+sql_metrics = SqlMetrics()
+
+
+def stats_headers(stats: RequestStats) -> dict[str, str]:
+    """
+    Construit les en-têtes de debug d'une requête.
+
+    Args:
+        stats (RequestStats): Compteurs de la requête.
+
+    Returns:
+        dict[str, str]: En-têtes X-DB-*.
+    """
+    return {
+        "X-DB-Statements": str(stats.statements),
+        "X-DB-Time-Ms": f"{stats.total_time * 1000:.3f}",
+        "X-DB-Slowest-Ms": f"{stats.slowest_time * 1000:.3f}",
+        "X-DB-N-Plus-One": str(len(stats.n_plus_one())),
+    }
@@ -1,18 +1,66 @@
-import os
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
-from sqlmodel import Session, create_engine
+from fastapi import Depends, FastAPI, Request
+from sqlmodel import Session
 
+from app.db import engine, pool_stats
 from app.fake_data import add_fake_data, reset_db
-from app.routers import delivery, login, order, product, user
-
-app = FastAPI()
+from app.instrumentation import SQL_DEBUG, sql_metrics, start_request, stats_headers
+from app.models import User
+from app.routers import delivery, login, order, product, stats, user
+from app.security import check_admin, get_current_user
+from app.services.bestsellers import (
+    BESTSELLERS_WARMUP,
+    recharger_classement,
+    reconcilier_classement,
+)
 
 load_dotenv()  # charge DATABASE_URL
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL, echo=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Démarrage : préchauffe le classement des meilleures ventes puis lance sa
+    réconciliation périodique ; arrêt : stoppe la tâche.
+
+    Rien n'est lancé si BESTSELLERS_WARMUP est désactivé (tests : la base de
+    l'application n'est alors pas celle de `engine`).
+    """
+    if not BESTSELLERS_WARMUP:
+        yield
+        return
+    await asyncio.to_thread(recharger_classement, engine)
+    reconciliation = asyncio.create_task(reconcilier_classement(engine))
+    yield
+    reconciliation.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await reconciliation
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def instrumenter_sql(request: Request, call_next):
+    """
+    Collecte les statistiques SQL de chaque requête.
+
+    Les compteurs sont agrégés par route ; les requêtes sans route (404,
+    URL scannées) partagent une seule entrée par méthode. En mode SQL_DEBUG
+    ils sont aussi renvoyés dans les en-têtes X-DB-* de la réponse.
+    """
+    stats = start_request()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "<unmatched>"
+    sql_metrics.add(f"{request.method} {path}", stats)
+    if SQL_DEBUG:
+        response.headers.update(stats_headers(stats))
+    return response
 
 with Session(engine) as session:
     if __name__ == "__main__":
@@ -31,8 +79,40 @@ def read_root():
     return {"message": "API RestauSimplon fonctionne bien"}
 
 
+@app.get("/health/db")
+def etat_pool_db(current_user: User = Depends(get_current_user)):
+    """
+    Expose l'état du pool de connexions.
+
+    - Accessible uniquement aux **admins**.
+
+    Returns:
+        dict: Nombre de checkouts, temps d'attente moyen et max (ms),
+        nombre d'attentes lentes et statut du pool.
+    """
+    check_admin(current_user)
+    return pool_stats.snapshot()
+
+
+@app.get("/metrics/sql")
+def metriques_sql(current_user: User = Depends(get_current_user)):
+    """
+    Expose les statistiques SQL agrégées par route.
+
+    - Accessible uniquement aux **admins** (le SQL des statements les plus
+      lents révèle le schéma).
+
+    Returns:
+        dict: Par route, nombre de requêtes, statements, temps base (ms),
+        statement le plus lent et nombre de requêtes suspectées N+1.
+    """
+    check_admin(current_user)
+    return sql_metrics.snapshot()
+
+
 app.include_router(user.router)
 app.include_router(product.router)
 app.include_router(order.router)
 app.include_router(delivery.router)
 app.include_router(login.router)
+app.include_router(stats.router)
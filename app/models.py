@@ -1,7 +1,7 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import List, Optional
 
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, Index, Text, text
 from sqlmodel import Field, Relationship, SQLModel
 
 class User(SQLModel, table=True):
@@ -73,10 +73,26 @@ class Order(SQLModel, table=True):
         total_amount (float): Montant total de la commande.
         status (str): Statut de la commande (en préparation, prête, servie).
         created_at (datetime): Date de création de la commande.
+        ready_at (datetime, optional): Passage au statut « Prete » (fin de préparation).
+        served_at (datetime, optional): Passage au statut « Servie ».
         user (User, optional): Utilisateur associé.
         delivery (Delivery, optional): Livraison associée.
         order_items (List[OrderItem]): Liste des produits commandés.
     """
+    __table_args__ = (
+        # pagination keyset (created_at, id) : listes globales et par utilisateur
+        Index("ix_order_created_at_id", "created_at", "id"),
+        Index("ix_order_user_id_created_at_id", "user_id", "created_at", "id"),
+        # file de la cuisine : index partiel, limité aux commandes non servies
+        Index(
+            "ix_order_open_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status <> 'Servie'"),
+            sqlite_where=text("status <> 'Servie'"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     total_amount: float
@@ -84,6 +100,8 @@ class Order(SQLModel, table=True):
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc), nullable=False
     )
+    ready_at: Optional[datetime] = None
+    served_at: Optional[datetime] = None
 
     user: Optional[User] = Relationship(back_populates="orders")
 
@@ -133,7 +151,9 @@ class OrderItem(SQLModel, table=True):
         order_id (int): Identifiant de la commande.
         product_id (int): Identifiant du produit.
         quantity (int): Quantité commandée.
-        created_at (datetime): Date de création de la ligne de commande.
+        unit_price (float, optional): Prix unitaire du produit au moment de la commande.
+        product_name (str, optional): Nom du produit au moment de la commande.
+        created_at (datetime): Date de la commande (clé de partition partagée avec Order).
         order (Order, optional): Commande associée.
         product (Product, optional): Produit associé.
     """
@@ -144,9 +164,115 @@ class OrderItem(SQLModel, table=True):
         sa_column=Column(ForeignKey("product.id", ondelete="CASCADE"), primary_key=True)
     )
     quantity: int
+    # instantané à la commande (NULL pour les lignes antérieures non reprises)
+    unit_price: Optional[float] = None
+    product_name: Optional[str] = None
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc), nullable=False
     )
 
     order: Optional[Order] = Relationship(back_populates="order_items")
     product: Optional[Product] = Relationship(back_populates="order_items")
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    Réponse enregistrée pour une clé `Idempotency-Key` (création / patch de commande).
+
+    Attributs:
+        key (str): Empreinte SHA-256 de (utilisateur, endpoint, clé du client).
+        request_hash (str): Empreinte SHA-256 du corps de la requête d'origine.
+        status_code (int): Code HTTP de la réponse d'origine.
+        response_body (str): Corps JSON de la réponse d'origine.
+        expires_at (datetime): Date d'expiration de la clé.
+    """
+    key: str = Field(primary_key=True, max_length=64)
+    request_hash: str = Field(max_length=64)
+    status_code: int
+    response_body: str = Field(sa_column=Column(Text, nullable=False))
+    expires_at: datetime = Field(index=True)
+
+
+class DailySales(SQLModel, table=True):
+    """
+    Ventes agrégées par jour et par produit (table de cumul des statistiques).
+
+    Mise à jour dans la même transaction que la création, la modification et
+    la suppression des commandes ; reconstructible par
+    `python -m app.commands rebuild-daily-sales`.
+
+    Attributs:
+        day (date): Jour de la commande (fuseau du restaurant).
+        product_id (int): Identifiant du produit (sans clé étrangère : l'historique
+            survit à la suppression du produit).
+        category (str): Catégorie du produit.
+        quantity (int): Quantité vendue.
+        revenue (float): Chiffre d'affaires (prix figé à la commande).
+        orders (int): Nombre de commandes contenant le produit.
+    """
+    day: date = Field(primary_key=True)
+    product_id: int = Field(primary_key=True)
+    category: str
+    quantity: int = 0
+    revenue: float = 0
+    orders: int = 0
+
+
+class DailyCategoryOrders(SQLModel, table=True):
+    """
+    Commandes agrégées par jour et par catégorie (cumul des statistiques).
+
+    Une commande compte une fois dans chaque catégorie de ses produits, même
+    avec plusieurs produits de la catégorie. Tenue à jour et reconstruite
+    avec `DailySales`.
+
+    Attributs:
+        day (date): Jour de la commande (fuseau du restaurant).
+        category (str): Catégorie de produits.
+        orders (int): Nombre de commandes contenant la catégorie.
+    """
+    day: date = Field(primary_key=True)
+    category: str = Field(primary_key=True)
+    orders: int = 0
+
+
+class DailyCustomers(SQLModel, table=True):
+    """
+    Esquisse HyperLogLog des clients (Order.user_id) ayant commandé un jour,
+    une ligne par registre non nul.
+
+    Tenue à jour par chaque création de commande (le rang d'un registre ne
+    fait que croître) ; recalculable par
+    `python -m app.commands rebuild-distinct-customers`.
+
+    Attributs:
+        day (date): Jour des commandes (fuseau du restaurant).
+        bucket (int): Indice du registre (voir app/services/distinct_customers.py).
+        rank (int): Rang maximal des clients du registre.
+    """
+    day: date = Field(primary_key=True)
+    bucket: int = Field(primary_key=True)
+    rank: int
+
+
+class DailyQuantiles(SQLModel, table=True):
+    """
+    Esquisses DDSketch quotidiennes (montant des commandes, temps de préparation).
+
+    Chaque ligne compte les commandes d'un jour dont la valeur tombe dans un
+    seau logarithmique ; les comptes s'additionnent entre jours. Mise à jour
+    dans la même transaction que l'écriture des commandes ; reconstructible par
+    `python -m app.commands rebuild-percentiles`.
+
+    Attributs:
+        day (date): Jour de la commande (fuseau du restaurant).
+        metric (str): "amount" (montant total) ou "prep_time" (secondes).
+        category (str): Catégorie présente dans la commande, "" pour toutes.
+        bucket (int): Indice du seau (voir app/services/quantiles.py).
+        count (int): Nombre de commandes.
+    """
+    day: date = Field(primary_key=True)
+    metric: str = Field(primary_key=True)
+    category: str = Field(primary_key=True)
+    bucket: int = Field(primary_key=True)
+    count: int = 0
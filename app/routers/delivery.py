@@ -2,12 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
 from app.db import get_session
+from app.depend import db_endpoint
 from app.models import Delivery
 from app.schemas.delivery import DeliveryCreate, DeliveryRead, DeliveryUpdate
 
 router = APIRouter(prefix="/delivery", tags=["delivery"])
 
 @router.get("/", response_model=list[DeliveryRead])
+@db_endpoint
 def lister_les_livraisons(session: Session = Depends(get_session)):
     """
     Récupère la liste de toutes les livraisons.
@@ -22,6 +24,7 @@ def lister_les_livraisons(session: Session = Depends(get_session)):
     return produits
 
 @router.get("/{delivery_id}", response_model=DeliveryRead)
+@db_endpoint
 def lire_une_livraison_id(delivery_id: int, session: Session = Depends(get_session)):
     """
     Récupère une livraison spécifique par son identifiant.
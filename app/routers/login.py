@@ -4,6 +4,7 @@ from jose import JWTError, jwt
 from sqlmodel import Session, select
 
 from app.db import get_session
+from app.depend import db_endpoint
 from app.models import User
 from app.schemas.user import UserCreate
 from app.security import (
@@ -34,6 +35,7 @@ def get_user_by_email(email: str, session: Session) -> User | None:
     result = session.exec(statement)
     return result.first()
 
+# pas de @db_endpoint : bcrypt est servi dans le threadpool (cf. app.depend)
 @router.post("/token") 
 def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -64,6 +66,7 @@ def login_for_access_token(
 
 
 @router.post("/refresh-token")
+@db_endpoint
 def refresh_access_token(
     refresh_token: str = Body(..., embed=True), session: Session = Depends(get_session)
 ):
@@ -117,6 +120,7 @@ def read_users_me(current_user: User = Depends(get_current_user)):
     """
     return current_user
 
+# pas de @db_endpoint : bcrypt est servi dans le threadpool (cf. app.depend)
 @router.post("/register")
 def register(user_data: UserCreate, session: Session = Depends(get_session)):
     """
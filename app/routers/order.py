@@ -1,25 +1,90 @@
 from datetime import date as dt_date
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
 
 from app.db import get_session
+from app.depend import db_endpoint, get_db_session, release_db, run_db
 from app.enumerations import Role, Status
-from app.models import Order, OrderItem, Product, User
+from app.models import Order, User
 from app.schemas.order import (
+    OrderBatchCreate,
+    OrderBatchResponse,
     OrderCreateWithItems,
-    OrderItemInOrderRead,
+    OrderPage,
     OrderPatchWithItems,
+    OrderRead,
     OrderReadWithItems,
+    OrderStatusUpdate,
 )
 from app.security import get_current_user
+from app.services.bestsellers import classement
+from app.services.daily_sales import cumuler_ecart
+from app.services.distinct_customers import cumuler_clients
+from app.services.events import (
+    LONG_POLL_MAX_SECONDS,
+    ORDER_CREATED,
+    ORDER_DELETED,
+    ORDER_STATUS,
+    ORDER_UPDATED,
+    attendre_changement,
+    flux_sse,
+    hub,
+)
+from app.services.idempotency import requete_idempotente
+from app.services.order_batch import creer_commandes_en_lot
+from app.services.order_export import (
+    EXPORT_FORMATS,
+    exporter_csv,
+    exporter_ndjson,
+    select_export,
+)
+from app.services.order_read import (
+    PAGE_DEFAULT_LIMIT,
+    PAGE_MAX_LIMIT,
+    bornes_journee,
+    filtrer_periode,
+    json_sql_disponible,
+    lire_commande,
+    lire_file_cuisine,
+    lire_page,
+    lire_page_json,
+    select_commandes,
+)
+from app.services.order_status import changer_statut, horodater
+from app.services.order_write import (
+    ProduitPrix,
+    appliquer_ecart,
+    calculer_total,
+    charger_produits,
+    consolider_items,
+    construire_dto,
+    inserer_lignes,
+    lignes_existantes,
+    reserver_stock,
+    tarifer,
+)
+from app.services.quantiles import cumuler_ecriture, cumuler_mesures, mesurer
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-@router.get("/", response_model=list[OrderReadWithItems])
+@router.get("/", response_model=OrderPage)
+@db_endpoint
 def lister_les_commandes(
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
@@ -27,76 +92,157 @@ def lister_les_commandes(
     Récupère la liste de toutes les commandes.
 
     - Accessible uniquement aux **admins** et **employés**.
-    - Retourne les commandes avec leurs articles associés.
+    - Retourne les commandes avec leurs articles associés, des plus récentes
+      aux plus anciennes, par pages de `limit` ; `next_cursor` donne la page suivante.
     """
     if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Seuls les administrateurs et les employées peuvent lister les commandes.",
         )
-    rows = session.exec(
-        select(Order).options(
-            selectinload(Order.order_items).selectinload(OrderItem.product)
+    if json_sql_disponible(session):
+        return Response(
+            lire_page_json(session, select_commandes(), cursor, limit),
+            media_type="application/json",
         )
-    ).all()
-    result: list[OrderReadWithItems] = []
-    for c in rows:
-        dto = OrderReadWithItems.model_validate(c, from_attributes=True)
-        dto.items = [
-            OrderItemInOrderRead(
-                product_id=oi.product_id,
-                product_name=(oi.product.name if oi.product else ""),
-                quantity=oi.quantity,
-            )
-            for oi in c.order_items
-        ]
-        result.append(dto)
-    return result
+    return lire_page(session, select_commandes(), cursor, limit)
 
-@router.get("/by-date", response_model=list[OrderReadWithItems])
+@router.get("/by-date", response_model=OrderPage)
+@db_endpoint
 def lire_commandes_par_date(
-    date: dt_date,
+    date: Optional[dt_date] = None,
+    debut: Optional[datetime] = Query(None, alias="from"),
+    fin: Optional[datetime] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Récupère les commandes créées à une date donnée.
+    Récupère les commandes créées à une date ou sur une période donnée.
 
     - Accessible uniquement aux **admins** et **employés**.
-    - Retourne les commandes avec leurs articles.
+    - `date` : journée complète (fuseau du restaurant).
+    - `from` / `to` : période semi-ouverte [from, to) ; sans fuseau, les heures
+      sont interprétées dans le fuseau du restaurant. Une seule borne est possible.
+    - Retourne les commandes avec leurs articles, paginées par curseur.
     """
     if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Seuls les administrateurs et les employées peuvent voir les commandes par date.",
         )
+    if date is not None:
+        if debut is not None or fin is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Utiliser soit date, soit from/to.",
+            )
+        debut, fin = bornes_journee(date)
+    elif debut is None and fin is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Paramètre date ou from/to requis.",
+        )
+
+    stmt = filtrer_periode(select_commandes(), debut, fin)
+    if json_sql_disponible(session):
+        return Response(
+            lire_page_json(session, stmt, cursor, limit),
+            media_type="application/json",
+        )
+    return lire_page(session, stmt, cursor, limit)
+
+
+# Export en flux : pas de db_endpoint, le corps est lu par un générateur sync
+@router.get("/export")
+def exporter_les_commandes(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    debut: Optional[datetime] = Query(None, alias="from"),
+    fin: Optional[datetime] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Exporte les commandes en flux, de la plus ancienne à la plus récente.
 
-    stmt = (
-        select(Order)
-        .where(func.date(Order.created_at) == date)
-        .options(selectinload(Order.order_items).selectinload(OrderItem.product))
+    - Accessible uniquement aux **admins** et **employés**.
+    - `format` : `ndjson` (une commande par ligne, avec ses articles) ou
+      `csv` (une ligne par article).
+    - `from` / `to` : période semi-ouverte [from, to), optionnelle.
+    - Les commandes sont lues par paquets et envoyées au fil de l'eau,
+      sans charger tout l'export en mémoire.
+    """
+    if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Seuls les administrateurs et les employées peuvent exporter les commandes.",
+        )
+    stmt = filtrer_periode(select_export(), debut, fin)
+    exporter = exporter_csv if format == "csv" else exporter_ndjson
+    return StreamingResponse(
+        exporter(session.get_bind(), stmt),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
     )
 
-    rows = session.exec(stmt).all()
-    result: list[OrderReadWithItems] = []
-    for c in rows:
-        dto = OrderReadWithItems.model_validate(c, from_attributes=True)
-        dto.items = [
-            OrderItemInOrderRead(
-                product_id=oi.product_id,
-                product_name=(oi.product.name if oi.product else ""),
-                quantity=oi.quantity,
-            )
-            for oi in c.order_items
-        ]
-        result.append(dto)
-    return result
+
+# Flux en direct (SSE) pour les écrans de la cuisine — avant /{order_id}
+@router.get("/events")
+async def suivre_les_commandes(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Flux Server-Sent Events des commandes (création, modification, statut, suppression).
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - Chaque événement porte son type (`order.created`, `order.updated`,
+      `order.status`, `order.deleted`) et la commande en JSON.
+    - Aucune requête SQL pendant le flux, hormis l'authentification initiale.
+    """
+    if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Seuls les administrateurs et les employées peuvent suivre les commandes.",
+        )
+    abonnement = hub.abonner()
+    return StreamingResponse(
+        flux_sse(abonnement, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# File de la cuisine — avant /{order_id}
+@router.get("/queue", response_model=List[OrderReadWithItems])
+@db_endpoint
+def lire_la_file_cuisine(
+    limit: int = Query(100, ge=1, le=PAGE_MAX_LIMIT),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Récupère les commandes non servies, de la plus ancienne à la plus récente.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - Retourne au plus `limit` commandes avec leurs articles.
+    """
+    if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Seuls les administrateurs et les employées peuvent voir la file.",
+        )
+    return lire_file_cuisine(session, limit)
 
 
 # Lire par utilisateur — client = lui-même ; staff = n'importe qui
-@router.get("/user/{user_id}", response_model=list[OrderReadWithItems])
+@router.get("/user/{user_id}", response_model=OrderPage)
+@db_endpoint
 def lire_les_commandes_par_utilisateur(
     user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
@@ -105,35 +251,38 @@ def lire_les_commandes_par_utilisateur(
 
     - Un **client** ne peut voir que ses propres commandes.
     - Les **admins** et **employés** peuvent consulter celles de n’importe quel utilisateur.
+    - Résultat paginé par curseur (`cursor`, `limit`, `next_cursor`).
     """
     if current_user.role == Role.CLIENT and current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit"
         )
 
-    rows = session.exec(
-        select(Order)
-        .where(Order.user_id == user_id)
-        .options(selectinload(Order.order_items).selectinload(OrderItem.product))
-    ).all()
-    result: list[OrderReadWithItems] = []
-    for c in rows:
-        dto = OrderReadWithItems.model_validate(c, from_attributes=True)
-        dto.items = [
-            OrderItemInOrderRead(
-                product_id=oi.product_id,
-                product_name=(oi.product.name if oi.product else ""),
-                quantity=oi.quantity,
-            )
-            for oi in c.order_items
-        ]
-        result.append(dto)
-    return result
+    stmt = select_commandes().where(Order.user_id == user_id)
+    return lire_page(session, stmt, cursor, limit)
+
+
+def _verifier_acces(
+    commande: Optional[OrderReadWithItems], role: str, user_id: int
+) -> OrderReadWithItems:
+    """
+    Vérifie qu'une commande existe et que l'utilisateur peut la consulter.
+    """
+    if not commande:
+        raise HTTPException(status_code=404, detail="Commande non trouvée")
+    if role == Role.CLIENT and commande.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit"
+        )
+    return commande
+
 
 @router.get("/{order_id}", response_model=OrderReadWithItems)
-def lire_une_commande_par_orderid(
+async def lire_une_commande_par_orderid(
     order_id: int,
-    session: Session = Depends(get_session),
+    wait_for_change: float = Query(0, ge=0, le=LONG_POLL_MAX_SECONDS),
+    since_status: Optional[Status] = None,
+    session: Session = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -141,38 +290,42 @@ def lire_une_commande_par_orderid(
 
     - Un client ne peut accéder qu’à ses propres commandes.
     - Les admins et employés peuvent accéder à toutes les commandes.
+    - Long-poll : avec `wait_for_change` (secondes), la réponse attend que le
+      statut diffère de `since_status` (par défaut : le statut actuel), puis
+      renvoie la commande ; à l'expiration du délai, la commande inchangée est
+      renvoyée. Aucune connexion à la base n'est gardée pendant l'attente.
     """
-    c = session.exec(
-        select(Order)
-        .where(Order.id == order_id)
-        .options(selectinload(Order.order_items).selectinload(OrderItem.product))
-    ).first()
-    if not c:
-        raise HTTPException(status_code=404, detail="Commande non trouvée")
-
-    if current_user.role == Role.CLIENT and c.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit"
+    role, user_id = current_user.role, current_user.id
+    abonnement = hub.abonner_commande(order_id) if wait_for_change else None
+    try:
+        commande = _verifier_acces(
+            await run_db(session, lire_commande, order_id), role, user_id
         )
-
-    dto = OrderReadWithItems.model_validate(c, from_attributes=True)
-    dto.items = [
-        OrderItemInOrderRead(
-            product_id=oi.product_id,
-            product_name=(oi.product.name if oi.product else ""),
-            quantity=oi.quantity,
+        if abonnement is None:
+            return commande
+        statut = (since_status or commande.status).value
+        if commande.status.value != statut:
+            return commande
+
+        await release_db(session)
+        if await attendre_changement(abonnement, statut, wait_for_change) is None:
+            return commande
+        return _verifier_acces(
+            await run_db(session, lire_commande, order_id), role, user_id
         )
-        for oi in c.order_items
-    ]
-    return dto
+    finally:
+        if abonnement is not None:
+            hub.desabonner_commande(order_id, abonnement)
 
 
 # Créer — client = pour lui ; staff = pour un user existant
 @router.post(
     "/", response_model=OrderReadWithItems, status_code=status.HTTP_201_CREATED
 )
+@db_endpoint
 def creer_une_commande(
     payload: OrderCreateWithItems,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
@@ -182,12 +335,24 @@ def creer_une_commande(
     - Un **client** crée une commande uniquement pour lui-même.
     - Les **admins** et **employés** peuvent créer une commande pour n’importe quel utilisateur existant.
     - La commande doit contenir au moins un article.
+    - Le stock des produits est réservé ; 409 si un produit est en rupture.
+    - En-tête `Idempotency-Key` optionnel : une requête rejouée avec la même clé
+      reçoit la réponse d'origine sans créer de nouvelle commande ; 409 si une
+      requête concurrente avec la même clé n'a laissé aucune réponse à rejouer.
     """
     if not payload.items:
         raise HTTPException(
             status_code=422, detail="La commande doit contenir au moins un article."
         )
 
+    idem = requete_idempotente(
+        idempotency_key, current_user.id, "POST /orders/", payload
+    )
+    if idem is not None:
+        rejouee = idem.rejouer(session)
+        if rejouee is not None:
+            return rejouee
+
     if current_user.role == Role.CLIENT:
         user_id = current_user.id
     else:
@@ -198,44 +363,71 @@ def creer_une_commande(
             raise HTTPException(404, "Utilisateur cible introuvable")
         user_id = payload.user_id
 
-    order = Order(user_id=user_id, total_amount=0.0, status=Status.EN_PREPARATION)
+    quantities = consolider_items(payload.items)
+    produits = charger_produits(session, quantities.keys())
+    lignes = tarifer(quantities, produits)
+
+    order = Order(
+        user_id=user_id,
+        total_amount=calculer_total(lignes),
+        status=Status.EN_PREPARATION,
+    )
     session.add(order)
     session.flush()
-
-    total = 0.0
-    consolidated: dict[int, int] = {}
-    for it in payload.items:
-        consolidated[it.product_id] = consolidated.get(it.product_id, 0) + it.quantity
-
-    for product_id, qty in consolidated.items():
-        product = session.get(Product, product_id)
-        if not product:
-            raise HTTPException(404, f"Produit {product_id} introuvable")
-        if qty <= 0:
-            raise HTTPException(status_code=422, detail="La quantité doit être ≥ 1.")
-        session.add(OrderItem(order_id=order.id, product_id=product_id, quantity=qty))
-        total += float(product.unit_price) * qty
-
-    order.total_amount = round(total, 2)
+    inserer_lignes(session, order, lignes)
+    cumuler_ecart(session, order, [], lignes)
+    cumuler_mesures(
+        session, [(None, mesurer(order, (p.category for p in produits.values())))]
+    )
+    cumuler_clients(session, [order])
+    reserver_stock(session, quantities)
+
+    dto = construire_dto(order, lignes)
+    if idem is not None:
+        rejouee = idem.enregistrer(session, status.HTTP_201_CREATED, dto)
+        if rejouee is not None:
+            return rejouee
     session.commit()
+    if idem is not None:
+        idem.confirmer()
+    hub.publier(ORDER_CREATED, dto.model_dump(mode="json"))
+    classement.enregistrer(dto)
+    return dto
+
 
-    c = session.exec(
-        select(Order)
-        .where(Order.id == order.id)
-        .options(selectinload(Order.order_items).selectinload(OrderItem.product))
-    ).first()
-    dto = OrderReadWithItems.model_validate(c, from_attributes=True)
-    dto.items = [
-        OrderItemInOrderRead(
-            product_id=oi.product_id,
-            product_name=(oi.product.name if oi.product else ""),
-            quantity=oi.quantity,
+# Créer par lot — caisses (staff) qui synchronisent leurs commandes hors ligne
+@router.post("/batch", response_model=OrderBatchResponse)
+@db_endpoint
+def creer_des_commandes_par_lot(
+    payload: OrderBatchCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Crée un lot de commandes en un seul aller-retour.
+
+    - Accessible uniquement aux **admins** et **employés** ; `user_id` est
+      obligatoire pour chaque commande.
+    - Chaque commande est validée séparément : le résultat indique pour chacune
+      le code (201, 400, 404, 409...) et la commande créée ou le motif du refus.
+    - Les commandes acceptées sont créées ensemble et leur stock réservé.
+    - `created_at` (optionnel) : heure de saisie hors ligne, conservée telle
+      quelle ; à défaut, la commande est datée de la réception du lot.
+    """
+    if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Seuls les administrateurs et les employées peuvent créer des commandes par lot.",
         )
-        for oi in c.order_items
-    ]
-    return dto
+    reponse = creer_commandes_en_lot(session, payload.orders)
+    for resultat in reponse.results:
+        if resultat.order is not None:
+            hub.publier(ORDER_CREATED, resultat.order.model_dump(mode="json"))
+            classement.enregistrer(resultat.order)
+    return reponse
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
+@db_endpoint
 def supprimer_une_commande(
     order_id: int,
     session: Session = Depends(get_session),
@@ -245,6 +437,7 @@ def supprimer_une_commande(
     Supprime une commande par son ID.
 
     - Accessible uniquement aux admins et employés.
+    - Le stock réservé par ses articles est rendu aux produits.
     - Retourne un code 204 si la suppression est réussie.
     """
     if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
@@ -255,13 +448,25 @@ def supprimer_une_commande(
     commande = session.get(Order, order_id)
     if not commande:
         raise HTTPException(status_code=404, detail="Commande non trouvée")
+    lignes = lignes_existantes(session, commande)
+    cumuler_ecart(session, commande, lignes, [])
+    cumuler_ecriture(
+        session,
+        mesurer(commande),
+        None,
+        anciens=(ligne.product_id for ligne in lignes),
+    )
+    reserver_stock(session, {ligne.product_id: -ligne.quantity for ligne in lignes})
     session.delete(commande)
     session.commit()
+    hub.publier(ORDER_DELETED, {"id": order_id})
 
 @router.patch("/{order_id}", response_model=OrderReadWithItems)
+@db_endpoint
 def patch_commande(
     order_id: int,
     payload: OrderPatchWithItems,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
@@ -271,6 +476,8 @@ def patch_commande(
     - Accessible uniquement aux admins et employés.
     - Permet de modifier : utilisateur associé, statut, et articles de la commande.
     - Recalcule automatiquement le montant total.
+    - Ajuste le stock réservé selon l'écart de quantités (409 si insuffisant).
+    - En-tête `Idempotency-Key` optionnel, comme pour la création.
     """
     if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
         raise HTTPException(
@@ -278,13 +485,18 @@ def patch_commande(
             detail="Seuls les administrateurs et les employées peuvent modifier les commandes.",
         )
 
-    order = session.exec(
-        select(Order)
-        .where(Order.id == order_id)
-        .options(selectinload(Order.order_items))
-    ).first()
+    idem = requete_idempotente(
+        idempotency_key, current_user.id, f"PATCH /orders/{order_id}", payload
+    )
+    if idem is not None:
+        rejouee = idem.rejouer(session)
+        if rejouee is not None:
+            return rejouee
+
+    order = session.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Commande non trouvée")
+    avant = mesurer(order)
 
     if payload.user_id is not None:
         target = session.get(User, payload.user_id)
@@ -293,60 +505,72 @@ def patch_commande(
         order.user_id = payload.user_id
     if payload.status is not None:
         order.status = payload.status
+        horodater(order, payload.status)
 
-    session.add(order)
-    session.flush()
-
+    deltas: dict[int, int] = {}
+    lignes = anciennes = lignes_existantes(session, order)
     if payload.items is not None:
-        for oi in list(order.order_items):
-            session.delete(oi)
-        session.flush()
-        consolidated: dict[int, int] = {}
-        for it in payload.items:
-            consolidated[it.product_id] = (
-                consolidated.get(it.product_id, 0) + it.quantity
-            )
-        for product_id, quantity in consolidated.items():
-            product = session.get(Product, product_id)
-            if not product:
-                raise HTTPException(
-                    status_code=404, detail=f"Produit {product_id} introuvable"
-                )
-            if quantity <= 0:
-                raise HTTPException(
-                    status_code=422, detail="La quantité doit être ≥ 1."
-                )
-            session.add(
-                OrderItem(order_id=order.id, product_id=product_id, quantity=quantity)
+        quantities = consolider_items(payload.items)
+        # prix déjà connus pour les produits présents : seuls les nouveaux sont lus
+        produits = {
+            ligne.product_id: ProduitPrix(
+                ligne.product_id, ligne.product_name, ligne.unit_price
             )
-
-    session.flush()
-    fresh = session.exec(
-        select(OrderItem)
-        .where(OrderItem.order_id == order.id)
-        .options(selectinload(OrderItem.product))
-    ).all()
-    total = 0.0
-    for oi in fresh:
-        product = oi.product or session.get(Product, oi.product_id)
-        if product:
-            total += float(product.unit_price) * oi.quantity
-    order.total_amount = round(total, 2)
+            for ligne in lignes
+        }
+        nouveaux = quantities.keys() - produits.keys()
+        if nouveaux:
+            produits.update(charger_produits(session, nouveaux))
+        nouvelles = tarifer(quantities, produits)
+        deltas = appliquer_ecart(session, order, lignes, nouvelles)
+        cumuler_ecart(session, order, lignes, nouvelles)
+        lignes = nouvelles
+
+    order.total_amount = calculer_total(lignes)
+    cumuler_ecriture(
+        session,
+        avant,
+        mesurer(order),
+        anciens=(ligne.product_id for ligne in anciennes),
+        nouveaux=(ligne.product_id for ligne in lignes),
+    )
     session.add(order)
+    reserver_stock(session, deltas)
+    dto = construire_dto(order, lignes)
+    if idem is not None:
+        rejouee = idem.enregistrer(session, status.HTTP_200_OK, dto)
+        if rejouee is not None:
+            return rejouee
     session.commit()
+    if idem is not None:
+        idem.confirmer()
+    hub.publier(ORDER_UPDATED, dto.model_dump(mode="json"))
+    return dto
+
 
-    c = session.exec(
-        select(Order)
-        .where(Order.id == order.id)
-        .options(selectinload(Order.order_items).selectinload(OrderItem.product))
-    ).first()
-    dto = OrderReadWithItems.model_validate(c, from_attributes=True)
-    dto.items = [
-        OrderItemInOrderRead(
-            product_id=oi.product_id,
-            product_name=(oi.product.name if oi.product else ""),
-            quantity=oi.quantity,
+@router.patch("/{order_id}/status", response_model=OrderRead)
+@db_endpoint
+def changer_le_statut(
+    order_id: int,
+    payload: OrderStatusUpdate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Fait avancer le statut d'une commande (En préparation → Prete → Servie).
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - Un seul UPDATE conditionnel (avec RETURNING) : ni les articles ni le
+      total ne sont relus. Le passage à « Prete » ajoute deux requêtes : la
+      lecture des catégories de la commande et la mise à jour de l'esquisse
+      du temps de préparation.
+    - 409 si la transition n'est pas autorisée depuis le statut actuel.
+    """
+    if current_user.role not in [Role.ADMIN, Role.EMPLOYEE]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Seuls les administrateurs et les employées peuvent modifier les commandes.",
         )
-        for oi in c.order_items
-    ]
-    return dto
+    commande = changer_statut(session, order_id, payload.status)
+    hub.publier(ORDER_STATUS, commande.model_dump(mode="json"))
+    return commande
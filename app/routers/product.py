@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel import Session, select
 
 from app.db import get_session
+from app.depend import db_endpoint
 from app.enumerations import Role
 from app.models import Product, User
-from app.schemas.product import ProductCreate, ProductRead, ProductUpdate
+from app.schemas.product import (
+    ForecastMethod,
+    ProductCreate,
+    ProductRead,
+    ProductUpdate,
+    ReorderSuggestion,
+)
 from app.security import (
     check_admin,
     check_admin_employee,
@@ -14,10 +21,16 @@ from app.security import (
     get_current_user,
     hash_password,
 )
+from app.services.forecast import (
+    REORDER_COVER_DAYS,
+    REORDER_LEAD_DAYS,
+    suggestions_reapprovisionnement,
+)
 
 router = APIRouter(prefix="/product", tags=["product"])
 
 @router.get("/", response_model=list[ProductRead])
+@db_endpoint
 def lister_les_produits(
     session=Depends(get_session), current_user=Depends(get_current_user)
 ):
@@ -31,7 +44,32 @@ def lister_les_produits(
     produits = session.exec(select(Product)).all()
     return produits
 
+
+@router.get("/reorder-suggestions", response_model=list[ReorderSuggestion])
+@db_endpoint
+def suggestions_de_reapprovisionnement(
+    method: ForecastMethod = "exponential",
+    lead_days: float = Query(REORDER_LEAD_DAYS, gt=0, le=90),
+    cover_days: float = Query(REORDER_COVER_DAYS, ge=0, le=90),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Produits dont le stock sera épuisé avant la prochaine livraison.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - `method` : `exponential` (lissage exponentiel) ou `moving_average`
+      (moyenne des derniers jours), sur la demande quotidienne des dernières
+      semaines (jours révolus).
+    - `lead_days` : jours jusqu'à la prochaine livraison ; `cover_days` : jours
+      de vente que la livraison doit couvrir (quantité suggérée).
+    - Triés du plus tôt épuisé au plus tard.
+    """
+    check_admin_employee(current_user)
+    return suggestions_reapprovisionnement(session, method, lead_days, cover_days)
+
 @router.get("/{product_id}", response_model=ProductRead)
+@db_endpoint
 def lire_un_produit_id(
     product_id: int,
     session: Session = Depends(get_session),
@@ -49,6 +87,7 @@ def lire_un_produit_id(
     return produit
 
 @router.post("/", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
+@db_endpoint
 def creer_un_produit(
     product: ProductCreate,
     session=Depends(get_session),
@@ -81,6 +120,7 @@ def creer_un_produit(
 
 # Patch product
 @router.patch("/{product_id}", response_model=ProductRead)
+@db_endpoint
 def patch_product(
     product_id: int,
     product: ProductUpdate,
@@ -114,7 +154,9 @@ def patch_product(
     session.refresh(produit)
     return produit
 
+
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+@db_endpoint
 def supprimer_un_produit(
     product_id: int,
     session: Session = Depends(get_session),
@@ -0,0 +1,228 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from app.db import get_session
+from app.depend import db_endpoint
+from app.enumerations import Category
+from app.models import User
+from app.schemas.stats import (
+    BasketSize,
+    Bestseller,
+    BestsellerPeriod,
+    DistinctCustomers,
+    Granularity,
+    Percentiles,
+    PriceElasticity,
+    QuantileMetric,
+    RevenueByCategory,
+    RevenueByHourOfWeek,
+    RevenueByPeriod,
+)
+from app.security import check_admin_employee, get_current_user
+from app.services.analytics import (
+    chiffre_par_heure_semaine,
+    elasticites_prix,
+    selection,
+    tailles_paniers,
+)
+from app.services.bestsellers import BESTSELLERS_K, aujourdhui, classement
+from app.services.distinct_customers import clients_distincts
+from app.services.quantiles import percentiles
+from app.services.stats import (
+    chiffre_affaires_par_categorie,
+    chiffre_affaires_par_periode,
+)
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/revenue", response_model=list[RevenueByPeriod])
+@db_endpoint
+def chiffre_affaires(
+    granularity: Granularity = "day",
+    debut: Optional[datetime] = Query(None, alias="from"),
+    fin: Optional[datetime] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Chiffre d'affaires, nombre de commandes et ticket moyen par période.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - `granularity` : `day`, `week` (semaines du lundi) ou `month`, dans le
+      fuseau du restaurant.
+    - `from` / `to` : période semi-ouverte [from, to) sur la date de commande.
+    - Calculé par la base (`GROUP BY`) : seuls les agrégats sont renvoyés.
+    """
+    check_admin_employee(current_user)
+    return chiffre_affaires_par_periode(session, granularity, debut, fin)
+
+
+@router.get("/revenue/by-category", response_model=list[RevenueByCategory])
+@db_endpoint
+def chiffre_affaires_par_categories(
+    granularity: Optional[Granularity] = None,
+    debut: Optional[datetime] = Query(None, alias="from"),
+    fin: Optional[datetime] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Chiffre d'affaires, quantités vendues et commandes par catégorie de produits.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - Sans `granularity` : un total par catégorie sur la période ; avec
+      `granularity`, une entrée par période et par catégorie.
+    - `from` / `to` : période semi-ouverte [from, to) sur la date de commande.
+    - Les lignes sont valorisées au prix figé à la commande.
+    """
+    check_admin_employee(current_user)
+    return chiffre_affaires_par_categorie(session, granularity, debut, fin)
+
+
+@router.get("/bestsellers", response_model=list[Bestseller])
+def meilleures_ventes(
+    period: BestsellerPeriod = "today",
+    limit: int = Query(10, ge=1, le=BESTSELLERS_K),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Produits les plus vendus du jour ou de la semaine (depuis le lundi).
+
+    - Accessible à tout utilisateur connecté (écrans de menu, tableau de bord).
+    - Lu dans le classement en mémoire du worker : aucune requête SQL.
+    - Alimenté par chaque création de commande ; rechargé depuis le cumul
+      quotidien au démarrage et périodiquement (modifications, suppressions,
+      autres workers).
+    """
+    return classement.premiers(period, limit, aujourdhui())
+
+
+@router.get("/basket-sizes", response_model=list[BasketSize])
+@db_endpoint
+def tailles_des_paniers(
+    debut: Optional[datetime] = Query(None, alias="from"),
+    fin: Optional[datetime] = Query(None, alias="to"),
+    category: Optional[Category] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Distribution du nombre d'articles par commande.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - `from` / `to` : période semi-ouverte [from, to) sur la date de commande.
+    - `category` : ne compte que les articles de cette catégorie.
+    - Calculé en mémoire sur les colonnes NumPy des lignes de commande.
+    """
+    check_admin_employee(current_user)
+    return tailles_paniers(selection(session, debut, fin, category))
+
+
+@router.get("/revenue/by-hour-of-week", response_model=list[RevenueByHourOfWeek])
+@db_endpoint
+def chiffre_affaires_par_heure_semaine(
+    debut: Optional[datetime] = Query(None, alias="from"),
+    fin: Optional[datetime] = Query(None, alias="to"),
+    category: Optional[Category] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Chiffre d'affaires, articles et commandes par heure de la semaine.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - Créneaux dans le fuseau du restaurant (0 = lundi) ; seuls les créneaux
+      ayant des ventes sont renvoyés.
+    - `from` / `to` : période semi-ouverte [from, to) sur la date de commande.
+    - Calculé en mémoire sur les colonnes NumPy des lignes de commande.
+    """
+    check_admin_employee(current_user)
+    return chiffre_par_heure_semaine(selection(session, debut, fin, category))
+
+
+@router.get("/price-elasticity", response_model=list[PriceElasticity])
+@db_endpoint
+def elasticite_prix(
+    debut: Optional[datetime] = Query(None, alias="from"),
+    fin: Optional[datetime] = Query(None, alias="to"),
+    category: Optional[Category] = None,
+    min_levels: int = Query(2, ge=2),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Élasticité-prix estimée des produits dont le prix a changé.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - Demande = quantité moyenne par jour de vente à chaque prix figé à la
+      commande ; élasticité = pente log(demande) / log(prix).
+    - `min_levels` : nombre minimal de prix distincts pour estimer un produit.
+    - Estimation sommaire (ni saisonnalité ni promotions prises en compte).
+    """
+    check_admin_employee(current_user)
+    return elasticites_prix(selection(session, debut, fin, category), min_levels)
+
+
+@router.get("/customers/distinct", response_model=list[DistinctCustomers])
+@db_endpoint
+def clients_distincts_estimes(
+    granularity: Optional[Granularity] = None,
+    debut: Optional[date] = Query(None, alias="from"),
+    fin: Optional[date] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Nombre estimé de clients distincts ayant commandé.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - `from` / `to` : jours [from, to) du restaurant ; par défaut, le mois en
+      cours jusqu'à aujourd'hui inclus.
+    - Sans `granularity` : une estimation pour toute la période ; avec
+      `granularity`, une par jour, semaine ou mois.
+    - Fusion d'esquisses HyperLogLog quotidiennes : l'estimation est donnée
+      avec sa borne d'erreur (`error_bound`, environ 95 %).
+    - Esquisses tenues à jour à chaque création de commande (commandes de
+      caisse datées d'un jour passé comprises) ; lecture seule, en une
+      requête quelle que soit la période.
+    """
+    check_admin_employee(current_user)
+    jour = aujourdhui()
+    debut = debut or jour.replace(day=1)
+    fin = fin or jour + timedelta(days=1)
+    return clients_distincts(session, debut, fin, granularity)
+
+
+@router.get("/percentiles", response_model=list[Percentiles])
+@db_endpoint
+def percentiles_des_commandes(
+    metric: QuantileMetric = "amount",
+    category: Optional[Category] = None,
+    granularity: Optional[Granularity] = None,
+    debut: Optional[date] = Query(None, alias="from"),
+    fin: Optional[date] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Percentiles p50 / p95 / p99 du montant des commandes ou du temps de préparation.
+
+    - Accessible uniquement aux **admins** et **employés**.
+    - `metric` : `amount` (montant total, €) ou `prep_time` (secondes entre la
+      création et le passage à « Prete »).
+    - `category` : commandes contenant au moins un produit de la catégorie.
+    - `from` / `to` : jours [from, to) du restaurant ; par défaut, le mois en
+      cours jusqu'à aujourd'hui inclus.
+    - Sans `granularity` : des percentiles pour toute la période ; avec
+      `granularity`, par jour, semaine ou mois.
+    - Fusion d'esquisses DDSketch quotidiennes : chaque percentile est exact à 1 % près.
+    """
+    check_admin_employee(current_user)
+    jour = aujourdhui()
+    debut = debut or jour.replace(day=1)
+    fin = fin or jour + timedelta(days=1)
+    return percentiles(session, metric, debut, fin, category, granularity)
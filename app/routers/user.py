@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
 from app.db import get_session
+from app.depend import db_endpoint
 from app.enumerations import Role
 from app.models import User
 from app.schemas.user import UserCreate, UserRead, UserUpdate
@@ -18,6 +19,7 @@ from app.security import (
 router = APIRouter(prefix="/user", tags=["user"])
 
 @router.get("/", response_model=list[UserRead])
+@db_endpoint
 def lister_les_utilisateurs(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
@@ -32,6 +34,7 @@ def lister_les_utilisateurs(
     return utilisateurs
 
 @router.get("/{user_id}", response_model=UserRead)
+@db_endpoint
 def lire_un_utilisateur(
     user_id: int,
     session: Session = Depends(get_session),
@@ -49,6 +52,7 @@ def lire_un_utilisateur(
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     return utilisateur
 
+# pas de @db_endpoint : bcrypt est servi dans le threadpool (cf. app.depend)
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def creer_un_utilisateur(
     user: UserCreate,
@@ -81,6 +85,7 @@ def creer_un_utilisateur(
     session.refresh(nouvel_utilisateur)
     return nouvel_utilisateur
 
+# pas de @db_endpoint : bcrypt est servi dans le threadpool (cf. app.depend)
 @router.patch("/{user_id}", response_model=UserRead)
 def patch_utilisateur(
     user_id: int,
@@ -117,6 +122,7 @@ def patch_utilisateur(
     return utilisateur
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+@db_endpoint
 def supprimer_un_utilisateur(
     user_id: int,
     session: Session = Depends(get_session),
@@ -1,11 +1,14 @@
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Any, List, Optional
 
 from pydantic import ConfigDict, field_validator
 from sqlmodel import SQLModel
 
 from app.enumerations import Status
 
+# nombre maximal de commandes par lot (POST /orders/batch)
+ORDER_BATCH_MAX = 500
+
 
 class OrderRead(SQLModel):
     """
@@ -34,9 +37,13 @@ class OrderItemInOrderRead(SQLModel):
     Attributs :
     - product_id (int) : Identifiant du produit.
     - quantity (int) : Quantité commandée.
+    - unit_price (float | None) : Prix unitaire au moment de la commande.
+    - product_name (str | None) : Nom du produit au moment de la commande.
     """
     product_id: int
     quantity: int
+    unit_price: Optional[float] = None
+    product_name: Optional[str] = None
 
 
 class OrderReadWithItems(OrderRead):
@@ -50,6 +57,18 @@ class OrderReadWithItems(OrderRead):
     model_config = ConfigDict(from_attributes=True)
 
 
+class OrderPage(SQLModel):
+    """
+    Schéma utilisé pour une page de commandes (pagination par curseur).
+
+    Attributs :
+    - items (list[OrderReadWithItems]) : Commandes de la page.
+    - next_cursor (str | None) : Curseur de la page suivante (None en fin de liste).
+    """
+    items: List[OrderReadWithItems] = []
+    next_cursor: Optional[str] = None
+
+
 class OrderUpdate(SQLModel):
     """
     Schéma utilisé pour mettre à jour le statut d’une commande (PATCH).
@@ -60,6 +79,16 @@ class OrderUpdate(SQLModel):
     status: Optional[Status] = None
 
 
+class OrderStatusUpdate(SQLModel):
+    """
+    Schéma utilisé pour faire avancer le statut d’une commande (cuisine).
+
+    Attributs :
+    - status (Status) : Statut cible (Prete ou Servie).
+    """
+    status: Status
+
+
 class OrderItemCreateInOrder(SQLModel):
     """
     Schéma utilisé pour créer un article dans une commande.
@@ -127,3 +156,78 @@ class OrderPatchWithItems(SQLModel):
     user_id: Optional[int] = None
     status: Optional[Status] = None
     items: Optional[List[OrderItemInOrderRead]] = None
+
+
+class OrderBatchItem(OrderCreateWithItems):
+    """
+    Schéma utilisé pour une commande d’un lot (saisie par une caisse).
+
+    Attributs :
+    - user_id (int | None) : Identifiant de l’utilisateur (obligatoire dans un lot).
+    - items (list[OrderItemCreateInOrder]) : Liste des articles de la commande.
+    - created_at (datetime | None) : Heure de saisie à la caisse (hors ligne) ;
+      heure de réception si absente. Sans fuseau, elle est lue en UTC.
+    """
+    created_at: Optional[datetime] = None
+
+    @field_validator("created_at")
+    def normalize_created_at(cls, v):
+        """
+        Ramène l'heure de saisie en UTC.
+        """
+        if v is None:
+            return v
+        if v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+        return v.astimezone(timezone.utc)
+
+
+class OrderBatchCreate(SQLModel):
+    """
+    Schéma utilisé pour créer un lot de commandes (synchronisation des caisses).
+
+    Attributs :
+    - orders (list[OrderBatchItem]) : Commandes à créer, `user_id` obligatoire.
+    """
+    orders: List[OrderBatchItem]
+
+    @field_validator("orders")
+    def validate_orders(cls, v):
+        """
+        Valide que le lot n'est pas vide et ne dépasse pas ORDER_BATCH_MAX commandes.
+        """
+        if not v:
+            raise ValueError("Le lot doit contenir au moins une commande.")
+        if len(v) > ORDER_BATCH_MAX:
+            raise ValueError(f"Le lot ne peut pas dépasser {ORDER_BATCH_MAX} commandes.")
+        return v
+
+
+class OrderBatchResult(SQLModel):
+    """
+    Schéma utilisé pour le résultat d’une commande d’un lot.
+
+    Attributs :
+    - index (int) : Position de la commande dans le lot.
+    - status_code (int) : Code HTTP équivalent (201 si créée).
+    - order (OrderReadWithItems | None) : Commande créée.
+    - detail (Any | None) : Motif de l’échec, comme pour POST /orders/.
+    """
+    index: int
+    status_code: int
+    order: Optional[OrderReadWithItems] = None
+    detail: Optional[Any] = None
+
+
+class OrderBatchResponse(SQLModel):
+    """
+    Schéma utilisé pour la réponse d’un lot de commandes.
+
+    Attributs :
+    - created (int) : Nombre de commandes créées.
+    - failed (int) : Nombre de commandes refusées.
+    - results (list[OrderBatchResult]) : Résultats, dans l’ordre du lot.
+    """
+    created: int
+    failed: int
+    results: List[OrderBatchResult]
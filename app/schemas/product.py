@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Literal, Optional
 
 from pydantic import ConfigDict, StringConstraints, field_validator
 from sqlmodel import SQLModel
@@ -111,3 +111,28 @@ class ProductUpdate(SQLModel):
         if value is not None and value < 0:
             raise ValueError("Le stock ne peut pas être inf à 0.")
         return value
+
+
+# méthode de prévision de la demande quotidienne
+ForecastMethod = Literal["moving_average", "exponential"]
+
+
+class ReorderSuggestion(SQLModel):
+    """
+    Produit à réapprovisionner avant la prochaine livraison.
+
+    Attributs :
+    - product_id (int) : Identifiant du produit.
+    - name (str) : Nom du produit.
+    - stock (int) : Stock disponible.
+    - daily_forecast (float) : Demande quotidienne prévue.
+    - days_of_stock (float) : Jours de vente couverts par le stock.
+    - suggested_quantity (int) : Quantité à commander pour couvrir la demande
+      jusqu'à la livraison et pendant les jours qu'elle doit couvrir.
+    """
+    product_id: int
+    name: str
+    stock: int
+    daily_forecast: float
+    days_of_stock: float
+    suggested_quantity: int
@@ -0,0 +1,155 @@
+from datetime import date
+from typing import Literal, Optional
+
+from sqlmodel import SQLModel
+
+from app.enumerations import Category
+
+# découpage des statistiques dans le temps
+Granularity = Literal["day", "week", "month"]
+
+# périodes du classement des meilleures ventes
+BestsellerPeriod = Literal["today", "week"]
+
+# métriques des percentiles : montant des commandes, temps de préparation
+QuantileMetric = Literal["amount", "prep_time"]
+
+
+class RevenueByPeriod(SQLModel):
+    """
+    Chiffre d'affaires d'une période.
+
+    Attributs :
+    - period (date) : Premier jour de la période (jour, lundi ou 1er du mois).
+    - revenue (float) : Somme des montants des commandes.
+    - orders (int) : Nombre de commandes.
+    - average_ticket (float) : Montant moyen d'une commande.
+    """
+
+    period: date
+    revenue: float
+    orders: int
+    average_ticket: float
+
+
+class RevenueByCategory(SQLModel):
+    """
+    Chiffre d'affaires d'une catégorie de produits (sur une période, si demandée).
+
+    Attributs :
+    - period (date, optionnel) : Premier jour de la période, None sans découpage.
+    - category (Category) : Catégorie des produits.
+    - revenue (float) : Somme des lignes (quantité × prix à la commande).
+    - quantity (int) : Nombre d'articles vendus.
+    - orders (int) : Commandes contenant au moins un produit de la catégorie
+      (une commande de deux plats compte une fois).
+    - average_ticket (float) : Chiffre d'affaires moyen par commande comptée.
+    """
+
+    period: Optional[date] = None
+    category: Category
+    revenue: float
+    quantity: int
+    orders: int
+    average_ticket: float
+
+
+class Bestseller(SQLModel):
+    """
+    Produit du classement des meilleures ventes.
+
+    Attributs :
+    - product_id (int) : Identifiant du produit.
+    - product_name (str) : Nom du produit à la commande.
+    - quantity (int) : Quantité vendue sur la période.
+    """
+
+    product_id: int
+    product_name: str
+    quantity: int
+
+
+class BasketSize(SQLModel):
+    """
+    Effectif d'une taille de panier.
+
+    Attributs :
+    - size (int) : Nombre d'articles de la commande (somme des quantités).
+    - orders (int) : Nombre de commandes de cette taille.
+    """
+
+    size: int
+    orders: int
+
+
+class RevenueByHourOfWeek(SQLModel):
+    """
+    Ventes d'un créneau horaire de la semaine (heure du restaurant).
+
+    Attributs :
+    - weekday (int) : Jour de la semaine (0 = lundi, 6 = dimanche).
+    - hour (int) : Heure (0 à 23).
+    - revenue (float) : Somme des lignes (quantité × prix à la commande).
+    - quantity (int) : Nombre d'articles vendus.
+    - orders (int) : Nombre de commandes.
+    """
+
+    weekday: int
+    hour: int
+    revenue: float
+    quantity: int
+    orders: int
+
+
+class PriceElasticity(SQLModel):
+    """
+    Élasticité-prix estimée d'un produit.
+
+    Attributs :
+    - product_id (int) : Identifiant du produit.
+    - price_levels (int) : Nombre de prix distincts observés.
+    - elasticity (float) : Variation relative de la demande pour 1 % de
+      variation du prix (négative quand la demande baisse avec le prix).
+    """
+
+    product_id: int
+    price_levels: int
+    elasticity: float
+
+
+class DistinctCustomers(SQLModel):
+    """
+    Nombre estimé de clients distincts (sur une période, si demandée).
+
+    Attributs :
+    - period (date, optionnel) : Premier jour de la période, None sans découpage.
+    - estimate (int) : Nombre estimé de clients ayant commandé.
+    - error_bound (int) : Écart maximal probable (environ 95 %) autour de l'estimation.
+    - relative_error (float) : Erreur relative type de l'esquisse HyperLogLog.
+    """
+
+    period: Optional[date] = None
+    estimate: int
+    error_bound: int
+    relative_error: float
+
+
+class Percentiles(SQLModel):
+    """
+    Percentiles d'une métrique des commandes (sur une période, si demandée).
+
+    Attributs :
+    - period (date, optionnel) : Premier jour de la période, None sans découpage.
+    - metric (QuantileMetric) : "amount" (montant, €) ou "prep_time" (secondes).
+    - category (Category, optionnel) : Commandes contenant cette catégorie, None pour toutes.
+    - count (int) : Nombre de commandes mesurées.
+    - p50, p95, p99 (float) : Percentiles, à 1 % près.
+    """
+
+    period: Optional[date] = None
+    metric: QuantileMetric
+    category: Optional[Category] = None
+    count: int
+    p50: float
+    p95: float
+    p99: float
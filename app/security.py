@@ -9,6 +9,7 @@ from jose import JWTError, jwt
 from sqlmodel import Session, select
 
 from app.db import get_session
+from app.depend import db_endpoint
 from app.enumerations import Role
 from app.models import User
 
@@ -99,6 +100,7 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/token")
 
 
+@db_endpoint
 def get_current_user(
     token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)
 ) -> User:
@@ -0,0 +1,371 @@
+"""
+Analyses ad hoc sur les lignes de commande, en colonnes NumPy.
+
+Les lignes de `orderitem` (jointes à `order.created_at` et à la catégorie du
+produit) sont tenues en mémoire dans des colonnes compactes : identifiants et
+quantités en int32, prix en float64, date en secondes epoch int64 (UTC),
+catégorie en int8 (rang dans `Category`). Un million de lignes tient dans
+environ 30 Mo. Les analyses (taille des paniers, chiffre d'affaires par heure
+de la semaine, élasticité-prix) sont des agrégations groupées vectorisées
+(`np.unique`, `np.bincount`, `np.add.reduceat`), sans boucle Python par ligne.
+
+- Rafraîchissement incrémental : chaque lecture charge d'abord les lignes des
+  commandes d'identifiant supérieur au plus grand déjà chargé (filigrane sur
+  la clé primaire), par lots de `ANALYTICS_BATCH_SIZE` lignes ajoutés en
+  bout de colonnes (capacité doublée au besoin).
+- Les modifications et suppressions de commandes déjà chargées, ainsi qu'une
+  commande validée après une commande d'identifiant plus grand, ne sont vues
+  qu'au rechargement complet, fait au plus tard toutes les
+  `ANALYTICS_FULL_RELOAD_SECONDS`.
+- Le prix d'une ligne est celui figé à la commande (prix actuel du produit
+  pour les lignes non reprises).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy import func
+from sqlmodel import Session, col, select
+
+from app.enumerations import Category
+from app.models import Order, OrderItem, Product
+from app.schemas.stats import BasketSize, PriceElasticity, RevenueByHourOfWeek
+from app.services.order_read import (
+    RESTAURANT_TZ,
+    filtrer_periode,
+    jointure_articles,
+    vers_utc,
+)
+
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "10000"))
+ANALYTICS_FULL_RELOAD_SECONDS = float(
+    os.getenv("ANALYTICS_FULL_RELOAD_SECONDS", "3600")
+)
+
+CATEGORIES = list(Category)
+_RANG_CATEGORIE = {categorie: rang for rang, categorie in enumerate(CATEGORIES)}
+
+TYPES = {
+    "order_id": np.int32,
+    "product_id": np.int32,
+    "quantity": np.int32,
+    "unit_price": np.float64,
+    "category": np.int8,
+    "created_at": np.int64,
+}
+
+# le 1er janvier 1970 était un jeudi (lundi = 0)
+_JEUDI = 3
+
+
+def _epoch(moments) -> np.ndarray:
+    """
+    Secondes epoch (UTC) d'une suite de dates ; sans fuseau = UTC, comme en base.
+    """
+    return np.array(
+        [
+            m.astimezone(timezone.utc).replace(tzinfo=None) if m.tzinfo else m
+            for m in moments
+        ],
+        dtype="datetime64[s]",
+    ).astype(np.int64)
+
+
+def _colonnes_de(rows) -> dict[str, np.ndarray]:
+    """
+    Convertit un lot de lignes SQL en colonnes typées.
+    """
+    order_id, product_id, quantity, unit_price, category, created_at = zip(*rows)
+    return {
+        "order_id": np.array(order_id, dtype=np.int32),
+        "product_id": np.array(product_id, dtype=np.int32),
+        "quantity": np.array(quantity, dtype=np.int32),
+        "unit_price": np.array(unit_price, dtype=np.float64),
+        "category": np.array(
+            [_RANG_CATEGORIE[Category(c)] for c in category], dtype=np.int8
+        ),
+        "created_at": _epoch(created_at),
+    }
+
+
+def heures_locales(created_at: np.ndarray) -> np.ndarray:
+    """
+    Secondes epoch décalées dans le fuseau du restaurant.
+
+    L'écart UTC est calculé une fois par heure UTC distincte (changements
+    d'heure compris), puis appliqué à toutes les lignes.
+
+    Args:
+        created_at (np.ndarray): Secondes epoch UTC (int64).
+
+    Returns:
+        np.ndarray: Secondes epoch « murales » locales (int64).
+    """
+    if not len(created_at):
+        return created_at
+    heures, inverse = np.unique(created_at // 3600, return_inverse=True)
+    ecarts = np.array(
+        [
+            (
+                datetime.fromtimestamp(int(h) * 3600, timezone.utc)
+                .astimezone(RESTAURANT_TZ)
+                .utcoffset()
+                or timedelta(0)
+            ).total_seconds()
+            for h in heures
+        ],
+        dtype=np.int64,
+    )
+    return created_at + ecarts[inverse]
+
+
+class Colonnes:
+    """
+    Colonnes des lignes de commande, partagées par le process.
+
+    Attributs:
+        filigrane (int): Plus grand identifiant de commande chargé.
+        n (int): Nombre de lignes chargées.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vider()
+
+    def _vider(self):
+        self._donnees = {nom: np.empty(0, dtype=t) for nom, t in TYPES.items()}
+        self.n = 0
+        self.filigrane = 0
+        self._charge_le: Optional[float] = None
+
+    def _ajouter(self, lot: dict[str, np.ndarray]):
+        """
+        Ajoute un lot en bout de colonnes (capacité doublée au besoin).
+
+        Les lignes déjà publiées ne sont jamais réécrites : une lecture en
+        cours garde des vues valides.
+        """
+        taille = len(lot["order_id"])
+        fin = self.n + taille
+        capacite = len(self._donnees["order_id"])
+        if fin > capacite:
+            capacite = max(fin, 2 * capacite, 1024)
+            for nom, colonne in self._donnees.items():
+                agrandie = np.empty(capacite, dtype=colonne.dtype)
+                agrandie[: self.n] = colonne[: self.n]
+                self._donnees[nom] = agrandie
+        for nom, valeurs in lot.items():
+            self._donnees[nom][self.n : fin] = valeurs
+        self.n = fin
+        self.filigrane = max(self.filigrane, int(lot["order_id"].max()))
+
+    def _charger(self, session: Session) -> int:
+        """Charge les lignes des commandes au-delà du filigrane."""
+        stmt = (
+            sa.select(
+                col(OrderItem.order_id),
+                col(OrderItem.product_id),
+                col(OrderItem.quantity),
+                func.coalesce(OrderItem.unit_price, Product.unit_price),
+                col(Product.category),
+                col(Order.created_at),
+            )
+            .join(OrderItem, jointure_articles(Order.metadata.tables["order"]))
+            .join(Product, col(Product.id) == OrderItem.product_id)
+            .where(col(Order.id) > self.filigrane)
+            .order_by(col(Order.id))
+            .execution_options(yield_per=ANALYTICS_BATCH_SIZE)
+        )
+        charges = 0
+        for rows in session.execute(stmt).partitions():
+            self._ajouter(_colonnes_de(rows))
+            charges += len(rows)
+        return charges
+
+    def rafraichir(self, session: Session, complet: bool = False) -> int:
+        """
+        Charge les nouvelles commandes, ou recharge tout si demandé ou dû.
+
+        Args:
+            session (Session): Session de base de données.
+            complet (bool): Force le rechargement complet.
+
+        Returns:
+            int: Nombre de lignes chargées.
+        """
+        with self._lock:
+            echu = (
+                self._charge_le is None
+                or time.monotonic() - self._charge_le >= ANALYTICS_FULL_RELOAD_SECONDS
+            )
+            if complet or echu:
+                self._vider()
+                self._charge_le = time.monotonic()
+            return self._charger(session)
+
+    def colonnes(self) -> dict[str, np.ndarray]:
+        """
+        Vues en lecture seule sur les lignes chargées.
+
+        Returns:
+            dict[str, np.ndarray]: Colonne par nom (voir TYPES).
+        """
+        with self._lock:
+            vues = {nom: colonne[: self.n] for nom, colonne in self._donnees.items()}
+        for vue in vues.values():
+            vue.flags.writeable = False
+        return vues
+
+    def vider(self):
+        """Oublie les lignes chargées (rechargement complet à la prochaine lecture)."""
+        with self._lock:
+            self._vider()
+
+
+colonnes = Colonnes()
+
+
+def selection(
+    session: Session,
+    debut: Optional[datetime] = None,
+    fin: Optional[datetime] = None,
+    categorie: Optional[Category] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Rafraîchit les colonnes et retient les lignes de la période et de la catégorie.
+
+    Args:
+        session (Session): Session de base de données.
+        debut (datetime | None): Borne incluse (sans fuseau = heure du restaurant).
+        fin (datetime | None): Borne exclue.
+        categorie (Category | None): Catégorie de produits.
+
+    Raises:
+        HTTPException: 400 si debut >= fin.
+
+    Returns:
+        dict[str, np.ndarray]: Colonnes filtrées.
+    """
+    # contrôle des bornes (400 si inversées), comme les statistiques SQL
+    filtrer_periode(select(Order.id), debut, fin)
+    colonnes.rafraichir(session)
+    donnees = colonnes.colonnes()
+    masque = np.ones(len(donnees["order_id"]), dtype=bool)
+    if debut is not None:
+        masque &= donnees["created_at"] >= _epoch([vers_utc(debut)])[0]
+    if fin is not None:
+        masque &= donnees["created_at"] < _epoch([vers_utc(fin)])[0]
+    if categorie is not None:
+        masque &= donnees["category"] == _RANG_CATEGORIE[categorie]
+    return {nom: colonne[masque] for nom, colonne in donnees.items()}
+
+
+def tailles_paniers(donnees: dict[str, np.ndarray]) -> list[BasketSize]:
+    """
+    Distribution du nombre d'articles par commande.
+
+    Args:
+        donnees (dict[str, np.ndarray]): Colonnes (voir `selection`).
+
+    Returns:
+        list[BasketSize]: Nombre de commandes par taille de panier, tailles croissantes.
+    """
+    _, commande = np.unique(donnees["order_id"], return_inverse=True)
+    tailles = np.bincount(commande, weights=donnees["quantity"]).astype(np.int64)
+    effectifs = np.bincount(tailles)
+    return [
+        BasketSize(size=int(taille), orders=int(effectifs[taille]))
+        for taille in np.flatnonzero(effectifs)
+    ]
+
+
+def chiffre_par_heure_semaine(
+    donnees: dict[str, np.ndarray],
+) -> list[RevenueByHourOfWeek]:
+    """
+    Chiffre d'affaires, articles et commandes par heure de la semaine (heure locale).
+
+    Args:
+        donnees (dict[str, np.ndarray]): Colonnes (voir `selection`).
+
+    Returns:
+        list[RevenueByHourOfWeek]: Créneaux ayant des ventes, du lundi 0 h au dimanche 23 h.
+    """
+    local = heures_locales(donnees["created_at"])
+    jour = (local // 86400 + _JEUDI) % 7
+    creneau = jour * 24 + (local % 86400) // 3600
+    revenue = np.bincount(
+        creneau, weights=donnees["quantity"] * donnees["unit_price"], minlength=168
+    )
+    quantity = np.bincount(creneau, weights=donnees["quantity"], minlength=168)
+    # les lignes d'une commande partagent sa date, donc son créneau
+    _, premieres = np.unique(donnees["order_id"], return_index=True)
+    orders = np.bincount(creneau[premieres], minlength=168)
+    return [
+        RevenueByHourOfWeek(
+            weekday=int(c // 24),
+            hour=int(c % 24),
+            revenue=round(float(revenue[c]), 2),
+            quantity=int(quantity[c]),
+            orders=int(orders[c]),
+        )
+        for c in np.flatnonzero(orders)
+    ]
+
+
+def elasticites_prix(
+    donnees: dict[str, np.ndarray], niveaux_min: int = 2
+) -> list[PriceElasticity]:
+    """
+    Élasticité-prix sommaire par produit.
+
+    Pour chaque (produit, prix à la commande), la demande est la quantité
+    moyenne par jour de vente à ce prix ; l'élasticité est la pente de la
+    régression de log(demande) sur log(prix), entre les niveaux de prix du
+    produit.
+
+    Args:
+        donnees (dict[str, np.ndarray]): Colonnes (voir `selection`).
+        niveaux_min (int): Nombre minimal de prix distincts par produit.
+
+    Returns:
+        list[PriceElasticity]: Produits estimables, par identifiant croissant.
+    """
+    vendu = donnees["unit_price"] > 0
+    produit = donnees["product_id"][vendu].astype(np.int64)
+    centimes = np.rint(donnees["unit_price"][vendu] * 100).astype(np.int64)
+    jour = heures_locales(donnees["created_at"][vendu]) // 86400
+    if not len(produit):
+        return []
+
+    # un groupe par (produit, prix) ; les clés triées gardent les produits contigus
+    groupes, groupe = np.unique((produit << 32) | centimes, return_inverse=True)
+    quantites = np.bincount(groupe, weights=donnees["quantity"][vendu])
+    jours_vente = np.bincount(
+        np.unique((groupe.astype(np.int64) << 24) | (jour - jour.min())) >> 24,
+        minlength=len(groupes),
+    )
+    x = np.log((groupes & 0xFFFFFFFF) / 100)
+    y = np.log(quantites / jours_vente)
+
+    produits = groupes >> 32
+    debuts = np.flatnonzero(np.r_[True, produits[1:] != produits[:-1]])
+    n = np.diff(np.r_[debuts, len(groupes)])
+    sx, sy = np.add.reduceat(x, debuts), np.add.reduceat(y, debuts)
+    sxx, sxy = np.add.reduceat(x * x, debuts), np.add.reduceat(x * y, debuts)
+    variance = n * sxx - sx * sx
+    retenus = (n >= niveaux_min) & (variance > 1e-12)
+    pentes = (n * sxy - sx * sy)[retenus] / variance[retenus]
+    return [
+        PriceElasticity(
+            product_id=int(pid),
+            price_levels=int(niveaux),
+            elasticity=round(float(e), 3),
+        )
+        for pid, niveaux, e in zip(produits[debuts][retenus], n[retenus], pentes)
+    ]
@@ -0,0 +1,276 @@
+"""
+Classement des meilleures ventes (top-K) tenu en mémoire.
+
+Les écrans (menus, tableau de bord) demandent les produits les plus vendus du
+jour ou de la semaine : la réponse est lue dans un classement en mémoire, en
+O(K), sans requête SQL.
+
+- `TopK` garde le compte exact de chaque produit (quelques centaines au menu,
+  un sketch approché n'apporterait rien) et la liste triée des K premiers.
+  Les comptes ne font qu'augmenter : un produit hors de la liste ne peut y
+  entrer qu'en dépassant le dernier, la liste reste exacte en O(K) par ajout.
+- La création d'une commande (unitaire ou par lot) alimente le classement du
+  jour et celui de la semaine (du lundi), dans le fuseau du restaurant.
+- Au démarrage, puis toutes les `BESTSELLERS_RECONCILE_SECONDS`, le classement
+  est rechargé depuis le cumul quotidien `dailysales` (quelques lignes par
+  jour) : cela réchauffe un worker qui démarre, prend en compte les
+  modifications et suppressions de commandes (non suivies en direct) et les
+  commandes créées par les autres workers. Les commandes enregistrées pendant
+  la lecture sont rejouées sur le classement rechargé : aucune n'est perdue
+  (une commande validée juste avant la lecture et enregistrée juste après
+  peut compter deux fois jusqu'au rechargement suivant).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import func
+from sqlmodel import Session, col
+
+from app.models import DailySales, Product
+from app.schemas.order import OrderReadWithItems
+from app.services.daily_sales import jour_local
+
+logger = logging.getLogger(__name__)
+
+# taille des classements gardés (plafond du paramètre `limit`)
+BESTSELLERS_K = int(os.getenv("BESTSELLERS_K", "20"))
+BESTSELLERS_RECONCILE_SECONDS = float(os.getenv("BESTSELLERS_RECONCILE_SECONDS", "300"))
+# préchauffage et réconciliation au démarrage de l'application
+BESTSELLERS_WARMUP = os.getenv("BESTSELLERS_WARMUP", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+PERIODES = ("today", "week")
+
+
+class Vente(NamedTuple):
+    """
+    Entrée d'un classement.
+    """
+
+    product_id: int
+    product_name: str
+    quantity: int
+
+
+class TopK:
+    """
+    Comptes par produit et liste triée des K premiers.
+
+    Attributs:
+        k (int): Taille de la liste.
+        comptes (dict[int, int]): Quantité par produit.
+        tete (list[int]): K premiers produits, par quantité décroissante
+            (à égalité, identifiant croissant).
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.comptes: dict[int, int] = {}
+        self.tete: list[int] = []
+
+    def _avant(self, a: int, b: int) -> bool:
+        """Indique si le produit a se classe avant le produit b."""
+        return (-self.comptes[a], a) < (-self.comptes[b], b)
+
+    def ajouter(self, product_id: int, quantity: int):
+        """
+        Ajoute une quantité vendue et replace le produit dans la liste (O(K)).
+        """
+        self.comptes[product_id] = self.comptes.get(product_id, 0) + quantity
+        if product_id in self.tete:
+            self.tete.remove(product_id)
+        elif len(self.tete) == self.k and not self._avant(product_id, self.tete[-1]):
+            return
+        rang = len(self.tete)
+        while rang > 0 and self._avant(product_id, self.tete[rang - 1]):
+            rang -= 1
+        self.tete.insert(rang, product_id)
+        del self.tete[self.k :]
+
+    def premiers(self, n: int) -> list[tuple[int, int]]:
+        """Les n premiers (produit, quantité)."""
+        return [(pid, self.comptes[pid]) for pid in self.tete[:n]]
+
+
+def aujourdhui() -> date:
+    """Jour courant dans le fuseau du restaurant."""
+    return jour_local(datetime.now(timezone.utc))
+
+
+def debut_semaine(jour: date) -> date:
+    """Lundi de la semaine de `jour`."""
+    return jour - timedelta(days=jour.weekday())
+
+
+class Classement:
+    """
+    Classements du jour et de la semaine, partagés par le process.
+    """
+
+    def __init__(self, k: int = BESTSELLERS_K):
+        self.k = k
+        self._lock = threading.Lock()
+        self._noms: dict[int, str] = {}
+        # période -> (début de la période, classement)
+        self._periodes: dict[str, tuple[date, TopK]] = {}
+        # commandes enregistrées pendant un rechargement (None hors rechargement)
+        self._en_attente: Optional[list[OrderReadWithItems]] = None
+
+    def _topk(self, periode: str, debut: date) -> TopK:
+        """Classement d'une période, remis à zéro quand la période change."""
+        courant = self._periodes.get(periode)
+        if courant is None or courant[0] != debut:
+            courant = self._periodes[periode] = (debut, TopK(self.k))
+        return courant[1]
+
+    @staticmethod
+    def _debuts(jour: date) -> dict[str, date]:
+        return {"today": jour, "week": debut_semaine(jour)}
+
+    def enregistrer(self, commande: OrderReadWithItems):
+        """
+        Compte les articles d'une commande créée (après le commit).
+
+        Args:
+            commande (OrderReadWithItems): Commande renvoyée au client.
+        """
+        with self._lock:
+            self._compter(commande)
+            if self._en_attente is not None:
+                self._en_attente.append(commande)
+
+    def _compter(self, commande: OrderReadWithItems):
+        """Compte les articles d'une commande (verrou déjà pris)."""
+        debuts = self._debuts(jour_local(commande.created_at))
+        for ligne in commande.items:
+            self._noms[ligne.product_id] = ligne.product_name or ""
+            for periode, debut in debuts.items():
+                self._topk(periode, debut).ajouter(ligne.product_id, ligne.quantity)
+
+    def premiers(self, periode: str, n: int, jour: date) -> list[Vente]:
+        """
+        Les n meilleures ventes d'une période.
+
+        Args:
+            periode (str): "today" ou "week".
+            n (int): Nombre de produits (au plus k).
+            jour (date): Jour courant (fuseau du restaurant).
+
+        Returns:
+            list[Vente]: Produits par quantité décroissante.
+        """
+        debut = self._debuts(jour)[periode]
+        with self._lock:
+            courant = self._periodes.get(periode)
+            if courant is None or courant[0] != debut:
+                return []
+            return [
+                Vente(pid, self._noms.get(pid, ""), quantite)
+                for pid, quantite in courant[1].premiers(n)
+            ]
+
+    def recharger(self, session: Session, jour: date):
+        """
+        Reconstruit les classements depuis le cumul quotidien et les remplace.
+
+        Les commandes enregistrées pendant la lecture sont rejouées sur les
+        classements rechargés (elles ont pu être validées après la lecture).
+
+        Args:
+            session (Session): Session de base de données.
+            jour (date): Jour courant (fuseau du restaurant).
+        """
+        debuts = self._debuts(jour)
+        with self._lock:
+            self._en_attente = []
+        try:
+            rows = session.execute(
+                sa.select(
+                    col(DailySales.day),
+                    col(DailySales.product_id),
+                    col(Product.name),
+                    func.sum(DailySales.quantity),
+                )
+                .outerjoin(Product, col(Product.id) == DailySales.product_id)
+                .where(
+                    col(DailySales.day) >= debuts["week"], col(DailySales.day) <= jour
+                )
+                .group_by(
+                    col(DailySales.day), col(DailySales.product_id), col(Product.name)
+                )
+            ).all()
+        except Exception:
+            with self._lock:
+                self._en_attente = None
+            raise
+
+        periodes = {periode: (debut, TopK(self.k)) for periode, debut in debuts.items()}
+        noms: dict[int, str] = {}
+        for day, product_id, nom, quantite in rows:
+            noms[product_id] = nom or ""
+            if quantite <= 0:
+                continue
+            periodes["week"][1].ajouter(product_id, quantite)
+            if day == jour:
+                periodes["today"][1].ajouter(product_id, quantite)
+        with self._lock:
+            self._periodes = periodes
+            self._noms.update(noms)
+            en_attente, self._en_attente = self._en_attente or [], None
+            for commande in en_attente:
+                self._compter(commande)
+
+    def vider(self):
+        """Vide les classements."""
+        with self._lock:
+            self._periodes.clear()
+            self._noms.clear()
+
+
+classement = Classement()
+
+
+def recharger_classement(bind, jour: Optional[date] = None) -> bool:
+    """
+    Recharge le classement global avec sa propre session (démarrage, tâche
+    périodique) ; une erreur est journalisée sans interrompre l'application.
+
+    Args:
+        bind (Engine): Base à interroger.
+        jour (date | None): Jour courant (par défaut, aujourd'hui au restaurant).
+
+    Returns:
+        bool: True si le classement a été rechargé.
+    """
+    jour = jour or aujourdhui()
+    try:
+        with Session(bind) as session:
+            classement.recharger(session, jour)
+    except Exception:
+        logger.warning("Classement des ventes non rechargé", exc_info=True)
+        return False
+    return True
+
+
+async def reconcilier_classement(
+    bind, intervalle: float = BESTSELLERS_RECONCILE_SECONDS
+):
+    """
+    Tâche de fond : recharge le classement à intervalle régulier.
+
+    Args:
+        bind (Engine): Base à interroger.
+        intervalle (float): Délai entre deux rechargements (secondes).
+    """
+    while True:
+        await asyncio.sleep(intervalle)
+        await asyncio.to_thread(recharger_classement, bind)
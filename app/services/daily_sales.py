@@ -0,0 +1,328 @@
+"""
+Cumul quotidien des ventes (table `dailysales`) : jour × produit × catégorie,
+et des commandes par catégorie (table `dailycategoryorders`) : jour × catégorie.
+
+La table est tenue à jour dans la transaction de chaque écriture de commande
+(création, lot, modification, suppression) : l'écart de quantité, de chiffre
+d'affaires et de nombre de commandes par produit est appliqué en une seule
+requête par jour,
+`INSERT ... SELECT ... FROM product ... ON CONFLICT (day, product_id) DO UPDATE`
+(la catégorie est lue dans `product` au premier cumul du jour). Les
+statistiques par catégorie lisent alors quelques lignes par jour au lieu de
+toutes les lignes de commande. L'écart d'un produit supprimé entre-temps n'a
+plus de catégorie : il n'est pas cumulé (avertissement dans les journaux) ;
+`reconstruire` ne le compte pas non plus.
+
+Le nombre de commandes de `dailysales` est par produit : une commande de deux
+plats y compte deux fois. Les catégories présentes dans la commande avant et
+après l'écriture donnent l'écart de `dailycategoryorders` (une requête pour
+toutes les écritures, plus une lecture des catégories des lignes inchangées
+d'une modification qui ajoute ou retire des produits), où chaque commande
+compte une fois par catégorie.
+
+`reconstruire` recalcule la table depuis `order` / `orderitem` (reprise de
+l'historique, correction après une intervention manuelle) ; à lancer quand
+peu de commandes sont passées, les cumuls concurrents de la période
+reconstruite seraient perdus.
+"""
+
+import logging
+import typing
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Iterable, NamedTuple, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import (
+    CursorResult,
+    Date,
+    Float,
+    Integer,
+    case,
+    cast,
+    delete,
+    func,
+    literal,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, col
+
+from app.models import DailyCategoryOrders, DailySales, Order, OrderItem, Product
+from app.services.order_read import RESTAURANT_TZ, bornes_journee, filtrer_periode
+from app.services.order_write import Ligne
+from app.services.stats import tranche
+
+COLONNES = ["day", "product_id", "category", "quantity", "revenue", "orders"]
+# lignes par INSERT (limite de paramètres de SQLite)
+LIGNES_PAR_INSERT = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class Mouvement(NamedTuple):
+    """
+    Écart à cumuler pour un produit.
+    """
+
+    quantity: int
+    revenue: float
+    orders: int
+
+
+def jour_local(created_at: datetime) -> date:
+    """
+    Jour d'une commande dans le fuseau du restaurant.
+
+    Args:
+        created_at (datetime): Date de création (sans fuseau = UTC, comme en base).
+
+    Returns:
+        date: Jour local.
+    """
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.astimezone(RESTAURANT_TZ).date()
+
+
+def mouvements(
+    anciennes: Iterable[Ligne], nouvelles: Iterable[Ligne]
+) -> dict[int, Mouvement]:
+    """
+    Écart par produit entre deux états des lignes d'une commande.
+
+    Une création part de `anciennes=[]`, une suppression arrive à `nouvelles=[]`.
+
+    Args:
+        anciennes (Iterable[Ligne]): Lignes avant l'écriture.
+        nouvelles (Iterable[Ligne]): Lignes après l'écriture.
+
+    Returns:
+        dict[int, Mouvement]: Écarts non nuls, par produit.
+    """
+    avant = {ligne.product_id: ligne for ligne in anciennes}
+    apres = {ligne.product_id: ligne for ligne in nouvelles}
+    ecarts = {}
+    for pid in avant.keys() | apres.keys():
+        a, n = avant.get(pid), apres.get(pid)
+        ecart = Mouvement(
+            (n.quantity if n else 0) - (a.quantity if a else 0),
+            (n.quantity * n.unit_price if n else 0)
+            - (a.quantity * a.unit_price if a else 0),
+            (1 if n else 0) - (1 if a else 0),
+        )
+        if any(ecart):
+            ecarts[pid] = ecart
+    return ecarts
+
+
+def _insert(session: Session, table=DailySales):
+    """INSERT propre au dialecte (ON CONFLICT)."""
+    if session.get_bind().dialect.name == "postgresql":
+        return pg_insert(table)
+    return sqlite_insert(table)
+
+
+def cumuler(
+    session: Session, jour: date, ecarts: dict[int, Mouvement]
+) -> dict[int, str]:
+    """
+    Applique les écarts d'un jour en une requête (dans la transaction en cours).
+
+    Les lignes de `product` sont lues (et celles de `dailysales` verrouillées)
+    dans l'ordre des identifiants : deux commandes concurrentes ne peuvent pas
+    s'attendre mutuellement. Les écarts de produits supprimés sont ignorés.
+
+    Args:
+        session (Session): Session de base de données.
+        jour (date): Jour local des commandes.
+        ecarts (dict[int, Mouvement]): Écarts par produit.
+
+    Returns:
+        dict[int, str]: Catégorie de chaque produit cumulé.
+    """
+    if not ecarts:
+        return {}
+    ids = sorted(ecarts)
+    valeurs = sa.select(
+        literal(jour, Date),
+        col(Product.id),
+        col(Product.category),
+        cast(
+            case({pid: ecarts[pid].quantity for pid in ids}, value=Product.id), Integer
+        ),
+        cast(case({pid: ecarts[pid].revenue for pid in ids}, value=Product.id), Float),
+        cast(case({pid: ecarts[pid].orders for pid in ids}, value=Product.id), Integer),
+    ).where(col(Product.id).in_(ids))
+    stmt = _insert(session).from_select(COLONNES, valeurs.order_by(col(Product.id)))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "product_id"],
+        set_={
+            "quantity": col(DailySales.quantity) + stmt.excluded.quantity,
+            "revenue": col(DailySales.revenue) + stmt.excluded.revenue,
+            "orders": col(DailySales.orders) + stmt.excluded.orders,
+        },
+    ).returning(col(DailySales.product_id), col(DailySales.category))
+    cumules: dict[int, str] = dict(session.execute(stmt).tuples().all())
+    if len(cumules) < len(ids):
+        logger.warning(
+            "Cumul du %s : écarts ignorés pour les produits supprimés %s",
+            jour,
+            sorted(set(ids) - cumules.keys()),
+        )
+    return cumules
+
+
+def cumuler_categories(
+    session: Session,
+    presences: Iterable[tuple[date, set[int], set[int]]],
+    categories: dict[int, str],
+) -> None:
+    """
+    Applique l'écart du nombre de commandes par jour et par catégorie.
+
+    Args:
+        session (Session): Session de base de données.
+        presences (Iterable[tuple[date, set[int], set[int]]]): Jour de chaque
+            commande écrite et ses produits avant et après l'écriture.
+        categories (dict[int, str]): Catégories déjà connues (complétées par
+            une lecture de `product` ; les produits supprimés sont ignorés).
+    """
+    presences = list(presences)
+    inconnus = {p for _, avant, apres in presences for p in avant | apres}
+    inconnus -= categories.keys()
+    if inconnus:
+        lues = session.execute(
+            sa.select(col(Product.id), col(Product.category)).where(
+                col(Product.id).in_(inconnus)
+            )
+        )
+        categories = {**categories, **dict(lues.tuples().all())}
+    ecarts: Counter[tuple[date, str]] = Counter()
+    for jour, avant, apres in presences:
+        for categorie in {categories[p] for p in apres if p in categories}:
+            ecarts[(jour, categorie)] += 1
+        for categorie in {categories[p] for p in avant if p in categories}:
+            ecarts[(jour, categorie)] -= 1
+    lignes = [
+        {"day": jour, "category": categorie, "orders": n}
+        for (jour, categorie), n in sorted(ecarts.items())
+        if n
+    ]
+    for i in range(0, len(lignes), LIGNES_PAR_INSERT):
+        stmt = _insert(session, DailyCategoryOrders).values(
+            lignes[i : i + LIGNES_PAR_INSERT]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "category"],
+            set_={"orders": col(DailyCategoryOrders.orders) + stmt.excluded.orders},
+        )
+        session.execute(stmt)
+
+
+def cumuler_commandes(
+    session: Session, ecritures: Iterable[tuple[Order, list[Ligne], list[Ligne]]]
+) -> None:
+    """
+    Cumule les écritures de plusieurs commandes : une requête par jour
+    concerné, puis une pour les commandes par catégorie.
+
+    Args:
+        session (Session): Session de base de données.
+        ecritures (Iterable[tuple[Order, list[Ligne], list[Ligne]]]): Commande,
+            lignes avant et lignes après l'écriture.
+    """
+    par_jour: dict[date, dict[int, list]] = defaultdict(dict)
+    presences = []
+    for order, anciennes, nouvelles in ecritures:
+        jour = jour_local(order.created_at)
+        cumul = par_jour[jour]
+        for pid, ecart in mouvements(anciennes, nouvelles).items():
+            total = cumul.setdefault(pid, [0, 0.0, 0])
+            for i, valeur in enumerate(ecart):
+                total[i] += valeur
+        avant = {ligne.product_id for ligne in anciennes}
+        apres = {ligne.product_id for ligne in nouvelles}
+        # mêmes produits : mêmes catégories, pas d'écart de commandes
+        if avant != apres:
+            presences.append((jour, avant, apres))
+    categories: dict[int, str] = {}
+    for jour, cumul in sorted(par_jour.items()):
+        categories.update(
+            cumuler(
+                session, jour, {pid: Mouvement(*total) for pid, total in cumul.items()}
+            )
+        )
+    cumuler_categories(session, presences, categories)
+
+
+def cumuler_ecart(
+    session: Session, order: Order, anciennes: list[Ligne], nouvelles: list[Ligne]
+) -> None:
+    """
+    Cumule l'écriture d'une commande (création, modification ou suppression).
+
+    Args:
+        session (Session): Session de base de données.
+        order (Order): Commande écrite (created_at connu).
+        anciennes (list[Ligne]): Lignes avant l'écriture ([] pour une création).
+        nouvelles (list[Ligne]): Lignes après l'écriture ([] pour une suppression).
+    """
+    cumuler_commandes(session, [(order, anciennes, nouvelles)])
+
+
+def reconstruire(
+    session: Session, debut: Optional[date] = None, fin: Optional[date] = None
+) -> int:
+    """
+    Recalcule les cumuls des jours [debut, fin) depuis les commandes.
+
+    Args:
+        session (Session): Session de base de données.
+        debut (date | None): Premier jour (None = depuis le début).
+        fin (date | None): Jour exclu (None = jusqu'à aujourd'hui inclus).
+
+    Returns:
+        int: Nombre de lignes de cumul (jour × produit) écrites.
+    """
+    for table in (DailySales, DailyCategoryOrders):
+        efface = delete(table)
+        if debut is not None:
+            efface = efface.where(col(table.day) >= debut)
+        if fin is not None:
+            efface = efface.where(col(table.day) < fin)
+        session.execute(efface)
+
+    borne_debut = bornes_journee(debut)[0] if debut is not None else None
+    borne_fin = bornes_journee(fin)[0] if fin is not None else None
+    jour = tranche(session, "day", borne_debut).label("day")
+    prix = func.coalesce(OrderItem.unit_price, Product.unit_price)
+    cumuls = filtrer_periode(
+        sa.select(
+            jour,
+            col(OrderItem.product_id),
+            col(Product.category),
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.quantity * prix),
+            func.count(func.distinct(Order.id)),
+        )
+        .join(OrderItem, col(OrderItem.order_id) == Order.id)
+        .join(Product, col(Product.id) == OrderItem.product_id),
+        borne_debut,
+        borne_fin,
+    ).group_by(jour, OrderItem.product_id, Product.category)
+    result = session.execute(_insert(session).from_select(COLONNES, cumuls))
+    commandes = filtrer_periode(
+        sa.select(jour, col(Product.category), func.count(func.distinct(Order.id)))
+        .join(OrderItem, col(OrderItem.order_id) == Order.id)
+        .join(Product, col(Product.id) == OrderItem.product_id),
+        borne_debut,
+        borne_fin,
+    ).group_by(jour, Product.category)
+    session.execute(
+        _insert(session, DailyCategoryOrders).from_select(
+            ["day", "category", "orders"], commandes
+        )
+    )
+    session.commit()
+    return typing.cast(CursorResult, result).rowcount
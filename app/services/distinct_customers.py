@@ -0,0 +1,293 @@
+"""
+Nombre approché de clients distincts, par esquisses HyperLogLog quotidiennes.
+
+Un `COUNT(DISTINCT user_id)` sur toute la table `order` est coûteux ; chaque
+jour est résumé par une esquisse HyperLogLog de `Order.user_id`
+(2^HLL_PRECISION registres) stockée dans `dailycustomers`, une ligne par
+registre non nul (au plus 4096 par jour, aucune pour un jour sans commande).
+Les esquisses se fusionnent par maximum registre à registre : le nombre de
+clients distincts d'une période quelconque se lit en une requête
+(`max(rank)` par registre et par période), sans relire les commandes, avec une
+erreur relative type de 1,04 / sqrt(2^HLL_PRECISION) (1,6 %).
+
+- Chaque création de commande (unitaire ou par lot, y compris une commande de
+  caisse datée d'un jour passé) verse son client dans l'esquisse de son jour,
+  dans sa transaction : un seul registre change, en une requête
+  `INSERT ... ON CONFLICT (day, bucket) DO UPDATE ... WHERE rang plus grand`
+  pour toutes les commandes écrites. La lecture n'écrit rien.
+- Les registres ne font que croître : une modification ou suppression de
+  commande n'est reprise qu'en recalculant les esquisses
+  (`python -m app.commands rebuild-distinct-customers`), qui reprend aussi
+  l'historique antérieur à la table.
+"""
+
+import math
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, col, select
+
+from app.models import DailyCustomers, Order
+from app.schemas.stats import DistinctCustomers, Granularity
+from app.services.daily_sales import jour_local
+from app.services.order_read import bornes_journee, filtrer_periode
+from app.services.stats import tranche, tranche_jour
+
+# format des esquisses enregistrées : ne pas modifier sans les recalculer
+HLL_PRECISION = 12
+REGISTRES = 1 << HLL_PRECISION
+ERREUR_RELATIVE = 1.04 / math.sqrt(REGISTRES)
+# lignes par INSERT (limite de paramètres de SQLite et asyncpg)
+LIGNES_PAR_INSERT = 1000
+
+
+def _hacher(ids: np.ndarray) -> np.ndarray:
+    """Hachage 64 bits (splitmix64) des identifiants."""
+    x = ids.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _longueur_binaire(x: np.ndarray) -> np.ndarray:
+    """Nombre de bits significatifs de chaque entier (0 pour 0)."""
+    for decalage in (1, 2, 4, 8, 16, 32):
+        x = x | (x >> np.uint64(decalage))
+    return np.bitwise_count(x)
+
+
+def registres_et_rangs(user_ids: Iterable[int]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Registre et rang HyperLogLog de chaque identifiant.
+
+    Args:
+        user_ids (Iterable[int]): Identifiants.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Indices des registres (intp) et rangs
+        (uint8), dans l'ordre des identifiants.
+    """
+    hashes = _hacher(np.fromiter(user_ids, dtype=np.int64))
+    indices = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.intp)
+    reste = hashes << np.uint64(HLL_PRECISION)
+    # rang du premier bit à 1 après les bits d'index (64 - p + 1 si aucun)
+    rangs = np.where(
+        reste == 0, 64 - HLL_PRECISION + 1, 65 - _longueur_binaire(reste).astype(int)
+    )
+    return indices, rangs.astype(np.uint8)
+
+
+def esquisse(user_ids: Iterable[int]) -> np.ndarray:
+    """
+    Esquisse HyperLogLog d'un ensemble d'identifiants.
+
+    Args:
+        user_ids (Iterable[int]): Identifiants (doublons sans effet).
+
+    Returns:
+        np.ndarray: Registres (uint8, REGISTRES valeurs).
+    """
+    registres = np.zeros(REGISTRES, dtype=np.uint8)
+    indices, rangs = registres_et_rangs(user_ids)
+    np.maximum.at(registres, indices, rangs)
+    return registres
+
+
+def estimer(registres: np.ndarray) -> float:
+    """
+    Nombre d'éléments distincts estimé à partir des registres.
+
+    Args:
+        registres (np.ndarray): Registres d'une esquisse (ou d'une fusion).
+
+    Returns:
+        float: Estimation (comptage linéaire pour les petits effectifs).
+    """
+    m = REGISTRES
+    alpha = 0.7213 / (1 + 1.079 / m)
+    brute = alpha * m * m / np.sum(np.ldexp(1.0, -registres.astype(np.int64)))
+    vides = int(np.count_nonzero(registres == 0))
+    if brute <= 2.5 * m and vides:
+        return m * math.log(m / vides)
+    return float(brute)
+
+
+def _insert(session: Session):
+    """INSERT propre au dialecte (ON CONFLICT)."""
+    if session.get_bind().dialect.name == "postgresql":
+        return pg_insert(DailyCustomers)
+    return sqlite_insert(DailyCustomers)
+
+
+def _verser(session: Session, clients: Iterable[tuple[date, int]]) -> int:
+    """
+    Verse des clients (jour, user_id) dans les esquisses de leurs jours, par
+    LIGNES_PAR_INSERT registres : un registre n'est réécrit que si son rang
+    augmente.
+
+    Returns:
+        int: Nombre de registres (jour × registre) concernés.
+    """
+    clients = list(clients)
+    if not clients:
+        return 0
+    indices, rangs = registres_et_rangs(user_id for _, user_id in clients)
+    maxima: dict[tuple[date, int], int] = {}
+    for (jour, _), indice, rang in zip(clients, indices.tolist(), rangs.tolist()):
+        cle = (jour, indice)
+        maxima[cle] = max(maxima.get(cle, 0), rang)
+    lignes = [
+        {"day": jour, "bucket": indice, "rank": rang}
+        for (jour, indice), rang in sorted(maxima.items())
+    ]
+    for i in range(0, len(lignes), LIGNES_PAR_INSERT):
+        stmt = _insert(session).values(lignes[i : i + LIGNES_PAR_INSERT])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "bucket"],
+            set_={"rank": stmt.excluded.rank},
+            where=stmt.excluded.rank > col(DailyCustomers.rank),
+        )
+        session.execute(stmt)
+    return len(lignes)
+
+
+def cumuler_clients(session: Session, commandes: Iterable[Order]) -> None:
+    """
+    Verse les clients de commandes créées dans les esquisses de leurs jours
+    (dans la transaction en cours, une requête).
+
+    Args:
+        session (Session): Session de base de données.
+        commandes (Iterable[Order]): Commandes créées (created_at et user_id connus).
+    """
+    _verser(
+        session,
+        (
+            (jour_local(order.created_at), order.user_id)
+            for order in commandes
+            if order.user_id is not None
+        ),
+    )
+
+
+def clients_distincts(
+    session: Session,
+    debut: date,
+    fin: date,
+    granularite: Optional[Granularity] = None,
+) -> list[DistinctCustomers]:
+    """
+    Nombre estimé de clients distincts sur [debut, fin), ou par période.
+
+    Les esquisses des jours sont fusionnées par la base (`max(rank)` par
+    registre et par période), en une requête et sans écriture.
+
+    Args:
+        session (Session): Session de base de données.
+        debut (date): Premier jour (fuseau du restaurant).
+        fin (date): Jour exclu.
+        granularite (Granularity | None): Un résultat par période.
+
+    Raises:
+        HTTPException: 400 si debut >= fin.
+
+    Returns:
+        list[DistinctCustomers]: Une entrée (period None) sans découpage,
+        sinon une par période ayant des commandes, triées.
+    """
+    if debut >= fin:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La date de début doit précéder la date de fin.",
+        )
+    cles: list[Any] = []
+    if granularite is not None:
+        cles.append(
+            tranche_jour(session, granularite, DailyCustomers.day).label("period")
+        )
+    stmt = (
+        sa.select(*cles, col(DailyCustomers.bucket), func.max(DailyCustomers.rank))
+        .where(col(DailyCustomers.day) >= debut, col(DailyCustomers.day) < fin)
+        .group_by(*cles, col(DailyCustomers.bucket))
+        .order_by(*cles)
+    )
+    periodes: dict[Any, np.ndarray] = defaultdict(
+        lambda: np.zeros(REGISTRES, dtype=np.uint8)
+    )
+    for *periode, registre, rang in session.execute(stmt).all():
+        periodes[periode[0] if periode else None][registre] = rang
+    if granularite is None:
+        return [_resultat(None, periodes[None])]
+    return [_resultat(p, registres) for p, registres in periodes.items()]
+
+
+def _resultat(periode: Optional[date], registres: np.ndarray) -> DistinctCustomers:
+    """Estimation et borne d'erreur (deux erreurs types) d'une esquisse."""
+    estimation = estimer(registres)
+    return DistinctCustomers(
+        period=periode,
+        estimate=round(estimation),
+        error_bound=math.ceil(2 * ERREUR_RELATIVE * estimation),
+        relative_error=round(ERREUR_RELATIVE, 4),
+    )
+
+
+def _premier_jour(session: Session) -> Optional[date]:
+    """Jour de la première commande (None sans commande)."""
+    premiere = session.exec(select(func.min(Order.created_at))).one()
+    return jour_local(premiere) if premiere is not None else None
+
+
+def reconstruire_esquisses(
+    session: Session, debut: Optional[date] = None, fin: Optional[date] = None
+) -> int:
+    """
+    Recalcule les esquisses des jours [debut, fin) depuis les commandes.
+
+    À lancer quand peu de commandes sont passées : les clients versés pendant
+    la reconstruction de la période seraient perdus.
+
+    Args:
+        session (Session): Session de base de données.
+        debut (date | None): Premier jour (None = jour de la première commande).
+        fin (date | None): Jour exclu (None = jusqu'à aujourd'hui inclus).
+
+    Raises:
+        ValueError: Si debut >= fin.
+
+    Returns:
+        int: Nombre de registres (jour × registre) écrits.
+    """
+    demain = jour_local(datetime.now(timezone.utc)) + timedelta(days=1)
+    fin = fin or demain
+    if debut is None:
+        debut = _premier_jour(session) or fin
+    if debut > fin:
+        raise ValueError("La date de début doit précéder la date de fin.")
+
+    session.execute(
+        delete(DailyCustomers).where(
+            col(DailyCustomers.day) >= debut, col(DailyCustomers.day) < fin
+        )
+    )
+    borne_debut, borne_fin = bornes_journee(debut)[0], bornes_journee(fin)[0]
+    jour = tranche(session, "day", borne_debut).label("day")
+    rows = session.exec(
+        filtrer_periode(select(jour, Order.user_id).distinct(), borne_debut, borne_fin)
+    ).all()
+    ecrits = _verser(
+        session,
+        (
+            (day if isinstance(day, date) else date.fromisoformat(day), user_id)
+            for day, user_id in rows
+        ),
+    )
+    session.commit()
+    return ecrits
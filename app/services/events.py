@@ -0,0 +1,253 @@
+"""
+Diffusion en direct des événements de commandes (écrans de la cuisine).
+
+Les endpoints de `app/routers/order.py` publient un événement après chaque
+commit (création, modification, changement de statut, suppression). Le hub
+les diffuse aux abonnés du flux SSE `GET /orders/events` :
+
+- chaque abonné a une file asyncio bornée (`EVENTS_QUEUE_SIZE`) ; un écran
+  trop lent perd ses événements les plus anciens au lieu de faire grossir la
+  mémoire du serveur (le nombre d'événements perdus est compté) ;
+- la publication est appelée depuis le threadpool (endpoints sync) ou depuis
+  la boucle (mode DB_ASYNC) : la livraison passe toujours par
+  `loop.call_soon_threadsafe` de la boucle de l'abonné ;
+- le transport entre workers est un backend interchangeable (`EVENTS_BACKEND`).
+  `LocalBackend`, par défaut, livre dans le process courant ; un backend
+  inter-workers (Redis pub/sub, LISTEN/NOTIFY...) se branche avec un chemin
+  `module:Classe` et appelle `recevoir` pour chaque message reçu, y compris
+  les siens.
+
+Le hub sert aussi le long-poll `GET /orders/{order_id}?wait_for_change=` :
+une requête en attente s'abonne aux seuls événements de sa commande
+(`abonner_commande`) ; une attente ne coûte qu'une coroutine et une petite
+file, sans connexion à la base.
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "local")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+# attente maximale d'un long-poll (secondes)
+LONG_POLL_MAX_SECONDS = float(os.getenv("LONG_POLL_MAX_SECONDS", "30"))
+# intervalle des commentaires keep-alive du flux SSE (secondes)
+EVENTS_KEEPALIVE = float(os.getenv("EVENTS_KEEPALIVE", "15"))
+
+ORDER_CREATED = "order.created"
+ORDER_UPDATED = "order.updated"
+ORDER_STATUS = "order.status"
+ORDER_DELETED = "order.deleted"
+
+
+class LocalBackend:
+    """
+    Backend mono-process : un message publié est livré immédiatement au hub local.
+    """
+
+    def __init__(self):
+        self._recevoir: Optional[Callable[[dict], None]] = None
+
+    def demarrer(self, recevoir: Callable[[dict], None]):
+        """
+        Enregistre la fonction qui livre un message reçu aux abonnés locaux.
+        """
+        self._recevoir = recevoir
+
+    def publier(self, message: dict):
+        """Transmet un message à tous les workers (ici : le process courant)."""
+        if self._recevoir is not None:
+            self._recevoir(message)
+
+    def arreter(self):
+        """Libère les ressources du backend."""
+        self._recevoir = None
+
+
+class Abonnement:
+    """
+    File bornée d'un abonné, liée à la boucle asyncio qui la consomme.
+
+    Attributs:
+        queue (asyncio.Queue): Messages en attente.
+        perdus (int): Messages perdus faute de place.
+    """
+
+    def __init__(self, taille: int):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=taille)
+        self.perdus = 0
+
+    def livrer(self, message: dict):
+        """
+        Ajoute un message (dans la boucle de l'abonné), en évinçant le plus ancien
+        si la file est pleine.
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.perdus += 1
+        self.queue.put_nowait(message)
+
+
+class EventHub:
+    """
+    Hub de diffusion des événements de commandes pour le process courant.
+    """
+
+    def __init__(self, backend=None):
+        self._lock = threading.Lock()
+        self._abonnes: set[Abonnement] = set()
+        self._par_commande: dict[int, set[Abonnement]] = {}
+        self.backend = backend or LocalBackend()
+        self.backend.demarrer(self.recevoir)
+
+    def abonner(self, taille: int = EVENTS_QUEUE_SIZE) -> Abonnement:
+        """
+        Crée un abonnement ; à appeler depuis la boucle asyncio de l'abonné.
+        """
+        abonnement = Abonnement(taille)
+        with self._lock:
+            self._abonnes.add(abonnement)
+        return abonnement
+
+    def desabonner(self, abonnement: Abonnement):
+        """Retire un abonnement."""
+        with self._lock:
+            self._abonnes.discard(abonnement)
+
+    def abonner_commande(self, order_id: int, taille: int = 8) -> Abonnement:
+        """
+        Crée un abonnement aux seuls événements d'une commande (long-poll).
+        """
+        abonnement = Abonnement(taille)
+        with self._lock:
+            self._par_commande.setdefault(order_id, set()).add(abonnement)
+        return abonnement
+
+    def desabonner_commande(self, order_id: int, abonnement: Abonnement):
+        """Retire un abonnement à une commande."""
+        with self._lock:
+            abonnes = self._par_commande.get(order_id)
+            if abonnes is not None:
+                abonnes.discard(abonnement)
+                if not abonnes:
+                    del self._par_commande[order_id]
+
+    def publier(self, type_: str, data: dict[str, Any]):
+        """
+        Publie un événement vers tous les workers, via le backend.
+
+        Args:
+            type_ (str): Type d'événement (ex: "order.created").
+            data (dict): Contenu sérialisable en JSON.
+        """
+        try:
+            self.backend.publier({"type": type_, "data": data})
+        except Exception:
+            # la diffusion ne doit jamais faire échouer une commande déjà validée
+            logger.exception("Publication de l'événement %s impossible", type_)
+
+    def recevoir(self, message: dict):
+        """
+        Livre un message reçu du backend aux abonnés locaux (thread-safe).
+        """
+        order_id = message["data"].get("id")
+        with self._lock:
+            abonnes = list(self._abonnes)
+            abonnes.extend(self._par_commande.get(order_id, ()))
+        for abonnement in abonnes:
+            try:
+                abonnement.loop.call_soon_threadsafe(abonnement.livrer, message)
+            except RuntimeError:
+                # boucle fermée : l'abonné a disparu sans se désabonner
+                self.desabonner(abonnement)
+                self.desabonner_commande(order_id, abonnement)
+
+    def nombre_abonnes(self) -> int:
+        """Retourne le nombre d'abonnés locaux."""
+        with self._lock:
+            return len(self._abonnes)
+
+
+def charger_backend(chemin: str):
+    """
+    Instancie le backend configuré ("local" ou "module:Classe").
+    """
+    if chemin == "local":
+        return LocalBackend()
+    module, _, classe = chemin.partition(":")
+    return getattr(importlib.import_module(module), classe)()
+
+
+hub = EventHub(charger_backend(EVENTS_BACKEND))
+
+
+async def attendre_changement(
+    abonnement: Abonnement, statut: str, timeout: float
+) -> Optional[dict]:
+    """
+    Attend qu'une commande change de statut ou soit supprimée.
+
+    Args:
+        abonnement (Abonnement): Abonnement créé par hub.abonner_commande().
+        statut (str): Statut connu du client.
+        timeout (float): Attente maximale en secondes.
+
+    Returns:
+        dict | None: L'événement déclencheur, ou None si le délai est écoulé.
+    """
+    loop = asyncio.get_running_loop()
+    fin = loop.time() + timeout
+    while True:
+        restant = fin - loop.time()
+        if restant <= 0:
+            return None
+        try:
+            message = await asyncio.wait_for(abonnement.queue.get(), restant)
+        except asyncio.TimeoutError:
+            return None
+        if message["type"] == ORDER_DELETED:
+            return message
+        if message["data"].get("status", statut) != statut:
+            return message
+
+
+def format_sse(message: dict) -> str:
+    """
+    Formate un message pour un flux text/event-stream.
+    """
+    data = json.dumps(message["data"], ensure_ascii=False, default=str)
+    return f"event: {message['type']}\ndata: {data}\n\n"
+
+
+async def flux_sse(
+    abonnement: Abonnement, deconnecte: Callable, keepalive: float = EVENTS_KEEPALIVE
+):
+    """
+    Générateur du flux SSE d'un abonné, jusqu'à la déconnexion du client.
+
+    Args:
+        abonnement (Abonnement): Abonnement créé par hub.abonner().
+        deconnecte (Callable): Coroutine indiquant si le client est parti.
+        keepalive (float): Délai sans événement avant un commentaire keep-alive.
+
+    Yields:
+        str: Événements SSE (ou commentaires keep-alive).
+    """
+    try:
+        yield f"retry: {int(keepalive * 1000)}\n\n"
+        while not await deconnecte():
+            try:
+                message = await asyncio.wait_for(abonnement.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(message)
+    finally:
+        hub.desabonner(abonnement)
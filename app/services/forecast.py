@@ -0,0 +1,183 @@
+"""
+Prévision de la demande et suggestions de réapprovisionnement.
+
+La demande quotidienne de chaque produit est lue en une requête sur les lignes
+de commande (`orderitem` × `order`, quantités sommées par produit et par jour
+local) des `FORECAST_HISTORY_DAYS` derniers jours révolus, puis rangée dans une
+matrice NumPy produits × jours (jours sans vente à 0). Elle ne dépend donc
+d'aucune table de cumul : l'historique est complet dès l'installation. Les
+prévisions de tous les produits sont calculées d'un coup sur cette matrice :
+
+- moyenne mobile : moyenne des `FORECAST_WINDOW_DAYS` derniers jours ;
+- lissage exponentiel simple : moyenne pondérée par (1 - α)^âge, normalisée
+  (α = `FORECAST_ALPHA`), un seul produit matrice × vecteur.
+
+Un produit est suggéré quand son stock (déjà décompté des commandes passées)
+ne couvre pas la demande prévue jusqu'à la prochaine livraison ; la quantité
+suggérée couvre en plus les jours servis par cette livraison. Le coût est
+dominé par l'agrégation des lignes de la période (parcours d'intervalle sur
+`ix_order_created_at_id`) : environ une demi-seconde pour 5 000 produits
+vendus chaque jour sur 28 jours (python -m benchmarks.bench_forecast).
+"""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy import String, func, type_coerce
+from sqlmodel import Session, col, select
+
+from app.models import Order, OrderItem, Product
+from app.schemas.product import ForecastMethod, ReorderSuggestion
+from app.services.daily_sales import jour_local
+from app.services.order_read import bornes_journee, filtrer_periode
+from app.services.stats import tranche
+
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "28"))
+FORECAST_WINDOW_DAYS = int(os.getenv("FORECAST_WINDOW_DAYS", "7"))
+FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.3"))
+# jours jusqu'à la prochaine livraison, puis jours couverts par une livraison
+REORDER_LEAD_DAYS = float(os.getenv("REORDER_LEAD_DAYS", "2"))
+REORDER_COVER_DAYS = float(os.getenv("REORDER_COVER_DAYS", "7"))
+
+
+def series_de_demande(
+    session: Session, fin: date, jours: int = FORECAST_HISTORY_DAYS
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Demande quotidienne par produit sur les jours [fin - jours, fin), en une requête.
+
+    Args:
+        session (Session): Session de base de données.
+        fin (date): Jour exclu (en général aujourd'hui, journée incomplète).
+        jours (int): Nombre de jours d'historique.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Identifiants triés des produits vendus
+        (int64) et matrice produits × jours des quantités (float64).
+    """
+    debut = fin - timedelta(days=jours)
+    borne_debut, borne_fin = bornes_journee(debut)[0], bornes_journee(fin)[0]
+    jour = tranche(session, "day", borne_debut)
+    # colonnes brutes (sans couche ORM ni conversion de date ligne à ligne) :
+    # le jour est retrouvé dans un index, qu'il arrive en date ou en texte
+    stmt = filtrer_periode(
+        sa.select(
+            col(OrderItem.product_id),
+            type_coerce(jour, String),
+            func.sum(OrderItem.quantity),
+        )
+        .select_from(Order)
+        .join(OrderItem, col(OrderItem.order_id) == col(Order.id)),
+        borne_debut,
+        borne_fin,
+    ).group_by(col(OrderItem.product_id), jour)
+    rows = session.connection().execute(stmt).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.zeros((0, jours))
+    index: dict[date | str, int] = {}
+    for i in range(jours):
+        jour = debut + timedelta(days=i)
+        index[jour] = index[jour.isoformat()] = i
+    product_ids, days, quantites = zip(*rows)
+    produits, ligne = np.unique(
+        np.array(product_ids, dtype=np.int64), return_inverse=True
+    )
+    colonne = np.fromiter(map(index.__getitem__, days), dtype=np.intp, count=len(rows))
+    demande = np.zeros((len(produits), jours))
+    np.add.at(demande, (ligne, colonne), quantites)
+    return produits, demande
+
+
+def moyenne_mobile(demande: np.ndarray, fenetre: int = FORECAST_WINDOW_DAYS):
+    """Demande quotidienne prévue : moyenne des `fenetre` derniers jours."""
+    return demande[:, -fenetre:].mean(axis=1)
+
+
+def lissage_exponentiel(demande: np.ndarray, alpha: float = FORECAST_ALPHA):
+    """Demande quotidienne prévue : moyenne pondérée par (1 - alpha)^âge."""
+    poids = (1 - alpha) ** np.arange(demande.shape[1])[::-1]
+    return demande @ (poids / poids.sum())
+
+
+def prevoir(demande: np.ndarray, methode: ForecastMethod) -> np.ndarray:
+    """
+    Demande quotidienne prévue de chaque produit.
+
+    Args:
+        demande (np.ndarray): Matrice produits × jours.
+        methode (ForecastMethod): "moving_average" ou "exponential".
+
+    Returns:
+        np.ndarray: Prévision par produit (float64).
+    """
+    if not demande.shape[1]:
+        return np.zeros(demande.shape[0])
+    if methode == "moving_average":
+        return moyenne_mobile(demande)
+    return lissage_exponentiel(demande)
+
+
+def suggestions_reapprovisionnement(
+    session: Session,
+    methode: ForecastMethod = "exponential",
+    delai: float = REORDER_LEAD_DAYS,
+    couverture: float = REORDER_COVER_DAYS,
+    jour: Optional[date] = None,
+) -> list[ReorderSuggestion]:
+    """
+    Produits dont le stock sera épuisé avant la prochaine livraison.
+
+    Args:
+        session (Session): Session de base de données.
+        methode (ForecastMethod): Méthode de prévision.
+        delai (float): Jours jusqu'à la prochaine livraison.
+        couverture (float): Jours de vente que la livraison doit couvrir.
+        jour (date | None): Jour courant (par défaut, aujourd'hui au restaurant).
+
+    Returns:
+        list[ReorderSuggestion]: Produits à commander, du plus tôt épuisé au plus tard.
+    """
+    jour = jour or jour_local(datetime.now(timezone.utc))
+    vendus, demande = series_de_demande(session, jour)
+    prevision_vendus = prevoir(demande, methode)
+
+    rows = (
+        session.connection()
+        .execute(
+            select(Product.id, Product.name, Product.stock).order_by(col(Product.id))
+        )
+        .all()
+    )
+    if not rows:
+        return []
+    product_ids, noms, stocks_lus = zip(*rows)
+    ids = np.array(product_ids, dtype=np.int64)
+    stocks = np.array(stocks_lus, dtype=np.float64)
+
+    # prévision alignée sur les produits existants (0 sans vente récente)
+    prevision = np.zeros(len(ids))
+    rang = np.searchsorted(vendus, ids)
+    connu = rang < len(vendus)
+    connu[connu] = vendus[rang[connu]] == ids[connu]
+    prevision[connu] = prevision_vendus[rang[connu]]
+
+    a_commander = np.flatnonzero((prevision > 0) & (stocks < prevision * delai))
+    jours_de_stock = stocks[a_commander] / prevision[a_commander]
+    quantites = np.ceil(
+        prevision[a_commander] * (delai + couverture) - stocks[a_commander]
+    )
+    ordre = np.argsort(jours_de_stock, kind="stable")
+    return [
+        ReorderSuggestion(
+            product_id=int(ids[i]),
+            name=noms[i],
+            stock=int(stocks[i]),
+            daily_forecast=round(float(prevision[i]), 2),
+            days_of_stock=round(float(jours_de_stock[k]), 1),
+            suggested_quantity=max(int(quantites[k]), 1),
+        )
+        for k, i in ((k, a_commander[k]) for k in ordre)
+    ]
@@ -0,0 +1,287 @@
+"""
+Clés d'idempotence (`Idempotency-Key`) pour la création et le patch de commandes.
+
+Un client qui rejoue une requête avec la même clé reçoit la réponse d'origine
+au lieu de relancer le pipeline (tarification, stock, insertions). La clé est
+propre à l'utilisateur et à l'endpoint ; rejouer une clé avec un autre corps
+de requête renvoie 422.
+
+Deux niveaux de stockage :
+- la table `idempotencykey`, écrite dans la même transaction que la commande :
+  la réponse n'est enregistrée que si la commande l'est ;
+- un cache LRU en mémoire devant la table : un rejeu servi depuis le cache
+  n'exécute aucune requête SQL.
+
+Les clés expirent après `IDEMPOTENCY_TTL_HOURS` ; les lignes expirées sont
+purgées au plus une fois par `IDEMPOTENCY_PURGE_INTERVAL` secondes et par
+process, lors d'un enregistrement. Seules les réponses de succès sont
+enregistrées : une requête refusée (404, 409...) peut être rejouée telle quelle.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional, cast
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import CursorResult, delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col
+
+from app.models import IdempotencyKey
+
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_PURGE_INTERVAL = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "300"))
+# longueur max acceptée pour la clé fournie par le client
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class ReponseEnregistree(NamedTuple):
+    """
+    Réponse d'origine associée à une clé.
+    """
+
+    request_hash: str
+    status_code: int
+    body: bytes
+    expires_at: datetime
+
+
+class CacheLRU:
+    """
+    Cache LRU borné des réponses enregistrées, partagé par le process.
+    """
+
+    def __init__(self, taille: int):
+        self.taille = taille
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, ReponseEnregistree] = OrderedDict()
+
+    def get(self, cle: str) -> Optional[ReponseEnregistree]:
+        """
+        Retourne la réponse d'une clé non expirée, et la marque récente.
+        """
+        with self._lock:
+            entry = self._entries.get(cle)
+            if entry is None:
+                return None
+            if entry.expires_at <= _maintenant():
+                del self._entries[cle]
+                return None
+            self._entries.move_to_end(cle)
+            return entry
+
+    def put(self, cle: str, entry: ReponseEnregistree):
+        """
+        Ajoute une réponse, en évinçant la moins récemment utilisée si besoin.
+        """
+        with self._lock:
+            self._entries[cle] = entry
+            self._entries.move_to_end(cle)
+            while len(self._entries) > self.taille:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vide le cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+cache = CacheLRU(IDEMPOTENCY_CACHE_SIZE)
+
+_derniere_purge = 0.0
+
+
+def _maintenant() -> datetime:
+    """Instant courant UTC sans fuseau, comme les dates en base."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _sha256(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class RequeteIdempotente:
+    """
+    Requête portant un en-tête Idempotency-Key.
+
+    Attributs:
+        cle (str): Empreinte de (utilisateur, endpoint, clé du client).
+        empreinte (str): Empreinte du corps de la requête.
+    """
+
+    def __init__(self, cle: str, empreinte: str):
+        self.cle = cle
+        self.empreinte = empreinte
+        self._reponse: Optional[ReponseEnregistree] = None
+
+    def _rejeu(self, entry: ReponseEnregistree) -> Response:
+        """Construit la réponse rejouée, ou 422 si le corps a changé."""
+        if entry.request_hash != self.empreinte:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key déjà utilisée pour une autre requête.",
+            )
+        return Response(
+            content=entry.body,
+            status_code=entry.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    def rejouer(self, session: Session) -> Optional[Response]:
+        """
+        Retourne la réponse d'origine si la clé a déjà été traitée.
+
+        Le cache est consulté en premier ; la table ensuite (et le cache est
+        alimenté). Une ligne expirée est supprimée pour libérer la clé.
+
+        Args:
+            session (Session): Session de base de données.
+
+        Raises:
+            HTTPException: 422 si la clé a été utilisée avec un autre corps.
+
+        Returns:
+            Response | None: Réponse rejouée, ou None si la clé est nouvelle.
+        """
+        entry = cache.get(self.cle)
+        if entry is not None:
+            return self._rejeu(entry)
+
+        row = session.get(IdempotencyKey, self.cle)
+        if row is None:
+            return None
+        if row.expires_at <= _maintenant():
+            session.delete(row)
+            session.flush()
+            return None
+        entry = ReponseEnregistree(
+            row.request_hash,
+            row.status_code,
+            row.response_body.encode("utf-8"),
+            row.expires_at,
+        )
+        cache.put(self.cle, entry)
+        return self._rejeu(entry)
+
+    def enregistrer(
+        self, session: Session, status_code: int, dto: BaseModel
+    ) -> Optional[Response]:
+        """
+        Enregistre la réponse dans la transaction en cours (avant le commit).
+
+        Si une requête concurrente avec la même clé a été validée entre-temps,
+        la transaction est annulée et sa réponse est renvoyée à la place.
+
+        Args:
+            session (Session): Session de base de données.
+            status_code (int): Code HTTP de la réponse.
+            dto (BaseModel): Corps de la réponse.
+
+        Raises:
+            HTTPException: 409 si la transaction a été annulée sans réponse
+                concurrente à rejouer (expirée ou purgée entre-temps) ; rien
+                n'a été enregistré.
+
+        Returns:
+            Response | None: Réponse de la requête concurrente, sinon None.
+        """
+        _purger_si_necessaire(session)
+        body = dto.model_dump_json()
+        expires_at = _maintenant() + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+        session.add(
+            IdempotencyKey(
+                key=self.cle,
+                request_hash=self.empreinte,
+                status_code=status_code,
+                response_body=body,
+                expires_at=expires_at,
+            )
+        )
+        try:
+            session.flush()
+        except IntegrityError:
+            session.rollback()
+            rejouee = self.rejouer(session)
+            if rejouee is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Requête concurrente en cours, réessayez.",
+                )
+            return rejouee
+        self._reponse = ReponseEnregistree(
+            self.empreinte, status_code, body.encode("utf-8"), expires_at
+        )
+        return None
+
+    def confirmer(self):
+        """
+        Place la réponse enregistrée dans le cache, une fois la transaction validée.
+        """
+        if self._reponse is not None:
+            cache.put(self.cle, self._reponse)
+
+
+def requete_idempotente(
+    idempotency_key: Optional[str], user_id: int, endpoint: str, payload: BaseModel
+) -> Optional[RequeteIdempotente]:
+    """
+    Prépare le traitement idempotent d'une requête.
+
+    Args:
+        idempotency_key (str | None): Valeur de l'en-tête Idempotency-Key.
+        user_id (int): Utilisateur authentifié.
+        endpoint (str): Méthode et chemin (ex: "PATCH /orders/12").
+        payload (BaseModel): Corps de la requête.
+
+    Raises:
+        HTTPException: 400 si la clé est vide ou trop longue.
+
+    Returns:
+        RequeteIdempotente | None: None si l'en-tête est absent.
+    """
+    if idempotency_key is None:
+        return None
+    if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key doit contenir 1 à {IDEMPOTENCY_KEY_MAX_LENGTH} caractères.",
+        )
+    return RequeteIdempotente(
+        _sha256(str(user_id), endpoint, idempotency_key),
+        _sha256(payload.model_dump_json()),
+    )
+
+
+def purger_cles_expirees(session: Session) -> int:
+    """
+    Supprime les clés expirées.
+
+    Args:
+        session (Session): Session de base de données.
+
+    Returns:
+        int: Nombre de clés supprimées.
+    """
+    result = session.execute(
+        delete(IdempotencyKey)
+        .where(col(IdempotencyKey.expires_at) <= _maintenant())
+        .execution_options(synchronize_session=False)
+    )
+    return cast(CursorResult, result).rowcount
+
+
+def _purger_si_necessaire(session: Session):
+    """Purge les clés expirées au plus une fois par intervalle."""
+    global _derniere_purge
+    now = time.monotonic()
+    if now - _derniere_purge < IDEMPOTENCY_PURGE_INTERVAL:
+        return
+    _derniere_purge = now
+    purger_cles_expirees(session)
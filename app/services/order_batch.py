@@ -0,0 +1,217 @@
+"""
+Création de commandes par lot (synchronisation des caisses).
+
+Un lot de N commandes coûte un nombre constant de requêtes :
+1. une requête `IN` pour les utilisateurs de tout le lot ;
+2. une requête `IN` pour les produits (prix et stock) de tout le lot ;
+3. la validation de chaque commande en mémoire, dans l'ordre du lot, le stock
+   lu étant décompté au fur et à mesure ;
+4. un executemany (avec RETURNING dans l'ordre du lot ; ligne à ligne sous
+   SQLite, faute de sentinelle) pour les commandes acceptées, un autre pour
+   leurs lignes, puis le cumul quotidien des ventes (une requête par jour,
+   plus une pour les commandes par catégorie), les esquisses de percentiles
+   (une requête) et celles des clients distincts (une requête) ;
+5. une seule réservation de stock conditionnelle pour tout le lot.
+
+Une commande garde l'heure de saisie envoyée par la caisse (`created_at`),
+sinon elle est datée de la réception du lot.
+
+Une commande refusée (utilisateur ou produit introuvable, stock insuffisant)
+n'empêche pas les autres d'être créées : son résultat porte le code et le
+motif que renverrait `POST /orders/`. Si le stock a changé entre la lecture
+et la réservation (commande concurrente), le lot est rejoué avec le stock à
+jour.
+"""
+
+import os
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlmodel import Session, col, select
+
+from app.enumerations import Status
+from app.models import Order, Product, User
+from app.schemas.order import OrderBatchItem, OrderBatchResponse, OrderBatchResult
+from app.services.daily_sales import cumuler_commandes
+from app.services.distinct_customers import cumuler_clients
+from app.services.order_write import (
+    ProduitPrix,
+    calculer_total,
+    consolider_items,
+    construire_dto,
+    inserer_lignes_en_bloc,
+    reserver_stock,
+    tarifer,
+    verifier_produits,
+)
+from app.services.quantiles import cumuler_mesures, mesurer
+
+# nombre de tentatives si le stock change pendant la création du lot
+BATCH_STOCK_RETRIES = int(os.getenv("BATCH_STOCK_RETRIES", "3"))
+if BATCH_STOCK_RETRIES < 1:
+    raise ValueError("BATCH_STOCK_RETRIES doit valoir au moins 1.")
+
+
+def _echec(index: int, status_code: int, detail) -> OrderBatchResult:
+    """Résultat d'une commande refusée."""
+    return OrderBatchResult(index=index, status_code=status_code, detail=detail)
+
+
+def creer_commandes_en_lot(
+    session: Session, payloads: list[OrderBatchItem]
+) -> OrderBatchResponse:
+    """
+    Crée un lot de commandes en une transaction, avec échecs partiels.
+
+    Args:
+        session (Session): Session de base de données.
+        payloads (list[OrderBatchItem]): Commandes du lot.
+
+    Raises:
+        HTTPException: 409 si le stock change encore après BATCH_STOCK_RETRIES
+            tentatives ; rien n'est créé.
+
+    Returns:
+        OrderBatchResponse: Résultats dans l'ordre du lot.
+    """
+    conflit = None
+    for _ in range(BATCH_STOCK_RETRIES):
+        try:
+            return _creer_lot(session, payloads)
+        except HTTPException as exc:
+            if exc.status_code != status.HTTP_409_CONFLICT:
+                raise
+            conflit = exc
+    assert conflit is not None  # BATCH_STOCK_RETRIES >= 1
+    raise conflit
+
+
+def _creer_lot(session: Session, payloads: list[OrderBatchItem]) -> OrderBatchResponse:
+    """
+    Une tentative de création du lot (voir creer_commandes_en_lot).
+    """
+    results: dict[int, OrderBatchResult] = {}
+
+    demandes: dict[int, tuple[int, dict[int, int]]] = {}
+    for index, payload in enumerate(payloads):
+        if payload.user_id is None:
+            results[index] = _echec(index, 400, "user_id requis pour le staff.")
+            continue
+        try:
+            demandes[index] = (payload.user_id, consolider_items(payload.items))
+        except HTTPException as exc:
+            results[index] = _echec(index, exc.status_code, exc.detail)
+
+    user_ids = {user_id for user_id, _ in demandes.values()}
+    product_ids = {pid for _, quantities in demandes.values() for pid in quantities}
+    users = set(session.exec(select(User.id).where(col(User.id).in_(user_ids))).all())
+    rows = session.execute(
+        sa.select(
+            col(Product.id),
+            col(Product.name),
+            col(Product.unit_price),
+            col(Product.category),
+            col(Product.stock),
+        ).where(col(Product.id).in_(product_ids))
+    ).all()
+    produits = {row[0]: ProduitPrix(*row[:4]) for row in rows}
+    stock = {row[0]: row[4] for row in rows}
+    categories = {row[0]: row[3] for row in rows}
+
+    acceptees = {}
+    deltas: dict[int, int] = {}
+    for index, (user_id, quantities) in demandes.items():
+        if user_id not in users:
+            results[index] = _echec(index, 404, "Utilisateur cible introuvable")
+            continue
+        try:
+            verifier_produits(quantities, produits)
+        except HTTPException as exc:
+            results[index] = _echec(index, exc.status_code, exc.detail)
+            continue
+        manquants = [
+            {
+                "product_id": pid,
+                "product_name": produits[pid].name,
+                "requested": qty,
+                "available": stock[pid],
+            }
+            for pid, qty in quantities.items()
+            if stock[pid] < qty
+        ]
+        if manquants:
+            results[index] = _echec(
+                index,
+                status.HTTP_409_CONFLICT,
+                {"message": "Stock insuffisant", "products": manquants},
+            )
+            continue
+        for pid, qty in quantities.items():
+            stock[pid] -= qty
+            deltas[pid] = deltas.get(pid, 0) + qty
+        acceptees[index] = (user_id, tarifer(quantities, produits))
+
+    if acceptees:
+        now = datetime.now(timezone.utc)
+        orders = [
+            Order(
+                user_id=user_id,
+                total_amount=calculer_total(lignes),
+                status=Status.EN_PREPARATION,
+                created_at=payloads[index].created_at or now,
+            )
+            for index, (user_id, lignes) in acceptees.items()
+        ]
+        # lignes RETURNING dans l'ordre des paramètres (INSERT multi-lignes)
+        ids = session.scalars(
+            insert(Order).returning(col(Order.id), sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": order.user_id,
+                    "total_amount": order.total_amount,
+                    "status": order.status,
+                    "created_at": order.created_at,
+                }
+                for order in orders
+            ],
+        ).all()
+        for order, order_id in zip(orders, ids, strict=True):
+            order.id = order_id
+        inserer_lignes_en_bloc(
+            session,
+            [(order, lignes) for order, (_, lignes) in zip(orders, acceptees.values())],
+        )
+        cumuler_commandes(
+            session,
+            [
+                (order, [], lignes)
+                for order, (_, lignes) in zip(orders, acceptees.values())
+            ],
+        )
+        cumuler_mesures(
+            session,
+            [
+                (
+                    None,
+                    mesurer(order, (categories[ligne.product_id] for ligne in lignes)),
+                )
+                for order, (_, lignes) in zip(orders, acceptees.values())
+            ],
+        )
+        cumuler_clients(session, orders)
+        reserver_stock(session, deltas)
+        for order, (index, (_, lignes)) in zip(orders, acceptees.items()):
+            results[index] = OrderBatchResult(
+                index=index,
+                status_code=status.HTTP_201_CREATED,
+                order=construire_dto(order, lignes),
+            )
+    session.commit()
+
+    return OrderBatchResponse(
+        created=len(acceptees),
+        failed=len(payloads) - len(acceptees),
+        results=[results[index] for index in range(len(payloads))],
+    )
@@ -0,0 +1,167 @@
+"""
+Export en flux des commandes (NDJSON ou CSV).
+
+L'export lit les commandes jointes à leurs articles en une seule requête,
+triée par `(created_at, id)` croissants, avec `yield_per` : les lignes sont
+récupérées par paquets de `EXPORT_CHUNK_SIZE` (curseur côté serveur sur
+PostgreSQL) et chaque paquet est sérialisé puis envoyé aussitôt. La mémoire
+utilisée ne dépend pas du nombre de commandes exportées et les premiers
+octets partent avant la fin de la lecture.
+
+Le générateur ouvre sa propre session : la session injectée dans l'endpoint
+est fermée avant l'envoi du corps de la réponse.
+"""
+
+import csv
+import io
+import json
+import os
+from typing import Any, Iterator, Optional
+
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session, select
+
+from app.models import Order, OrderItem
+from app.services.order_read import jointure_articles
+
+# nombre de lignes lues (et envoyées) par paquet
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+CSV_COLUMNS = [
+    "order_id",
+    "user_id",
+    "status",
+    "created_at",
+    "total_amount",
+    "product_id",
+    "quantity",
+    "unit_price",
+    "product_name",
+]
+
+
+def select_export():
+    """
+    Requête d'export : commandes et articles, dans l'ordre chronologique.
+
+    Les filtres (période, ...) sont ajoutés par l'appelant.
+
+    Returns:
+        Select: Requête (id, user_id, total_amount, status, created_at,
+        product_id, quantity, unit_price, product_name).
+    """
+    return (
+        select(
+            Order.id,
+            Order.user_id,
+            Order.total_amount,
+            Order.status,
+            Order.created_at,
+            OrderItem.product_id,
+            OrderItem.quantity,
+            OrderItem.unit_price,
+            OrderItem.product_name,
+        )
+        .outerjoin(OrderItem, jointure_articles(Order.__table__))
+        .order_by(Order.created_at, Order.id)
+    )
+
+
+def lire_par_paquets(bind: Engine | Connection, stmt) -> Iterator[list]:
+    """
+    Exécute la requête d'export et renvoie les lignes par paquets.
+
+    Args:
+        bind (Engine | Connection): Base sur laquelle ouvrir la session d'export.
+        stmt (Select): Requête issue de select_export, filtres appliqués.
+
+    Yields:
+        list: Paquet d'au plus EXPORT_CHUNK_SIZE lignes.
+    """
+    with Session(bind) as session:
+        result = session.exec(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        yield from result.partitions()
+
+
+def _commande_json(order_id, user_id, total, statut, created_at, items) -> bytes:
+    """Sérialise une commande sur une ligne NDJSON."""
+    commande = {
+        "id": order_id,
+        "user_id": user_id,
+        "total_amount": total,
+        "status": statut,
+        "created_at": created_at.isoformat(),
+        "items": items,
+    }
+    return json.dumps(commande, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def exporter_ndjson(bind: Engine | Connection, stmt) -> Iterator[bytes]:
+    """
+    Exporte une commande par ligne, au format de OrderReadWithItems.
+
+    Les lignes d'une même commande sont consécutives ; une commande à cheval
+    sur deux paquets est émise avec le paquet suivant.
+
+    Args:
+        bind (Engine | Connection): Base à lire.
+        stmt (Select): Requête issue de select_export, filtres appliqués.
+
+    Yields:
+        bytes: Lignes NDJSON d'un paquet.
+    """
+    # (id, user_id, total, statut, created_at, articles) de la commande en cours
+    courante: Optional[tuple[Any, Any, Any, Any, Any, list[dict]]] = None
+    for paquet in lire_par_paquets(bind, stmt):
+        sortie: list[bytes] = []
+        for row in paquet:
+            order_id, user_id, total, statut, created_at = row[:5]
+            product_id, qty, unit_price, product_name = row[5:]
+            if courante is None or courante[0] != order_id:
+                if courante is not None:
+                    sortie.append(_commande_json(*courante))
+                courante = (order_id, user_id, total, statut, created_at, [])
+            if product_id is not None:
+                courante[5].append(
+                    {
+                        "product_id": product_id,
+                        "quantity": qty,
+                        "unit_price": unit_price,
+                        "product_name": product_name,
+                    }
+                )
+        if sortie:
+            yield b"".join(sortie)
+    if courante is not None:
+        yield _commande_json(*courante)
+
+
+def exporter_csv(bind: Engine | Connection, stmt) -> Iterator[bytes]:
+    """
+    Exporte une ligne CSV par article (commande sans article : colonnes vides).
+
+    Args:
+        bind (Engine | Connection): Base à lire.
+        stmt (Select): Requête issue de select_export, filtres appliqués.
+
+    Yields:
+        bytes: En-tête puis lignes CSV d'un paquet.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")
+    for paquet in lire_par_paquets(bind, stmt):
+        buffer.seek(0)
+        buffer.truncate()
+        for row in paquet:
+            order_id, user_id, total, statut, created_at = row[:5]
+            writer.writerow(
+                [order_id, user_id, statut, created_at.isoformat(), total, *row[5:]]
+            )
+        yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,485 @@
+"""
+Lecture des commandes : projection en colonnes, pagination par curseur (keyset)
+et plages de dates.
+
+Les commandes sont lues sans hydrater d'objets ORM : une seule requête
+sélectionne les colonnes utiles de `order` jointes à `orderitem`, et les
+`OrderReadWithItems` sont assemblés directement depuis les tuples, regroupés
+par identifiant de commande (pas d'identity map ni de selectinload).
+
+En option (`ORDERS_JSON_SQL`, PostgreSQL uniquement), les grandes listes sont
+sérialisées par la base elle-même (`json_agg` / `json_build_object`) : la
+réponse est renvoyée telle quelle, sans objets Python intermédiaires. Sur les
+autres bases (SQLite), le chemin Python ci-dessus est utilisé.
+
+Les listes de commandes sont triées de la plus récente à la plus ancienne sur
+`(created_at, id)`. Le curseur encode la clé de la dernière commande renvoyée :
+la page suivante est lue par `WHERE (created_at, id) < (:created_at, :id)`,
+servie par les index composites `ix_order_created_at_id` et
+`ix_order_user_id_created_at_id`. Chaque page coûte donc le même prix, quelle
+que soit sa position (pas d'OFFSET).
+
+Les filtres de dates sont des intervalles semi-ouverts `[début, fin)` sur
+`created_at` (stocké en UTC sans fuseau) : la colonne reste nue dans le WHERE,
+la requête est un parcours d'intervalle sur l'index au lieu d'un scan complet.
+Sur des tables partitionnées par mois (`app/services/partitions.py`), ces
+mêmes filtres et la borne du curseur limitent la lecture aux partitions
+concernées ; les articles sont joints sur `(order_id, created_at)`.
+"""
+
+import base64
+import json
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy import Text, and_, cast, func, literal, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlmodel import Session, col, select
+
+from app.enumerations import Status
+from app.models import Order, OrderItem
+from app.schemas.order import OrderItemInOrderRead, OrderPage, OrderReadWithItems
+from app.services.partitions import ORDER_PARTITIONING
+
+# fuseau du restaurant : sert à interpréter les dates et heures sans fuseau
+RESTAURANT_TZ = ZoneInfo(os.getenv("RESTAURANT_TZ", "UTC"))
+
+# sérialisation JSON des listes par PostgreSQL
+ORDERS_JSON_SQL = os.getenv("ORDERS_JSON_SQL", "false").lower() in ("1", "true", "yes")
+
+# prédicat de l'index partiel ix_order_open_created_at_id, écrit en littéral
+# pour que le planificateur PostgreSQL puisse choisir l'index
+COMMANDE_OUVERTE = Order.status != literal_column(f"'{Status.SERVIE.value}'")
+
+# taille de page par défaut et plafond du paramètre `limit`
+PAGE_DEFAULT_LIMIT = 50
+PAGE_MAX_LIMIT = 200
+
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    """
+    Encode la clé de tri d'une commande en curseur opaque.
+
+    Args:
+        created_at (datetime): Date de création de la commande.
+        order_id (int): Identifiant de la commande.
+
+    Returns:
+        str: Curseur base64 url-safe.
+    """
+    raw = json.dumps([created_at.isoformat(), order_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Décode un curseur produit par encode_cursor.
+
+    Args:
+        cursor (str): Curseur reçu du client.
+
+    Raises:
+        HTTPException: 400 si le curseur est invalide.
+
+    Returns:
+        tuple[datetime, int]: (created_at, id) de la dernière commande vue.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, order_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Curseur invalide"
+        )
+
+
+def paginer(stmt, cursor: Optional[str], limit: int):
+    """
+    Applique le tri keyset, le curseur et la limite à une requête sur Order.
+
+    Une ligne de plus que `limit` est demandée pour savoir s'il existe une
+    page suivante. La borne `created_at <=` redondante avec la comparaison de
+    tuples permet l'élagage des partitions (PostgreSQL ne l'infère pas).
+
+    Args:
+        stmt (Select): Requête de commandes (filtres déjà appliqués).
+        cursor (str | None): Curseur de la page précédente.
+        limit (int): Nombre de commandes par page.
+
+    Returns:
+        Select: Requête paginée.
+    """
+    if cursor is not None:
+        created_at, order_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            col(Order.created_at) <= created_at,
+            tuple_(col(Order.created_at), col(Order.id))
+            < tuple_(literal(created_at), literal(order_id)),
+        )
+    return stmt.order_by(col(Order.created_at).desc(), col(Order.id).desc()).limit(
+        limit + 1
+    )
+
+
+def decouper_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """
+    Sépare la page courante de la ligne sentinelle et calcule le curseur suivant.
+
+    Args:
+        rows (list): Lignes lues (au plus limit + 1), avec `created_at` et `id`.
+        limit (int): Taille de page demandée.
+
+    Returns:
+        tuple[list, str | None]: Lignes de la page et curseur suivant (None en fin).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.created_at, last.id)
+
+
+def vers_utc(moment: datetime) -> datetime:
+    """
+    Convertit un instant en UTC sans fuseau, comme `Order.created_at` en base.
+
+    Un datetime sans fuseau est interprété dans RESTAURANT_TZ.
+
+    Args:
+        moment (datetime): Instant avec ou sans fuseau.
+
+    Returns:
+        datetime: Instant UTC naïf.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=RESTAURANT_TZ)
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def bornes_journee(jour: date) -> tuple[datetime, datetime]:
+    """
+    Retourne l'intervalle [minuit, minuit du lendemain) d'une journée locale.
+
+    Args:
+        jour (date): Journée dans le fuseau du restaurant.
+
+    Returns:
+        tuple[datetime, datetime]: Bornes en UTC, avec fuseau (filtrer_periode
+        les ramène au format de la base sans les décaler une seconde fois).
+    """
+    debut = datetime.combine(jour, time.min, tzinfo=RESTAURANT_TZ)
+    fin = datetime.combine(jour + timedelta(days=1), time.min, tzinfo=RESTAURANT_TZ)
+    return debut.astimezone(timezone.utc), fin.astimezone(timezone.utc)
+
+
+def filtrer_periode(stmt, debut: Optional[datetime], fin: Optional[datetime]):
+    """
+    Restreint une requête sur Order à l'intervalle semi-ouvert [debut, fin).
+
+    Args:
+        stmt (Select): Requête de commandes.
+        debut (datetime | None): Borne incluse (None = pas de borne).
+        fin (datetime | None): Borne exclue (None = pas de borne).
+
+    Raises:
+        HTTPException: 400 si debut >= fin.
+
+    Returns:
+        Select: Requête filtrée.
+    """
+    debut = vers_utc(debut) if debut is not None else None
+    fin = vers_utc(fin) if fin is not None else None
+    if debut is not None and fin is not None and debut >= fin:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La date de début doit précéder la date de fin.",
+        )
+    if debut is not None:
+        stmt = stmt.where(Order.created_at >= debut)
+    if fin is not None:
+        stmt = stmt.where(Order.created_at < fin)
+    return stmt
+
+
+def select_commandes():
+    """
+    Requête de base des lectures : colonnes de `order` uniquement.
+
+    Les filtres (utilisateur, période, ...) sont ajoutés par l'appelant.
+
+    Returns:
+        Select: Requête sur les colonnes de Order.
+    """
+    return select(
+        Order.id, Order.user_id, Order.total_amount, Order.status, Order.created_at
+    )
+
+
+# colonnes lues pour chaque article : instantané de la ligne, sans jointure produit
+COLONNES_ARTICLE = (
+    col(OrderItem.product_id),
+    col(OrderItem.quantity),
+    col(OrderItem.unit_price),
+    col(OrderItem.product_name),
+)
+
+
+def jointure_articles(commandes):
+    """
+    Condition de jointure des articles aux commandes (sous-requête ou table).
+
+    Avec ORDER_PARTITIONING, la date de la commande est ajoutée : seule la
+    partition d'articles du mois de chaque commande est lue.
+    """
+    condition = OrderItem.order_id == commandes.c.id
+    if ORDER_PARTITIONING:
+        condition = and_(condition, OrderItem.created_at == commandes.c.created_at)
+    return condition
+
+
+def _avec_articles(commandes):
+    """
+    Joint les articles à une sous-requête de commandes, dans l'ordre keyset.
+    """
+    return (
+        select(commandes, *COLONNES_ARTICLE)
+        .outerjoin(OrderItem, jointure_articles(commandes))
+        .order_by(commandes.c.created_at.desc(), commandes.c.id.desc())
+    )
+
+
+def assembler(rows) -> list[OrderReadWithItems]:
+    """
+    Regroupe des lignes (commande + article) en commandes avec leurs articles.
+
+    Args:
+        rows (Iterable): Tuples (id, user_id, total_amount, status, created_at,
+            product_id, quantity, unit_price, product_name), triés par commande.
+
+    Returns:
+        list[OrderReadWithItems]: Commandes dans l'ordre des lignes.
+    """
+    commandes: dict[int, OrderReadWithItems] = {}
+    for (
+        order_id,
+        user_id,
+        total,
+        statut,
+        created_at,
+        product_id,
+        quantity,
+        unit_price,
+        product_name,
+    ) in rows:
+        dto = commandes.get(order_id)
+        if dto is None:
+            dto = commandes[order_id] = OrderReadWithItems(
+                id=order_id,
+                user_id=user_id,
+                total_amount=total,
+                status=statut,
+                created_at=created_at,
+                items=[],
+            )
+        if product_id is not None:
+            dto.items.append(
+                OrderItemInOrderRead(
+                    product_id=product_id,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    product_name=product_name,
+                )
+            )
+    return list(commandes.values())
+
+
+def lire_page(session: Session, stmt, cursor: Optional[str], limit: int) -> OrderPage:
+    """
+    Lit une page de commandes avec leurs articles en une seule requête.
+
+    La pagination s'applique aux commandes (sous-requête), pas aux lignes
+    jointes : une commande n'est jamais coupée entre deux pages.
+
+    Args:
+        session (Session): Session de base de données.
+        stmt (Select): Requête issue de select_commandes, filtres appliqués.
+        cursor (str | None): Curseur de la page précédente.
+        limit (int): Nombre de commandes par page.
+
+    Returns:
+        OrderPage: Commandes de la page et curseur suivant.
+    """
+    commandes = paginer(stmt, cursor, limit).subquery()
+    rows = session.exec(_avec_articles(commandes)).all()
+    items, next_cursor = decouper_page(assembler(rows), limit)
+    return OrderPage(items=items, next_cursor=next_cursor)
+
+
+def lire_commande(session: Session, order_id: int) -> Optional[OrderReadWithItems]:
+    """
+    Lit une commande et ses articles en une seule requête.
+
+    Args:
+        session (Session): Session de base de données.
+        order_id (int): Identifiant de la commande.
+
+    Returns:
+        OrderReadWithItems | None: La commande, ou None si elle n'existe pas.
+    """
+    commandes = select_commandes().where(Order.id == order_id).subquery()
+    commande = assembler(session.exec(_avec_articles(commandes)).all())
+    return commande[0] if commande else None
+
+
+def lire_file_cuisine(session: Session, limit: int) -> list[OrderReadWithItems]:
+    """
+    Lit les commandes non servies, de la plus ancienne à la plus récente.
+
+    Servie par l'index partiel ix_order_open_created_at_id : le coût dépend du
+    nombre de commandes ouvertes, pas de la taille de la table.
+
+    Args:
+        session (Session): Session de base de données.
+        limit (int): Nombre maximal de commandes.
+
+    Returns:
+        list[OrderReadWithItems]: Commandes ouvertes avec leurs articles.
+    """
+    commandes = (
+        select_commandes()
+        .where(COMMANDE_OUVERTE)
+        .order_by(Order.created_at, Order.id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = session.execute(
+        sa.select(commandes, *COLONNES_ARTICLE)
+        .outerjoin(OrderItem, jointure_articles(commandes))
+        .order_by(commandes.c.created_at, commandes.c.id)
+    ).all()
+    return assembler(rows)
+
+
+def json_sql_disponible(session: Session) -> bool:
+    """
+    Indique si les listes peuvent être sérialisées par la base.
+
+    Returns:
+        bool: True si ORDERS_JSON_SQL est activé et la base est PostgreSQL.
+    """
+    return ORDERS_JSON_SQL and session.get_bind().dialect.name == "postgresql"
+
+
+def requete_page_json(stmt, cursor: Optional[str], limit: int):
+    """
+    Construit la requête PostgreSQL qui produit une page au format JSON.
+
+    La requête renvoie une seule ligne :
+    - `items` : tableau JSON (texte) des `limit` premières commandes, chacune
+      avec ses articles, au format de OrderReadWithItems ;
+    - `total` : nombre de commandes lues (limit + 1 s'il y a une page suivante) ;
+    - `last_created_at`, `last_id` : clé de la dernière commande de la page.
+
+    Args:
+        stmt (Select): Requête issue de select_commandes, filtres appliqués.
+        cursor (str | None): Curseur de la page précédente.
+        limit (int): Nombre de commandes par page.
+
+    Returns:
+        Select: Requête d'agrégation.
+    """
+    page = paginer(stmt, cursor, limit).subquery()
+    rangs = select(
+        page,
+        func.row_number()
+        .over(order_by=(page.c.created_at.desc(), page.c.id.desc()))
+        .label("rang"),
+    ).subquery()
+
+    articles = (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    func.json_build_object(
+                        "product_id",
+                        OrderItem.product_id,
+                        "quantity",
+                        OrderItem.quantity,
+                        "unit_price",
+                        OrderItem.unit_price,
+                        "product_name",
+                        OrderItem.product_name,
+                    )
+                ),
+                literal_column("'[]'::json"),
+            )
+        )
+        .where(jointure_articles(rangs))
+        .scalar_subquery()
+    )
+    commande = func.json_build_object(
+        "id",
+        rangs.c.id,
+        "user_id",
+        rangs.c.user_id,
+        "total_amount",
+        rangs.c.total_amount,
+        "status",
+        rangs.c.status,
+        "created_at",
+        rangs.c.created_at,
+        "items",
+        articles,
+    )
+    dans_la_page = rangs.c.rang <= limit
+    dernier = rangs.c.rang == limit
+    return select(
+        cast(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(commande, rangs.c.rang)).filter(
+                    dans_la_page
+                ),
+                literal_column("'[]'::json"),
+            ),
+            Text,
+        ).label("items"),
+        func.count().label("total"),
+        func.max(rangs.c.created_at).filter(dernier).label("last_created_at"),
+        func.max(rangs.c.id).filter(dernier).label("last_id"),
+    )
+
+
+def lire_page_json(session: Session, stmt, cursor: Optional[str], limit: int) -> bytes:
+    """
+    Lit une page de commandes déjà sérialisée en JSON par PostgreSQL.
+
+    Le tableau `items` produit par la base est inséré tel quel dans le corps
+    de la réponse ; seul `next_cursor` est ajouté côté Python.
+
+    Args:
+        session (Session): Session de base de données (PostgreSQL).
+        stmt (Select): Requête issue de select_commandes, filtres appliqués.
+        cursor (str | None): Curseur de la page précédente.
+        limit (int): Nombre de commandes par page.
+
+    Returns:
+        bytes: Corps JSON au format de OrderPage.
+    """
+    row = session.exec(requete_page_json(stmt, cursor, limit)).one()
+    next_cursor = None
+    if row.total > limit:
+        next_cursor = encode_cursor(row.last_created_at, row.last_id)
+    return b"".join(
+        (
+            b'{"items":',
+            row.items.encode("utf-8"),
+            b',"next_cursor":',
+            json.dumps(next_cursor).encode("utf-8"),
+            b"}",
+        )
+    )
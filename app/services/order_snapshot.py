@@ -0,0 +1,77 @@
+"""
+Reprise de l'instantané prix / nom des lignes de commande antérieures.
+
+Les lignes créées avant l'ajout des colonnes `orderitem.unit_price` et
+`orderitem.product_name` sont complétées par lots de `taille_lot` lignes,
+une transaction par lot : la reprise n'allonge aucune transaction et peut être
+interrompue puis relancée. Les valeurs reprises sont celles du produit au
+moment de la reprise (le prix historique n'est pas connu). Les lignes dont
+le produit a été supprimé n'ont rien à reprendre : elles restent sans
+instantané et sont écartées des lots.
+"""
+
+import logging
+from typing import cast
+
+from sqlalchemy import CursorResult, tuple_, update
+from sqlmodel import Session, col, select
+
+from app.models import OrderItem, Product
+
+logger = logging.getLogger(__name__)
+
+
+def reprendre_lot(session: Session, taille_lot: int) -> int:
+    """
+    Complète un lot de lignes sans instantané, en une requête.
+
+    Args:
+        session (Session): Session de base de données.
+        taille_lot (int): Nombre maximal de lignes du lot.
+
+    Returns:
+        int: Nombre de lignes complétées (0 quand la reprise est terminée).
+    """
+    lot = (
+        select(OrderItem.order_id, OrderItem.product_id)
+        .where(
+            col(OrderItem.unit_price).is_(None),
+            # produit supprimé : la ligne resterait sans prix, lot après lot
+            col(OrderItem.product_id).in_(select(Product.id)),
+        )
+        .limit(taille_lot)
+    )
+    produit = select(Product).where(col(Product.id) == OrderItem.product_id)
+    result = session.execute(
+        update(OrderItem)
+        .where(tuple_(col(OrderItem.order_id), col(OrderItem.product_id)).in_(lot))
+        .values(
+            unit_price=produit.with_only_columns(
+                col(Product.unit_price)
+            ).scalar_subquery(),
+            product_name=produit.with_only_columns(col(Product.name)).scalar_subquery(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return cast(CursorResult, result).rowcount
+
+
+def reprendre_instantanes(session: Session, taille_lot: int = 1000) -> int:
+    """
+    Complète toutes les lignes sans instantané, lot par lot.
+
+    Args:
+        session (Session): Session de base de données.
+        taille_lot (int): Nombre de lignes par transaction.
+
+    Returns:
+        int: Nombre total de lignes complétées.
+    """
+    total = 0
+    while True:
+        n = reprendre_lot(session, taille_lot)
+        if not n:
+            return total
+        total += n
+        logger.info("Instantané repris pour %d lignes (%d au total)", n, total)
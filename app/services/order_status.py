@@ -0,0 +1,118 @@
+"""
+Changement de statut des commandes (cuisine).
+
+Le statut avance dans un seul sens : En préparation → Prete → Servie.
+La transition est appliquée par un seul UPDATE conditionnel :
+`UPDATE order SET status = :nouveau WHERE id = :id AND status = :precedent
+RETURNING ...` ; deux écrans qui valident la même commande en même temps ne
+peuvent pas la faire avancer deux fois. Les articles ne sont ni relus ni
+recalculés.
+
+La date de passage au statut est enregistrée dans le même UPDATE
+(`ready_at`, `served_at`) ; le passage à « Prete » verse le temps de
+préparation dans les esquisses de percentiles (app/services/quantiles.py).
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlmodel import Session, col, select
+
+from app.enumerations import Status
+from app.models import Order
+from app.schemas.order import OrderRead
+from app.services.quantiles import cumuler_preparation
+
+# transitions autorisées : statut -> statut suivant
+TRANSITIONS = {
+    Status.EN_PREPARATION: Status.PRETE,
+    Status.PRETE: Status.SERVIE,
+}
+
+# date de passage enregistrée pour chaque statut
+HORODATAGES = {
+    Status.PRETE: "ready_at",
+    Status.SERVIE: "served_at",
+}
+
+
+def statuts_precedents(nouveau: Status) -> list[str]:
+    """
+    Retourne les statuts depuis lesquels `nouveau` est atteignable.
+    """
+    return [avant.value for avant, apres in TRANSITIONS.items() if apres == nouveau]
+
+
+def horodater(order: Order, nouveau: Status, maintenant: Optional[datetime] = None):
+    """
+    Met à jour les dates de passage d'une commande dont le statut est fixé
+    directement (patch) : les statuts atteints sans date reçoivent
+    `maintenant`, ceux qui suivent le nouveau statut perdent la leur.
+
+    Args:
+        order (Order): Commande à modifier.
+        nouveau (Status): Nouveau statut.
+        maintenant (datetime | None): Date de passage (par défaut, maintenant).
+    """
+    maintenant = maintenant or datetime.now(timezone.utc)
+    ordre = list(Status)
+    for statut, champ in HORODATAGES.items():
+        if ordre.index(statut) > ordre.index(Status(nouveau)):
+            setattr(order, champ, None)
+        elif getattr(order, champ) is None:
+            setattr(order, champ, maintenant)
+
+
+def changer_statut(session: Session, order_id: int, nouveau: Status) -> OrderRead:
+    """
+    Fait avancer le statut d'une commande en un UPDATE (au passage à
+    « Prete », deux requêtes de plus : catégories et temps de préparation).
+
+    Args:
+        session (Session): Session de base de données.
+        order_id (int): Identifiant de la commande.
+        nouveau (Status): Statut cible.
+
+    Raises:
+        HTTPException: 404 si la commande n'existe pas, 409 si la transition
+            n'est pas autorisée depuis le statut actuel.
+
+    Returns:
+        OrderRead: Commande mise à jour (sans ses articles).
+    """
+    row = session.execute(
+        update(Order)
+        .where(
+            col(Order.id) == order_id,
+            col(Order.status).in_(statuts_precedents(nouveau)),
+        )
+        .values(
+            status=nouveau.value,
+            **{HORODATAGES[nouveau]: datetime.now(timezone.utc)},
+        )
+        .returning(
+            col(Order.id),
+            col(Order.user_id),
+            col(Order.total_amount),
+            col(Order.status),
+            col(Order.created_at),
+            col(Order.ready_at),
+        )
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if row is not None:
+        if nouveau == Status.PRETE:
+            cumuler_preparation(session, row)
+        session.commit()
+        return OrderRead.model_validate(row._mapping)
+
+    actuel = session.exec(select(Order.status).where(Order.id == order_id)).first()
+    session.rollback()
+    if actuel is None:
+        raise HTTPException(status_code=404, detail="Commande non trouvée")
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Transition interdite : {actuel} → {nouveau.value}",
+    )
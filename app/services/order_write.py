@@ -0,0 +1,372 @@
+"""
+Pipeline d'écriture des commandes.
+
+Les étapes sont partagées entre la création et la modification d'une commande :
+1. consolider les lignes (un produit = une ligne, quantités additionnées) ;
+2. charger tous les produits référencés en une seule requête `IN` ;
+3. valider en bloc les produits introuvables ;
+4. insérer toutes les lignes en un seul executemany (en modification : n'écrire
+   que l'écart avec les lignes existantes) ;
+5. réserver le stock par une mise à jour conditionnelle ensembliste ;
+6. construire le DTO de réponse à partir des données déjà en mémoire.
+"""
+
+from typing import Iterable, NamedTuple, Optional
+
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, insert, update
+from sqlmodel import Session, col, select
+
+from app.models import Order, OrderItem, Product
+from app.schemas.order import OrderItemInOrderRead, OrderReadWithItems
+from app.services.partitions import ORDER_PARTITIONING
+
+
+class ProduitPrix(NamedTuple):
+    """
+    Colonnes d'un produit nécessaires pour tarifer une commande.
+    """
+
+    id: int
+    name: str
+    unit_price: float
+    # catégorie (esquisses de percentiles), inconnue pour un produit déjà commandé
+    category: Optional[str] = None
+
+
+class Ligne(NamedTuple):
+    """
+    Ligne de commande tarifée, prête pour le calcul du total et le DTO.
+    """
+
+    product_id: int
+    quantity: int
+    unit_price: float
+    product_name: str
+
+
+def consolider_items(items: Iterable) -> dict[int, int]:
+    """
+    Regroupe les articles par produit en additionnant les quantités.
+
+    Args:
+        items (Iterable): Articles avec `product_id` et `quantity`.
+
+    Raises:
+        HTTPException: 422 si une quantité consolidée est inférieure à 1.
+
+    Returns:
+        dict[int, int]: Quantité par identifiant de produit.
+    """
+    consolidated: dict[int, int] = {}
+    for it in items:
+        consolidated[it.product_id] = consolidated.get(it.product_id, 0) + it.quantity
+    if any(qty <= 0 for qty in consolidated.values()):
+        raise HTTPException(status_code=422, detail="La quantité doit être ≥ 1.")
+    return consolidated
+
+
+def charger_produits(
+    session: Session, product_ids: Iterable[int]
+) -> dict[int, ProduitPrix]:
+    """
+    Charge en une requête les produits référencés par une commande.
+
+    Args:
+        session (Session): Session de base de données.
+        product_ids (Iterable[int]): Identifiants des produits.
+
+    Raises:
+        HTTPException: 404 listant tous les produits introuvables.
+
+    Returns:
+        dict[int, ProduitPrix]: Produits indexés par identifiant.
+    """
+    ids = set(product_ids)
+    rows = session.exec(
+        select(Product.id, Product.name, Product.unit_price, Product.category).where(
+            col(Product.id).in_(ids)
+        )
+    ).all()
+    produits = {produit.id: produit for produit in map(ProduitPrix._make, rows)}
+    verifier_produits(ids, produits)
+    return produits
+
+
+def verifier_produits(product_ids: Iterable[int], produits: dict) -> None:
+    """
+    Vérifie que tous les produits référencés ont été chargés.
+
+    Args:
+        product_ids (Iterable[int]): Identifiants des produits demandés.
+        produits (dict): Produits chargés, indexés par identifiant.
+
+    Raises:
+        HTTPException: 404 listant tous les produits introuvables.
+    """
+    manquants = sorted(set(product_ids) - produits.keys())
+    if len(manquants) == 1:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Produit {manquants[0]} introuvable",
+        )
+    if manquants:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Produits {', '.join(map(str, manquants))} introuvables",
+        )
+
+
+def tarifer(
+    quantities: dict[int, int], produits: dict[int, ProduitPrix]
+) -> list[Ligne]:
+    """
+    Associe chaque quantité au prix et au nom du produit.
+
+    Args:
+        quantities (dict[int, int]): Quantité par produit.
+        produits (dict[int, ProduitPrix]): Produits chargés.
+
+    Returns:
+        list[Ligne]: Lignes tarifées, dans l'ordre des quantités.
+    """
+    return [
+        Ligne(pid, qty, float(produits[pid].unit_price), produits[pid].name)
+        for pid, qty in quantities.items()
+    ]
+
+
+def calculer_total(lignes: Iterable[Ligne]) -> float:
+    """
+    Calcule le montant total d'une commande, arrondi au centime.
+    """
+    return round(sum(ligne.unit_price * ligne.quantity for ligne in lignes), 2)
+
+
+def inserer_lignes(session: Session, order: Order, lignes: list[Ligne]) -> None:
+    """
+    Insère toutes les lignes d'une commande en un seul executemany.
+
+    Args:
+        session (Session): Session de base de données.
+        order (Order): Commande (id et created_at connus).
+        lignes (list[Ligne]): Lignes à insérer.
+    """
+    inserer_lignes_en_bloc(session, [(order, lignes)])
+
+
+def inserer_lignes_en_bloc(
+    session: Session, lignes_par_commande: list[tuple[Order, list[Ligne]]]
+) -> None:
+    """
+    Insère les lignes de plusieurs commandes en un seul executemany.
+
+    Chaque ligne reçoit la date de sa commande : c'est la clé de partition
+    partagée par `order` et `orderitem` (voir app/services/partitions.py).
+
+    Args:
+        session (Session): Session de base de données.
+        lignes_par_commande (list[tuple[Order, list[Ligne]]]): Commandes et leurs lignes.
+    """
+    rows = [
+        {
+            "order_id": order.id,
+            "product_id": ligne.product_id,
+            "quantity": ligne.quantity,
+            "unit_price": ligne.unit_price,
+            "product_name": ligne.product_name,
+            "created_at": order.created_at,
+        }
+        for order, lignes in lignes_par_commande
+        for ligne in lignes
+    ]
+    if rows:
+        session.execute(insert(OrderItem), rows)
+
+
+def _lignes_de(order: Order) -> list:
+    """
+    Critères désignant les lignes d'une commande (partition comprise si besoin).
+    """
+    criteres = [OrderItem.order_id == order.id]
+    if ORDER_PARTITIONING:
+        criteres.append(OrderItem.created_at == order.created_at)
+    return criteres
+
+
+def appliquer_ecart(
+    session: Session, order: Order, anciennes: list[Ligne], nouvelles: list[Ligne]
+) -> dict[int, int]:
+    """
+    Met à jour les lignes d'une commande en n'écrivant que ce qui a changé.
+
+    Au plus trois requêtes : un DELETE des produits retirés, un UPDATE
+    (executemany par clé primaire) des quantités modifiées et un INSERT des
+    produits ajoutés ; aucune si les lignes sont identiques.
+
+    Args:
+        session (Session): Session de base de données.
+        order (Order): Commande modifiée.
+        anciennes (list[Ligne]): Lignes actuellement en base.
+        nouvelles (list[Ligne]): Lignes souhaitées.
+
+    Returns:
+        dict[int, int]: Écart de quantité par produit (positif = à réserver).
+    """
+    avant = {ligne.product_id: ligne.quantity for ligne in anciennes}
+    apres = {ligne.product_id: ligne.quantity for ligne in nouvelles}
+
+    retires = [pid for pid in avant if pid not in apres]
+    modifies = [
+        {"order_id": order.id, "product_id": pid, "quantity": qty}
+        for pid, qty in apres.items()
+        if pid in avant and avant[pid] != qty
+    ]
+    ajoutes = [ligne for ligne in nouvelles if ligne.product_id not in avant]
+
+    if retires:
+        session.execute(
+            delete(OrderItem)
+            .where(*_lignes_de(order), col(OrderItem.product_id).in_(retires))
+            .execution_options(synchronize_session=False)
+        )
+    if modifies:
+        session.execute(
+            update(OrderItem).execution_options(synchronize_session=False), modifies
+        )
+    inserer_lignes(session, order, ajoutes)
+
+    return {
+        pid: apres.get(pid, 0) - avant.get(pid, 0)
+        for pid in avant.keys() | apres.keys()
+    }
+
+
+def lignes_existantes(session: Session, order: Order) -> list[Ligne]:
+    """
+    Charge les lignes d'une commande avec le prix et le nom figés à la commande.
+
+    Les lignes antérieures à l'instantané (non encore reprises par
+    `backfill-order-items`) sont tarifées au prix actuel du produit.
+
+    Args:
+        session (Session): Session de base de données.
+        order (Order): Commande.
+
+    Returns:
+        list[Ligne]: Lignes tarifées de la commande.
+    """
+    rows = session.execute(
+        sa.select(
+            col(OrderItem.product_id),
+            col(OrderItem.quantity),
+            col(OrderItem.unit_price),
+            col(OrderItem.product_name),
+        ).where(*_lignes_de(order))
+    ).all()
+    sans_instantane = [row.product_id for row in rows if row.unit_price is None]
+    produits = charger_produits(session, sans_instantane) if sans_instantane else {}
+    return [
+        (
+            Ligne(*row)
+            if row.unit_price is not None
+            else Ligne(
+                row.product_id,
+                row.quantity,
+                float(produits[row.product_id].unit_price),
+                produits[row.product_id].name,
+            )
+        )
+        for row in rows
+    ]
+
+
+def construire_dto(order: Order, lignes: Iterable[Ligne]) -> OrderReadWithItems:
+    """
+    Construit la réponse d'une commande sans relire la base.
+
+    Args:
+        order (Order): Commande (attributs chargés, avant commit).
+        lignes (Iterable[Ligne]): Lignes de la commande.
+
+    Returns:
+        OrderReadWithItems: Commande avec ses articles.
+    """
+    dto = OrderReadWithItems.model_validate(order, from_attributes=True)
+    dto.items = [
+        OrderItemInOrderRead(
+            product_id=ligne.product_id,
+            quantity=ligne.quantity,
+            unit_price=ligne.unit_price,
+            product_name=ligne.product_name,
+        )
+        for ligne in lignes
+    ]
+    return dto
+
+
+def reserver_stock(session: Session, deltas: dict[int, int]) -> None:
+    """
+    Réserve (ou libère) du stock en une seule requête conditionnelle.
+
+    `UPDATE product SET stock = stock - delta WHERE id IN (...) AND stock >= delta
+    RETURNING id` : un delta positif n'est décrémenté que si le stock suffit, un
+    delta négatif (quantité réduite lors d'un patch, commande supprimée) est
+    toujours rendu au stock, sauf si le produit a été supprimé depuis.
+    Aucun SELECT ... FOR UPDATE : les lignes ne sont verrouillées que de
+    l'UPDATE jusqu'au commit ; l'appel se fait en fin de transaction, après
+    l'écriture des lignes et des cumuls de statistiques. Les identifiants sont
+    triés pour que deux commandes concurrentes verrouillent les produits dans
+    le même ordre (pas d'interblocage).
+
+    Args:
+        session (Session): Session de base de données.
+        deltas (dict[int, int]): Quantité à réserver (> 0) ou libérer (< 0) par produit.
+
+    Raises:
+        HTTPException: 409 listant les produits dont le stock est insuffisant
+            (ceux que l'UPDATE n'a pas pu décrémenter) ; la transaction est
+            annulée, rien n'est réservé.
+    """
+    deltas = {pid: delta for pid, delta in sorted(deltas.items()) if delta}
+    if not deltas:
+        return
+    besoin = case(deltas, value=Product.id)
+    reserves = set(
+        session.execute(
+            update(Product)
+            .where(col(Product.id).in_(list(deltas)), col(Product.stock) >= besoin)
+            .values(stock=col(Product.stock) - besoin)
+            .returning(col(Product.id))
+            .execution_options(synchronize_session=False)
+        ).scalars()
+    )
+    refuses = [
+        pid for pid, delta in deltas.items() if delta > 0 and pid not in reserves
+    ]
+    if not refuses:
+        return
+
+    # produits refusés déterminés avant l'annulation : le stock relu ensuite
+    # n'est qu'indicatif (il a pu être réapprovisionné entre-temps)
+    session.rollback()
+    rows = session.exec(
+        select(Product.id, Product.name, Product.stock).where(
+            col(Product.id).in_(refuses)
+        )
+    ).all()
+    actuels = {pid: (name, stock) for pid, name, stock in rows}
+    manquants = [
+        {
+            "product_id": pid,
+            "product_name": actuels.get(pid, (None, 0))[0],
+            "requested": deltas[pid],
+            "available": actuels.get(pid, (None, 0))[1],
+        }
+        for pid in refuses
+    ]
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": "Stock insuffisant", "products": manquants},
+    )
@@ -0,0 +1,348 @@
+"""
+Partitionnement mensuel (PostgreSQL) des tables `order` et `orderitem`.
+
+Optionnel : les tables restent ordinaires tant que
+`python -m app.commands partition-orders` n'a pas été lancé. La conversion
+(dans une seule transaction, à faire pendant une fenêtre de maintenance) :
+- recrée `order` partitionnée par mois de `created_at`, clé primaire
+  `(id, created_at)` ; la séquence des identifiants est conservée ;
+- recrée `orderitem` partitionnée par le même mois : `orderitem.created_at`
+  reçoit la date de sa commande, et la clé étrangère devient
+  `(order_id, created_at) -> order(id, created_at)`, ON DELETE CASCADE ;
+  une commande et ses lignes vivent donc dans la partition du même mois ;
+- supprime la clé étrangère `delivery.order_id` (PostgreSQL n'accepte pas de
+  référence vers une table partitionnée sans la clé de partition) ;
+- recrée les index et clés étrangères déclarés dans `app/models.py` ; l'index
+  BRIN optionnel n'est pas recréé, le découpage par mois le remplace.
+
+Une partition par défaut reçoit les lignes hors des mois créés. La
+maintenance (`python -m app.commands maintain-partitions`, à planifier) crée
+les `PARTITION_MONTHS_AHEAD` mois à venir (en y déplaçant les lignes du mois
+déjà reçues par la partition par défaut) et détache les mois plus anciens que
+`PARTITION_RETENTION_MONTHS` vers le schéma `PARTITION_ARCHIVE_SCHEMA` :
+ces commandes ne sont plus servies par l'API mais restent interrogeables.
+
+Une fois les tables converties, `ORDER_PARTITIONING=true` fait ajouter
+`orderitem.created_at = order.created_at` aux jointures et aux écritures des
+lignes, pour que PostgreSQL élague les partitions des articles.
+"""
+
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import AddConstraint, CreateIndex
+from sqlmodel import Session
+
+from app.models import Order, OrderItem
+
+# tables converties : jointures et écritures filtrées sur created_at
+ORDER_PARTITIONING = os.getenv("ORDER_PARTITIONING", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "24"))
+PARTITION_ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+
+# tables partitionnées, dans l'ordre des clés étrangères
+TABLES = ("order", "orderitem")
+FK_ARTICLE_COMMANDE = "orderitem_order_id_created_at_fkey"
+COLONNES_ORDERITEM = "order_id, product_id, quantity, unit_price, product_name"
+
+
+def debut_mois(jour: date) -> date:
+    """Premier jour du mois de `jour`."""
+    return date(jour.year, jour.month, 1)
+
+
+def decaler_mois(mois: date, n: int) -> date:
+    """
+    Premier jour du mois situé `n` mois après `mois` (n peut être négatif).
+    """
+    index = mois.year * 12 + mois.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def nom_partition(table: str, mois: date) -> str:
+    """Nom de la partition d'un mois (ex: order_p2026_10)."""
+    return f"{table}_p{mois:%Y_%m}"
+
+
+def mois_de_partition(table: str, nom: str) -> Optional[date]:
+    """
+    Retrouve le mois d'une partition d'après son nom (None si ce n'en est pas une).
+    """
+    match = re.fullmatch(rf"{table}_p(\d{{4}})_(\d{{2}})", nom)
+    if match is None:
+        return None
+    return date(int(match[1]), int(match[2]), 1)
+
+
+def ddl_partition(table: str, mois: date, parent: Optional[str] = None) -> str:
+    """
+    Crée (si besoin) la partition d'un mois : [1er du mois, 1er du mois suivant).
+
+    Args:
+        table (str): Table partitionnée ("order" ou "orderitem").
+        mois (date): Premier jour du mois.
+        parent (str | None): Nom de la table parente s'il diffère de `table`
+            (pendant la conversion).
+
+    Returns:
+        str: Instruction SQL.
+    """
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{nom_partition(table, mois)}" '
+        f'PARTITION OF "{parent or table}" '
+        f"FOR VALUES FROM ('{mois}') TO ('{decaler_mois(mois, 1)}')"
+    )
+
+
+def ddl_nouveau_mois(mois: date) -> list[str]:
+    """
+    Crée les partitions d'un mois sur des tables déjà partitionnées.
+
+    PostgreSQL refuse d'attacher un mois dont des lignes sont déjà dans la
+    partition par défaut : elles sont mises de côté (table temporaire),
+    supprimées de la partition par défaut, puis réinsérées une fois le mois
+    créé. Sans ligne à déplacer, les copies sont vides.
+
+    Args:
+        mois (date): Premier jour du mois.
+
+    Returns:
+        list[str]: Instructions SQL, à exécuter dans une seule transaction.
+    """
+    periode = f"created_at >= '{mois}' AND created_at < '{decaler_mois(mois, 1)}'"
+    ddl = [
+        f'CREATE TEMP TABLE "_{table}_a_deplacer" AS '
+        f'SELECT * FROM "{table}_default" WHERE {periode}'
+        for table in TABLES
+    ]
+    # articles d'abord : ils référencent les commandes
+    ddl += [
+        f'DELETE FROM "{table}_default" WHERE {periode}' for table in reversed(TABLES)
+    ]
+    for table in TABLES:
+        ddl += [
+            ddl_partition(table, mois),
+            f'INSERT INTO "{table}" SELECT * FROM "_{table}_a_deplacer"',
+            f'DROP TABLE "_{table}_a_deplacer"',
+        ]
+    return ddl
+
+
+def _mois_entre(premier: date, dernier: date) -> list[date]:
+    """Mois de `premier` à `dernier` inclus."""
+    mois = []
+    while premier <= dernier:
+        mois.append(premier)
+        premier = decaler_mois(premier, 1)
+    return mois
+
+
+def ddl_conversion(premier: date, dernier: date, sequence: str) -> list[str]:
+    """
+    Instructions de conversion des tables ordinaires en tables partitionnées.
+
+    Args:
+        premier (date): Premier mois à créer (mois de la commande la plus ancienne).
+        dernier (date): Dernier mois à créer (mois à venir inclus).
+        sequence (str): Séquence des identifiants de `order`.
+
+    Returns:
+        list[str]: Instructions SQL, à exécuter dans une seule transaction.
+    """
+    dialect = postgresql.dialect()
+    ddl = [
+        f"ALTER SEQUENCE {sequence} OWNED BY NONE",
+        "ALTER TABLE delivery DROP CONSTRAINT IF EXISTS delivery_order_id_fkey",
+        'CREATE TABLE order_partitioned (LIKE "order" INCLUDING DEFAULTS) '
+        "PARTITION BY RANGE (created_at)",
+        "CREATE TABLE orderitem_partitioned (LIKE orderitem INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)",
+    ]
+    for table in TABLES:
+        for mois in _mois_entre(premier, dernier):
+            ddl.append(ddl_partition(table, mois, parent=f"{table}_partitioned"))
+        ddl.append(
+            f'CREATE TABLE "{table}_default" PARTITION OF {table}_partitioned DEFAULT'
+        )
+    ddl += [
+        'INSERT INTO order_partitioned SELECT * FROM "order"',
+        f"INSERT INTO orderitem_partitioned ({COLONNES_ORDERITEM}, created_at) "
+        f"SELECT {', '.join('oi.' + c for c in COLONNES_ORDERITEM.split(', '))}, "
+        'o.created_at FROM orderitem oi JOIN "order" o ON o.id = oi.order_id',
+        "DROP TABLE orderitem",
+        'DROP TABLE "order"',
+        'ALTER TABLE order_partitioned RENAME TO "order"',
+        "ALTER TABLE orderitem_partitioned RENAME TO orderitem",
+        f'ALTER SEQUENCE {sequence} OWNED BY "order".id',
+        'ALTER TABLE "order" ADD PRIMARY KEY (id, created_at)',
+        "ALTER TABLE orderitem ADD PRIMARY KEY (order_id, product_id, created_at)",
+        f"ALTER TABLE orderitem ADD CONSTRAINT {FK_ARTICLE_COMMANDE} "
+        'FOREIGN KEY (order_id, created_at) REFERENCES "order" (id, created_at) '
+        "ON DELETE CASCADE",
+    ]
+    commandes = Order.metadata.tables["order"]
+    articles = OrderItem.metadata.tables["orderitem"]
+    for index in sorted(commandes.indexes, key=lambda index: str(index.name)):
+        ddl.append(str(CreateIndex(index).compile(dialect=dialect)))
+    for fk in commandes.foreign_key_constraints:
+        ddl.append(str(AddConstraint(fk).compile(dialect=dialect)))
+    for fk in articles.foreign_key_constraints:
+        if fk.referred_table.name != "order":
+            ddl.append(str(AddConstraint(fk).compile(dialect=dialect)))
+    return ddl
+
+
+def _verifier_postgresql(session: Session):
+    """Le partitionnement déclaratif n'existe que sur PostgreSQL."""
+    if session.get_bind().dialect.name != "postgresql":
+        raise ValueError("Le partitionnement n'est disponible que sur PostgreSQL.")
+
+
+def est_partitionnee(session: Session) -> bool:
+    """
+    Indique si la table `order` est déjà partitionnée.
+    """
+    _verifier_postgresql(session)
+    return (
+        session.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = '\"order\"'::regclass"
+            )
+        ).first()
+        is not None
+    )
+
+
+def partitions(session: Session, table: str) -> list[date]:
+    """
+    Mois des partitions attachées à une table, triés.
+    """
+    noms = session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass)"
+        ),
+        {"parent": f'"{table}"'},
+    ).scalars()
+    return sorted(
+        mois for mois in (mois_de_partition(table, nom) for nom in noms) if mois
+    )
+
+
+def _mois_courant(aujourdhui: Optional[date]) -> date:
+    """Mois courant (UTC, comme created_at en base)."""
+    return debut_mois(aujourdhui or datetime.now(timezone.utc).date())
+
+
+def partitionner(
+    session: Session,
+    mois_avance: int = PARTITION_MONTHS_AHEAD,
+    aujourdhui: Optional[date] = None,
+) -> bool:
+    """
+    Convertit `order` et `orderitem` en tables partitionnées par mois.
+
+    Args:
+        session (Session): Session de base de données (PostgreSQL).
+        mois_avance (int): Nombre de mois à venir à créer.
+        aujourdhui (date | None): Date de référence (tests).
+
+    Raises:
+        ValueError: Si la base n'est pas PostgreSQL.
+
+    Returns:
+        bool: False si les tables étaient déjà partitionnées.
+    """
+    if est_partitionnee(session):
+        return False
+    courant = _mois_courant(aujourdhui)
+    plus_ancienne = session.execute(
+        text('SELECT min(created_at) FROM "order"')
+    ).scalar()
+    premier = debut_mois(plus_ancienne.date()) if plus_ancienne else courant
+    sequence = session.execute(
+        text("SELECT pg_get_serial_sequence('\"order\"', 'id')")
+    ).scalar_one()
+    for instruction in ddl_conversion(
+        min(premier, courant), decaler_mois(courant, mois_avance), sequence
+    ):
+        session.execute(text(instruction))
+    session.commit()
+    return True
+
+
+def maintenir_partitions(
+    session: Session,
+    mois_avance: int = PARTITION_MONTHS_AHEAD,
+    retention_mois: int = PARTITION_RETENTION_MONTHS,
+    schema_archive: str = PARTITION_ARCHIVE_SCHEMA,
+    aujourdhui: Optional[date] = None,
+) -> tuple[list[str], list[str]]:
+    """
+    Crée les partitions à venir et archive les plus anciennes.
+
+    Une partition est archivée quand tout son mois précède les
+    `retention_mois` derniers mois : elle est détachée (articles d'abord,
+    puis commandes) et déplacée dans `schema_archive`.
+
+    Args:
+        session (Session): Session de base de données (PostgreSQL, tables
+            partitionnées).
+        mois_avance (int): Nombre de mois à venir à créer.
+        retention_mois (int): Nombre de mois gardés attachés (mois courant inclus).
+        schema_archive (str): Schéma qui reçoit les partitions détachées.
+        aujourdhui (date | None): Date de référence (tests).
+
+    Raises:
+        ValueError: Si la base n'est pas PostgreSQL ou pas partitionnée.
+
+    Returns:
+        tuple[list[str], list[str]]: Partitions créées, partitions archivées.
+    """
+    if not est_partitionnee(session):
+        raise ValueError(
+            "Tables non partitionnées : lancer d'abord `partition-orders`."
+        )
+    courant = _mois_courant(aujourdhui)
+    creees = []
+    existantes = set(partitions(session, "order")) & set(
+        partitions(session, "orderitem")
+    )
+    for mois in _mois_entre(courant, decaler_mois(courant, mois_avance)):
+        if mois not in existantes:
+            for instruction in ddl_nouveau_mois(mois):
+                session.execute(text(instruction))
+            creees += [nom_partition(table, mois) for table in TABLES]
+
+    limite = decaler_mois(courant, 1 - retention_mois)
+    archivees = []
+    anciennes = [mois for mois in partitions(session, "order") if mois < limite]
+    if anciennes:
+        session.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema_archive}"'))
+    for mois in anciennes:
+        for table in reversed(TABLES):
+            nom = nom_partition(table, mois)
+            session.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{nom}"'))
+            if table == "orderitem":
+                # la copie de la clé étrangère empêcherait de détacher la commande
+                session.execute(
+                    text(
+                        f'ALTER TABLE "{nom}" '
+                        f"DROP CONSTRAINT IF EXISTS {FK_ARTICLE_COMMANDE}"
+                    )
+                )
+            session.execute(text(f'ALTER TABLE "{nom}" SET SCHEMA "{schema_archive}"'))
+            archivees.append(nom)
+    session.commit()
+    return creees, archivees
@@ -0,0 +1,387 @@
+"""
+Percentiles du montant des commandes et du temps de préparation (DDSketch).
+
+Un percentile ne se cumule pas par sommes ; chaque jour tient donc une
+esquisse DDSketch par métrique et par catégorie (table `dailyquantiles`) :
+les valeurs sont comptées dans des seaux logarithmiques
+(seau i = ]γ^(i-1), γ^i], γ = (1 + α) / (1 - α)). Les comptes s'additionnent :
+fusionner des jours, des semaines ou des mois est un `SUM ... GROUP BY
+bucket`, et tout percentile lu est à moins de α (1 %) de sa valeur exacte.
+
+- Métriques : "amount" (montant total de la commande) et "prep_time"
+  (secondes entre la création et le passage au statut « Prete »).
+- Catégories : une commande compte une fois dans "" (toutes catégories) et
+  une fois dans chaque catégorie de ses produits.
+- Les esquisses sont tenues à jour dans la transaction de chaque écriture
+  (création, lot, modification, suppression, changement de statut) : l'écart
+  entre l'état avant et après de la commande est appliqué en un seul
+  `INSERT ... ON CONFLICT DO UPDATE SET count = count + excluded.count`.
+  Comme pour `dailysales`, `reconstruire_quantiles` recalcule une période
+  depuis les commandes.
+"""
+
+import math
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from itertools import groupby
+from typing import Any, Iterable, NamedTuple, Optional
+
+import numpy as np
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, col, select
+
+from app.enumerations import Category
+from app.models import DailyQuantiles, Order, OrderItem, Product
+from app.schemas.stats import Granularity, Percentiles, QuantileMetric
+from app.services.daily_sales import jour_local
+from app.services.order_read import bornes_journee, filtrer_periode, jointure_articles
+from app.services.stats import tranche_jour
+
+# format des esquisses enregistrées : ne pas modifier sans les recalculer
+PRECISION_RELATIVE = 0.01
+GAMMA = (1 + PRECISION_RELATIVE) / (1 - PRECISION_RELATIVE)
+_LOG_GAMMA = math.log(GAMMA)
+# seau des valeurs nulles (commande à 0 €, préparation instantanée)
+SEAU_ZERO = -(2**31)
+
+# catégorie des esquisses toutes catégories confondues
+TOUTES = ""
+PERCENTILES = (0.5, 0.95, 0.99)
+LOT_RECONSTRUCTION = 10000
+# lignes par INSERT (limite de paramètres de SQLite)
+LIGNES_PAR_INSERT = 1000
+
+
+class Mesure(NamedTuple):
+    """
+    Valeurs d'une commande versées dans les esquisses.
+    """
+
+    day: date
+    amount: float
+    prep_time: Optional[float]
+    categories: frozenset = frozenset()
+
+
+def seau(valeur: float) -> int:
+    """Indice du seau d'une valeur."""
+    if valeur <= 0:
+        return SEAU_ZERO
+    return math.ceil(math.log(valeur) / _LOG_GAMMA)
+
+
+def valeur_du_seau(indice: int) -> float:
+    """Valeur représentative d'un seau (à moins de α de toute valeur du seau)."""
+    if indice == SEAU_ZERO:
+        return 0.0
+    return 2 * GAMMA**indice / (GAMMA + 1)
+
+
+def _utc(moment: datetime) -> datetime:
+    """Instant UTC avec fuseau (sans fuseau = UTC, comme en base)."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def duree_preparation(
+    created_at: datetime, ready_at: Optional[datetime]
+) -> Optional[float]:
+    """
+    Temps de préparation en secondes (None tant que la commande n'est pas prête).
+    """
+    if ready_at is None:
+        return None
+    return max((_utc(ready_at) - _utc(created_at)).total_seconds(), 0.0)
+
+
+def mesurer(order: Order, categories: Iterable[str] = ()) -> Mesure:
+    """
+    Mesure l'état courant d'une commande.
+
+    Args:
+        order (Order): Commande (created_at, total_amount, ready_at).
+        categories (Iterable): Catégories de ses produits (Category ou texte).
+
+    Returns:
+        Mesure: Valeurs versées dans les esquisses.
+    """
+    return Mesure(
+        jour_local(order.created_at),
+        order.total_amount,
+        duree_preparation(order.created_at, order.ready_at),
+        frozenset(map(_categorie, categories)),
+    )
+
+
+def _categorie(valeur) -> str:
+    """Valeur texte d'une catégorie lue en base."""
+    return Category(valeur).value
+
+
+def categories_des_produits(session: Session, product_ids: Iterable[int]) -> dict:
+    """
+    Catégorie de chaque produit, en une requête.
+
+    Args:
+        session (Session): Session de base de données.
+        product_ids (Iterable[int]): Identifiants des produits.
+
+    Returns:
+        dict[int, str]: Catégorie par identifiant.
+    """
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    rows = session.exec(
+        select(Product.id, Product.category).where(col(Product.id).in_(ids))
+    ).all()
+    return {pid: _categorie(categorie) for pid, categorie in rows}
+
+
+def _cles(mesure: Mesure):
+    """Seaux (jour, métrique, catégorie, seau) d'une mesure."""
+    for categorie in (TOUTES, *sorted(mesure.categories)):
+        yield mesure.day, "amount", categorie, seau(mesure.amount)
+        if mesure.prep_time is not None:
+            yield mesure.day, "prep_time", categorie, seau(mesure.prep_time)
+
+
+def _insert(session: Session):
+    """INSERT propre au dialecte (ON CONFLICT)."""
+    if session.get_bind().dialect.name == "postgresql":
+        return pg_insert(DailyQuantiles)
+    return sqlite_insert(DailyQuantiles)
+
+
+def cumuler_mesures(
+    session: Session, ecarts: Iterable[tuple[Optional[Mesure], Optional[Mesure]]]
+) -> None:
+    """
+    Applique des écarts (état avant, état après) en une requête (par
+    LIGNES_PAR_INSERT seaux).
+
+    Une création part de `None`, une suppression arrive à `None` ; les seaux
+    inchangés entre les deux états s'annulent.
+
+    Args:
+        session (Session): Session de base de données.
+        ecarts (Iterable[tuple[Mesure | None, Mesure | None]]): États des commandes.
+    """
+    comptes: Counter[tuple] = Counter()
+    for avant, apres in ecarts:
+        for mesure, signe in ((avant, -1), (apres, 1)):
+            if mesure is not None:
+                for cle in _cles(mesure):
+                    comptes[cle] += signe
+    # ordre stable des lignes verrouillées entre transactions concurrentes
+    lignes = [
+        {"day": d, "metric": m, "category": c, "bucket": b, "count": n}
+        for (d, m, c, b), n in sorted(comptes.items())
+        if n
+    ]
+    for i in range(0, len(lignes), LIGNES_PAR_INSERT):
+        stmt = _insert(session).values(lignes[i : i + LIGNES_PAR_INSERT])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "metric", "category", "bucket"],
+            set_={"count": DailyQuantiles.count + stmt.excluded.count},
+        )
+        session.execute(stmt)
+
+
+def cumuler_ecriture(
+    session: Session,
+    avant: Optional[Mesure],
+    apres: Optional[Mesure],
+    anciens: Iterable[int] = (),
+    nouveaux: Iterable[int] = (),
+) -> None:
+    """
+    Cumule l'écriture d'une commande ; les catégories sont lues d'après ses produits.
+
+    Args:
+        session (Session): Session de base de données.
+        avant (Mesure | None): État avant l'écriture (None pour une création).
+        apres (Mesure | None): État après l'écriture (None pour une suppression).
+        anciens (Iterable[int]): Produits avant l'écriture.
+        nouveaux (Iterable[int]): Produits après l'écriture.
+    """
+    anciens, nouveaux = set(anciens), set(nouveaux)
+    if avant == apres and anciens == nouveaux:
+        return
+    categories = categories_des_produits(session, anciens | nouveaux)
+    if avant is not None:
+        avant = avant._replace(categories=frozenset(categories[p] for p in anciens))
+    if apres is not None:
+        apres = apres._replace(categories=frozenset(categories[p] for p in nouveaux))
+    cumuler_mesures(session, [(avant, apres)])
+
+
+def cumuler_preparation(session: Session, row) -> None:
+    """
+    Ajoute le temps de préparation d'une commande qui vient d'être prête.
+
+    Args:
+        session (Session): Session de base de données.
+        row: Commande mise à jour (id, created_at, total_amount, ready_at).
+    """
+    rows = session.exec(
+        select(Product.category)
+        .join(OrderItem, col(OrderItem.product_id) == col(Product.id))
+        .join(
+            Order.metadata.tables["order"],
+            jointure_articles(Order.metadata.tables["order"]),
+        )
+        .where(col(Order.id) == row.id)
+        .distinct()
+    ).all()
+    apres = Mesure(
+        jour_local(row.created_at),
+        row.total_amount,
+        duree_preparation(row.created_at, row.ready_at),
+        frozenset(map(_categorie, rows)),
+    )
+    cumuler_mesures(session, [(apres._replace(prep_time=None), apres)])
+
+
+def _quantiles(seaux: np.ndarray, comptes: np.ndarray) -> tuple[int, list[float]]:
+    """Effectif et percentiles PERCENTILES de seaux triés."""
+    cumul = np.cumsum(comptes)
+    total = int(cumul[-1])
+    rangs = np.searchsorted(cumul, [q * (total - 1) for q in PERCENTILES], side="right")
+    return total, [round(valeur_du_seau(int(seaux[r])), 2) for r in rangs]
+
+
+def percentiles(
+    session: Session,
+    metrique: QuantileMetric,
+    debut: date,
+    fin: date,
+    categorie: Optional[Category] = None,
+    granularite: Optional[Granularity] = None,
+) -> list[Percentiles]:
+    """
+    Percentiles p50 / p95 / p99 d'une métrique sur [debut, fin), ou par période.
+
+    Args:
+        session (Session): Session de base de données.
+        metrique (QuantileMetric): "amount" ou "prep_time".
+        debut (date): Premier jour (fuseau du restaurant).
+        fin (date): Jour exclu.
+        categorie (Category | None): Commandes contenant cette catégorie.
+        granularite (Granularity | None): Découpage optionnel par période.
+
+    Raises:
+        HTTPException: 400 si debut >= fin.
+
+    Returns:
+        list[Percentiles]: Une entrée (period None) sans découpage, sinon une
+        par période ayant des commandes, triées.
+    """
+    if debut >= fin:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La date de début doit précéder la date de fin.",
+        )
+    cles: list[Any] = []
+    if granularite is not None:
+        cles.append(
+            tranche_jour(session, granularite, DailyQuantiles.day).label("period")
+        )
+    stmt = (
+        sa.select(*cles, col(DailyQuantiles.bucket), func.sum(DailyQuantiles.count))
+        .where(
+            col(DailyQuantiles.metric) == metrique,
+            col(DailyQuantiles.category)
+            == (_categorie(categorie) if categorie else TOUTES),
+            col(DailyQuantiles.day) >= debut,
+            col(DailyQuantiles.day) < fin,
+        )
+        .group_by(*cles, col(DailyQuantiles.bucket))
+        .having(func.sum(DailyQuantiles.count) > 0)
+        .order_by(*cles, col(DailyQuantiles.bucket))
+    )
+    par_periode = defaultdict(list)
+    for row in session.execute(stmt).all():
+        par_periode[row[0] if granularite is not None else None].append(row[-2:])
+
+    resultats = []
+    for periode, seaux in par_periode.items():
+        indices, comptes = np.array(seaux, dtype=np.int64).T
+        total, (p50, p95, p99) = _quantiles(indices, comptes)
+        resultats.append(
+            Percentiles(
+                period=periode,
+                metric=metrique,
+                category=categorie,
+                count=total,
+                p50=p50,
+                p95=p95,
+                p99=p99,
+            )
+        )
+    return resultats
+
+
+def reconstruire_quantiles(
+    session: Session, debut: Optional[date] = None, fin: Optional[date] = None
+) -> int:
+    """
+    Recalcule les esquisses des jours [debut, fin) depuis les commandes.
+
+    Args:
+        session (Session): Session de base de données.
+        debut (date | None): Premier jour (None = depuis le début).
+        fin (date | None): Jour exclu (None = jusqu'à aujourd'hui inclus).
+
+    Returns:
+        int: Nombre de commandes reprises.
+    """
+    efface = delete(DailyQuantiles)
+    if debut is not None:
+        efface = efface.where(col(DailyQuantiles.day) >= debut)
+    if fin is not None:
+        efface = efface.where(col(DailyQuantiles.day) < fin)
+    session.execute(efface)
+
+    stmt = filtrer_periode(
+        sa.select(
+            col(Order.id),
+            col(Order.created_at),
+            col(Order.total_amount),
+            col(Order.ready_at),
+            col(Product.category),
+        )
+        .outerjoin(OrderItem, jointure_articles(Order.metadata.tables["order"]))
+        .outerjoin(Product, col(Product.id) == col(OrderItem.product_id))
+        .distinct()
+        .order_by(col(Order.id)),
+        bornes_journee(debut)[0] if debut is not None else None,
+        bornes_journee(fin)[0] if fin is not None else None,
+    ).execution_options(yield_per=LOT_RECONSTRUCTION)
+
+    total, lot = 0, []
+    for _, groupe in groupby(session.execute(stmt), key=lambda row: row.id):
+        rows = list(groupe)
+        premiere = rows[0]
+        lot.append(
+            (
+                None,
+                Mesure(
+                    jour_local(premiere.created_at),
+                    premiere.total_amount,
+                    duree_preparation(premiere.created_at, premiere.ready_at),
+                    frozenset(_categorie(r.category) for r in rows if r.category),
+                ),
+            )
+        )
+        if len(lot) == LOT_RECONSTRUCTION:
+            cumuler_mesures(session, lot)
+            total, lot = total + len(lot), []
+    cumuler_mesures(session, lot)
+    session.commit()
+    return total + len(lot)
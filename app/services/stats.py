@@ -0,0 +1,318 @@
+"""
+Statistiques de ventes calculées par la base.
+
+Chaque statistique est une seule requête `GROUP BY` qui ne renvoie que les
+agrégats (une ligne par période ou par catégorie) ; aucune commande ni ligne
+de commande n'est chargée en Python.
+
+- La période est filtrée sur `order.created_at` nu (`filtrer_periode`) : un
+  parcours d'intervalle sur `ix_order_created_at_id` (et, sur des tables
+  partitionnées, les seules partitions concernées).
+- Les articles sont joints par la clé primaire de `orderitem` (order_id en
+  tête) et les produits par la leur ; le chiffre d'affaires d'une ligne
+  utilise le prix figé à la commande (prix actuel pour les lignes non reprises).
+- Les statistiques par catégorie lisent la table de cumul `dailysales`
+  (quelques lignes par jour, voir app/services/daily_sales.py) quand les
+  bornes tombent à minuit ; sinon, elles sont calculées sur les lignes de
+  commande. Dans le cumul, `orders` compte les commandes par produit : une
+  commande avec deux produits d'une même catégorie y compte deux fois.
+- Les périodes (jour, semaine commençant le lundi, mois) sont calculées dans
+  le fuseau du restaurant : `date_trunc` après conversion de fuseau sous
+  PostgreSQL ; sous SQLite (développement, tests), `date()` décalé de l'écart
+  UTC du fuseau au début de la période demandée.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import Date, and_, cast, func, literal_column
+from sqlmodel import Session, col, select
+
+from app.models import DailyCategoryOrders, DailySales, Order, OrderItem, Product
+from app.schemas.stats import Granularity, RevenueByCategory, RevenueByPeriod
+from app.services.order_read import RESTAURANT_TZ, filtrer_periode
+
+# modificateurs date() de SQLite ramenant un jour au début de sa période
+_SQLITE_PERIODES = {
+    "day": (),
+    "week": ("weekday 0", "-6 days"),
+    "month": ("start of month",),
+}
+
+
+def _litteral(valeur: str):
+    """
+    Chaîne SQL écrite en littéral : l'expression de période est alors
+    identique dans le SELECT et le GROUP BY, quel que soit le pilote.
+    """
+    return literal_column("'" + valeur.replace("'", "''") + "'")
+
+
+def _moyenne(revenue: float, orders: int) -> float:
+    """Ticket moyen arrondi au centime (0 sans commande)."""
+    return round(revenue / orders, 2) if orders else 0.0
+
+
+def tranche(
+    session: Session, granularite: Granularity, debut: Optional[datetime] = None
+):
+    """
+    Expression SQL du premier jour de la période de `order.created_at`.
+
+    Args:
+        session (Session): Session de base de données (choix du dialecte).
+        granularite (Granularity): "day", "week" ou "month".
+        debut (datetime | None): Début de la période demandée (écart UTC SQLite).
+
+    Returns:
+        ColumnElement: Date de début de période, dans le fuseau du restaurant.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        local = func.timezone(
+            _litteral(str(RESTAURANT_TZ)),
+            func.timezone(_litteral("UTC"), Order.created_at),
+        )
+        return cast(func.date_trunc(_litteral(granularite), local), Date)
+
+    reference = debut or datetime.now(timezone.utc)
+    if reference.tzinfo is None:
+        reference = reference.replace(tzinfo=RESTAURANT_TZ)
+    ecart = reference.astimezone(RESTAURANT_TZ).utcoffset() or timedelta(0)
+    minutes = int(ecart.total_seconds() // 60)
+    modificateurs = (f"{minutes:+d} minutes", *_SQLITE_PERIODES[granularite])
+    return func.date(Order.created_at, *map(_litteral, modificateurs))
+
+
+def tranche_jour(session: Session, granularite: Granularity, jour):
+    """
+    Expression SQL du premier jour de la période d'une colonne date (déjà locale).
+
+    Args:
+        session (Session): Session de base de données (choix du dialecte).
+        granularite (Granularity): "day", "week" ou "month".
+        jour (ColumnElement): Colonne de type date.
+
+    Returns:
+        ColumnElement: Date de début de période.
+    """
+    if granularite == "day":
+        return jour
+    if session.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc(_litteral(granularite), jour), Date)
+    return func.date(jour, *map(_litteral, _SQLITE_PERIODES[granularite]))
+
+
+def jours_entiers(
+    debut: Optional[datetime], fin: Optional[datetime]
+) -> Optional[tuple[Optional[date], Optional[date]]]:
+    """
+    Jours locaux [debut, fin) si chaque borne est absente ou tombe à minuit.
+
+    Args:
+        debut (datetime | None): Borne incluse.
+        fin (datetime | None): Borne exclue.
+
+    Returns:
+        tuple[date | None, date | None] | None: Jours, ou None si une borne
+        coupe une journée (le cumul quotidien ne peut pas servir).
+    """
+    jours: list[Optional[date]] = []
+    for borne in (debut, fin):
+        if borne is None:
+            jours.append(None)
+            continue
+        local = (
+            borne.replace(tzinfo=RESTAURANT_TZ)
+            if borne.tzinfo is None
+            else borne.astimezone(RESTAURANT_TZ)
+        )
+        if local.time() != time.min:
+            return None
+        jours.append(local.date())
+    return jours[0], jours[1]
+
+
+def chiffre_affaires_par_periode(
+    session: Session,
+    granularite: Granularity,
+    debut: Optional[datetime] = None,
+    fin: Optional[datetime] = None,
+) -> list[RevenueByPeriod]:
+    """
+    Chiffre d'affaires, nombre de commandes et ticket moyen par période.
+
+    Args:
+        session (Session): Session de base de données.
+        granularite (Granularity): "day", "week" ou "month".
+        debut (datetime | None): Borne incluse.
+        fin (datetime | None): Borne exclue.
+
+    Raises:
+        HTTPException: 400 si debut >= fin.
+
+    Returns:
+        list[RevenueByPeriod]: Une entrée par période ayant des commandes, triées.
+    """
+    periode = tranche(session, granularite, debut).label("period")
+    stmt = filtrer_periode(
+        select(
+            periode,
+            func.sum(Order.total_amount).label("revenue"),
+            func.count().label("orders"),
+        ),
+        debut,
+        fin,
+    )
+    rows = session.exec(stmt.group_by(periode).order_by(periode)).all()
+    return [
+        RevenueByPeriod(
+            period=row.period,
+            revenue=round(row.revenue, 2),
+            orders=row.orders,
+            average_ticket=_moyenne(row.revenue, row.orders),
+        )
+        for row in rows
+    ]
+
+
+def chiffre_affaires_par_categorie(
+    session: Session,
+    granularite: Optional[Granularity] = None,
+    debut: Optional[datetime] = None,
+    fin: Optional[datetime] = None,
+) -> list[RevenueByCategory]:
+    """
+    Chiffre d'affaires, quantités et commandes par catégorie de produits.
+
+    Lu dans le cumul quotidien si les bornes sont des minuits (ou absentes),
+    sinon calculé sur les lignes de commande.
+
+    Args:
+        session (Session): Session de base de données.
+        granularite (Granularity | None): Découpage optionnel par période.
+        debut (datetime | None): Borne incluse.
+        fin (datetime | None): Borne exclue.
+
+    Raises:
+        HTTPException: 400 si debut >= fin.
+
+    Returns:
+        list[RevenueByCategory]: Une entrée par (période,) catégorie, triées.
+    """
+    # contrôle des bornes (400 si inversées), commun aux deux lectures
+    filtrer_periode(select(Order.id), debut, fin)
+    jours = jours_entiers(debut, fin)
+    if jours is not None:
+        rows = _categories_cumul(session, granularite, *jours)
+    else:
+        rows = _categories_lignes(session, granularite, debut, fin)
+    return [
+        RevenueByCategory(
+            period=row.period if granularite is not None else None,
+            category=row.category,
+            revenue=round(row.revenue, 2),
+            quantity=row.quantity,
+            orders=row.orders,
+            average_ticket=_moyenne(row.revenue, row.orders),
+        )
+        for row in rows
+    ]
+
+
+def _categories_cumul(
+    session: Session,
+    granularite: Optional[Granularity],
+    debut: Optional[date],
+    fin: Optional[date],
+):
+    """
+    Agrégats par catégorie lus dans les cumuls quotidiens, en une requête.
+
+    Chiffre d'affaires et quantités viennent de `dailysales` (jour × produit).
+    Le nombre de commandes n'y est connu que par produit (une commande de deux
+    plats compterait deux fois) : il est lu dans `dailycategoryorders`, qui
+    compte chaque commande une fois dans chaque catégorie de ses produits,
+    comme `count(distinct order.id)` sur les lignes.
+    """
+    ventes = _par_jour_et_categorie(
+        session,
+        granularite,
+        DailySales.day,
+        DailySales.category,
+        [
+            func.sum(DailySales.revenue).label("revenue"),
+            func.sum(DailySales.quantity).label("quantity"),
+        ],
+        debut,
+        fin,
+    )
+    ventes = ventes.having(func.sum(DailySales.orders) > 0).subquery()
+    commandes = _par_jour_et_categorie(
+        session,
+        granularite,
+        DailyCategoryOrders.day,
+        DailyCategoryOrders.category,
+        [func.sum(DailyCategoryOrders.orders).label("orders")],
+        debut,
+        fin,
+    ).subquery()
+    jointure = ventes.c.category == commandes.c.category
+    cles = [ventes.c.category]
+    if granularite is not None:
+        jointure = and_(jointure, ventes.c.period == commandes.c.period)
+        cles.insert(0, ventes.c.period)
+    stmt = sa.select(
+        *cles,
+        ventes.c.revenue,
+        ventes.c.quantity,
+        func.coalesce(commandes.c.orders, 0).label("orders"),
+    ).outerjoin(commandes, jointure)
+    return session.execute(stmt.order_by(*cles)).all()
+
+
+def _par_jour_et_categorie(
+    session: Session,
+    granularite: Optional[Granularity],
+    jour,
+    categorie,
+    agregats: list,
+    debut: Optional[date],
+    fin: Optional[date],
+):
+    """Agrégats d'une table de cumul quotidien par (période,) catégorie."""
+    cles = [categorie.label("category")]
+    if granularite is not None:
+        cles.insert(0, tranche_jour(session, granularite, jour).label("period"))
+    stmt = sa.select(*cles, *agregats)
+    if debut is not None:
+        stmt = stmt.where(jour >= debut)
+    if fin is not None:
+        stmt = stmt.where(jour < fin)
+    return stmt.group_by(*cles)
+
+
+def _categories_lignes(
+    session: Session,
+    granularite: Optional[Granularity],
+    debut: Optional[datetime],
+    fin: Optional[datetime],
+):
+    """Agrégats par catégorie calculés sur les lignes de commande."""
+    prix = func.coalesce(OrderItem.unit_price, Product.unit_price)
+    cles: list[Any] = [Product.category]
+    if granularite is not None:
+        cles.insert(0, tranche(session, granularite, debut).label("period"))
+    stmt = filtrer_periode(
+        sa.select(
+            *cles,
+            func.sum(OrderItem.quantity * prix).label("revenue"),
+            func.sum(OrderItem.quantity).label("quantity"),
+            func.count(func.distinct(Order.id)).label("orders"),
+        )
+        .join(OrderItem, col(OrderItem.order_id) == Order.id)
+        .join(Product, col(Product.id) == OrderItem.product_id),
+        debut,
+        fin,
+    )
+    return session.execute(stmt.group_by(*cles).order_by(*cles)).all()
@@ -0,0 +1,137 @@
+"""
+Benchmark : suggestions de réapprovisionnement sur des milliers de produits.
+
+Remplit une base SQLite en mémoire de NB_PRODUITS produits et de leurs ventes
+sur FORECAST_HISTORY_DAYS jours (COMMANDES_PAR_JOUR commandes par jour, chaque
+produit vendu dans l'une d'elles), puis chronomètre
+app.services.forecast.suggestions_reapprovisionnement (deux requêtes, prévisions
+NumPy de tous les produits d'un coup) pour chaque méthode.
+
+Usage :
+    python -m benchmarks.bench_forecast [nb_produits]
+"""
+
+import random
+import sys
+import time
+from datetime import date, datetime, time as heure, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.enumerations import Category, Status
+from app.models import Order, OrderItem, Product, User
+from app.schemas.product import ForecastMethod
+from app.services.forecast import (
+    FORECAST_HISTORY_DAYS,
+    suggestions_reapprovisionnement,
+)
+
+NB_PRODUITS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+JOUR = date(2025, 10, 6)
+COMMANDES_PAR_JOUR = 50
+REPETITIONS = 3
+
+
+def remplir(session: Session) -> None:
+    """
+    Insère un utilisateur, NB_PRODUITS produits et leurs lignes de commande
+    quotidiennes (un jour sur dix sans vente).
+    """
+    random.seed(0)
+    now = datetime.now(timezone.utc)
+    session.add(
+        User(
+            id=1,
+            first_name="Bench",
+            last_name="Bench",
+            email="bench@example.com",
+            role="client",
+            password_hashed="x",
+        )
+    )
+    session.execute(
+        insert(Product),
+        [
+            {
+                "id": i,
+                "name": f"Produit {i}",
+                "unit_price": 5.0,
+                "category": Category.PLAT_PRINCIPAL,
+                "stock": random.randint(0, 200),
+                "created_at": now,
+            }
+            for i in range(1, NB_PRODUITS + 1)
+        ],
+    )
+    commandes = [
+        {
+            "id": d * COMMANDES_PAR_JOUR + c + 1,
+            "user_id": 1,
+            "total_amount": 0,
+            "status": Status.SERVIE,
+            "created_at": datetime.combine(
+                JOUR - timedelta(days=d + 1),
+                heure(11, c),
+                tzinfo=timezone.utc,
+            ),
+        }
+        for d in range(FORECAST_HISTORY_DAYS)
+        for c in range(COMMANDES_PAR_JOUR)
+    ]
+    session.execute(insert(Order), commandes)
+    session.execute(
+        insert(OrderItem),
+        [
+            {
+                "order_id": commande["id"],
+                "product_id": i,
+                "quantity": random.randint(1, 30),
+                "unit_price": 5.0,
+                "product_name": f"Produit {i}",
+                "created_at": commande["created_at"],
+            }
+            for i in range(1, NB_PRODUITS + 1)
+            for d in range(FORECAST_HISTORY_DAYS)
+            if random.random() > 0.1
+            for commande in [
+                commandes[d * COMMANDES_PAR_JOUR + random.randrange(COMMANDES_PAR_JOUR)]
+            ]
+        ],
+    )
+    session.commit()
+
+
+def chronometrer(engine, methode: ForecastMethod) -> tuple[float, int]:
+    """Meilleur temps (s) sur REPETITIONS calculs et nombre de suggestions."""
+    meilleur = float("inf")
+    for _ in range(REPETITIONS):
+        with Session(engine) as session:
+            debut = time.perf_counter()
+            result = suggestions_reapprovisionnement(session, methode, jour=JOUR)
+            meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, len(result)
+
+
+def main() -> None:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        remplir(session)
+
+    print(
+        f"{NB_PRODUITS} produits x {FORECAST_HISTORY_DAYS} jours (lignes de commande)"
+    )
+    methodes: tuple[ForecastMethod, ...] = ("moving_average", "exponential")
+    for methode in methodes:
+        duree, nb = chronometrer(engine, methode)
+        print(f"  {methode:15s}: {duree * 1000:8.1f} ms ({nb} suggestions)")
+
+
+if __name__ == "__main__":
+    main()
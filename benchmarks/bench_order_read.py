@@ -0,0 +1,164 @@
+"""
+Benchmark : lecture de commandes via ORM vs projection en colonnes.
+
+Compare, sur une base SQLite en mémoire de 10 000 commandes (3 articles chacune),
+l'ancien chemin de lecture (objets ORM + selectinload + model_validate) au chemin
+partagé de app.services.order_read (une requête jointe, assemblage depuis les tuples).
+
+Usage :
+    python -m benchmarks.bench_order_read [nb_commandes]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.enumerations import Category, Status
+from app.models import Order, OrderItem, Product, User
+from app.schemas.order import OrderItemInOrderRead, OrderReadWithItems
+from app.services.order_read import COLONNES_ARTICLE, assembler, select_commandes
+
+NB_COMMANDES = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+NB_PRODUITS = 50
+ARTICLES_PAR_COMMANDE = 3
+REPETITIONS = 3
+
+
+def remplir(session: Session) -> None:
+    """
+    Insère un utilisateur, NB_PRODUITS produits et NB_COMMANDES commandes.
+    """
+    random.seed(0)
+    now = datetime.now(timezone.utc)
+    session.add(
+        User(
+            id=1,
+            first_name="Bench",
+            last_name="Bench",
+            email="bench@example.com",
+            role="client",
+            password_hashed="x",
+        )
+    )
+    session.execute(
+        insert(Product),
+        [
+            {
+                "id": i,
+                "name": f"Produit {i}",
+                "unit_price": 5.0 + i,
+                "category": Category.PLAT_PRINCIPAL,
+                "stock": 1000,
+                "created_at": now,
+            }
+            for i in range(1, NB_PRODUITS + 1)
+        ],
+    )
+    session.execute(
+        insert(Order),
+        [
+            {
+                "id": i,
+                "user_id": 1,
+                "total_amount": 42.0,
+                "status": Status.SERVIE,
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(1, NB_COMMANDES + 1)
+        ],
+    )
+    session.execute(
+        insert(OrderItem),
+        [
+            {
+                "order_id": i,
+                "product_id": pid,
+                "quantity": 1,
+                "unit_price": 2.5,
+                "product_name": f"Produit {pid}",
+                "created_at": now,
+            }
+            for i in range(1, NB_COMMANDES + 1)
+            for pid in random.sample(range(1, NB_PRODUITS + 1), ARTICLES_PAR_COMMANDE)
+        ],
+    )
+    session.commit()
+
+
+def lecture_orm(session: Session) -> list[OrderReadWithItems]:
+    """Ancien chemin : objets ORM hydratés puis convertis un par un."""
+    rows = session.exec(
+        select(Order).options(
+            # relations SQLModel non typées comme attributs ORM
+            selectinload(Order.order_items).selectinload(  # type: ignore[arg-type]
+                OrderItem.product  # type: ignore[arg-type]
+            )
+        )
+    ).all()
+    result = []
+    for c in rows:
+        dto = OrderReadWithItems.model_validate(c, from_attributes=True)
+        dto.items = [
+            OrderItemInOrderRead(
+                product_id=oi.product_id,
+                quantity=oi.quantity,
+                unit_price=produit.unit_price,
+                product_name=produit.name,
+            )
+            for oi in c.order_items
+            if (produit := oi.product) is not None
+        ]
+        result.append(dto)
+    return result
+
+
+def lecture_projection(session: Session) -> list[OrderReadWithItems]:
+    """Nouveau chemin : une requête jointe, assemblage depuis les tuples."""
+    commandes = select_commandes().subquery()
+    rows = session.execute(
+        sa.select(commandes, *COLONNES_ARTICLE).outerjoin(
+            OrderItem, OrderItem.order_id == commandes.c.id
+        )
+    ).all()
+    return assembler(rows)
+
+
+def chronometrer(engine, lecture) -> float:
+    """Meilleur temps (s) sur REPETITIONS lectures, chacune dans une session neuve."""
+    meilleur = float("inf")
+    for _ in range(REPETITIONS):
+        with Session(engine) as session:
+            debut = time.perf_counter()
+            result = lecture(session)
+            meilleur = min(meilleur, time.perf_counter() - debut)
+    assert len(result) == NB_COMMANDES
+    return meilleur
+
+
+def main() -> None:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        remplir(session)
+
+    orm = chronometrer(engine, lecture_orm)
+    projection = chronometrer(engine, lecture_projection)
+    print(f"{NB_COMMANDES} commandes x {ARTICLES_PAR_COMMANDE} articles")
+    print(f"  ORM + selectinload : {orm * 1000:8.1f} ms")
+    print(f"  projection         : {projection * 1000:8.1f} ms")
+    print(f"  accélération       : x{orm / projection:.1f}")
+
+
+if __name__ == "__main__":
+    main()
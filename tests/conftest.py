@@ -1,9 +1,13 @@
+import os
+
 import pytest
 from dotenv import load_dotenv
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine
 
 load_dotenv()
+# classement des meilleures ventes : pas de préchauffage sur la base de `engine`
+os.environ["BESTSELLERS_WARMUP"] = "false"
 from app.db import get_session
 from app.enumerations import Category, Role
 from app.main import app
@@ -17,6 +21,24 @@ engine = create_engine(
 # Connection partagée
 connection = engine.connect()
 SQLModel.metadata.create_all(connection)
+# valide le schéma : sinon les sessions rejoignent cette transaction et un
+# rollback applicatif (transition refusée, stock insuffisant...) efface aussi
+# les tables et les données des fixtures, selon l'ordre des tests
+connection.commit()
+
+# base PostgreSQL jetable pour les tests qui dépendent de ses verrous de ligne ou
+# de son partitionnement ; ignorés si la variable n'est pas définie
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def pytest_configure(config):
+    """
+    Déclare le marqueur des tests PostgreSQL (`pytest -m postgres`).
+    """
+    config.addinivalue_line(
+        "markers", "postgres: test sur une vraie base PostgreSQL (TEST_POSTGRES_URL)"
+    )
+
 
 @pytest.fixture(name="session")
 def fixture_session():
@@ -241,3 +263,23 @@ def clean_db(session):
     for table in reversed(SQLModel.metadata.sorted_tables):
         session.execute(table.delete())
     session.commit()
+
+
+@pytest.fixture
+def engine_postgres():
+    """
+    Fournit un engine sur la base PostgreSQL de test, schéma recréé à vide.
+
+    Le test est ignoré si TEST_POSTGRES_URL n'est pas défini.
+
+    Yield :
+        - L'engine PostgreSQL.
+    """
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL non défini")
+    engine_pg = create_engine(TEST_POSTGRES_URL)
+    SQLModel.metadata.drop_all(engine_pg)
+    SQLModel.metadata.create_all(engine_pg)
+    yield engine_pg
+    SQLModel.metadata.drop_all(engine_pg)
+    engine_pg.dispose()
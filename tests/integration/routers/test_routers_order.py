@@ -1,6 +1,9 @@
+import json
+
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlmodel import select
 
 # LISTER LES COMMANDES
 def test_lister_les_commandes_employee(
@@ -15,11 +18,12 @@ def test_lister_les_commandes_employee(
 
     Asserts:
         - Statut HTTP 200 OK.
-        - La réponse est une liste.
+        - La réponse est une page : liste de commandes et curseur suivant.
     """
     resp = client.get("/orders/")
     assert resp.status_code == status.HTTP_200_OK
-    assert isinstance(resp.json(), list)
+    assert isinstance(resp.json()["items"], list)
+    assert resp.json()["next_cursor"] is None
 
 
 def test_lister_les_commandes_client(client: TestClient, override_get_current_client):
@@ -275,3 +279,757 @@ def test_admin_peut_supprimer_commande(
         status.HTTP_200_OK,
         status.HTTP_204_NO_CONTENT,
     ), deleted.text
+
+
+# PIPELINE DE CRÉATION
+def _creer_produits(session, n, prix=2.5):
+    """
+    Crée n produits de test et retourne leurs IDs.
+    """
+    from app.enumerations import Category
+    from app.models import Product
+
+    produits = [
+        Product(
+            name=f"Produit {i}",
+            unit_price=prix,
+            category=Category.SNACK,
+            description="Produit de test",
+            stock=100,
+        )
+        for i in range(n)
+    ]
+    session.add_all(produits)
+    session.commit()
+    return [p.id for p in produits]
+
+
+def test_creer_commande_multi_produits_sans_n_plus_un(
+    client: TestClient, session, client_user, override_get_current_admin
+):
+    """
+    Vérifie qu'une commande de 20 lignes est tarifée sans requête par produit.
+
+    Asserts:
+        - Statut HTTP 201 et total correct (quantités consolidées).
+        - Aucun motif N+1 détecté et un nombre de statements constant.
+    """
+    from app.instrumentation import sql_metrics
+
+    ids = _creer_produits(session, 20)
+    items = [{"product_id": pid, "quantity": 1} for pid in ids]
+    items.append({"product_id": ids[0], "quantity": 2})
+
+    sql_metrics.reset()
+    resp = client.post("/orders/", json={"user_id": client_user.id, "items": items})
+    assert resp.status_code == status.HTTP_201_CREATED, resp.text
+    body = resp.json()
+    assert body["total_amount"] == 55.0
+    assert len(body["items"]) == 20
+    assert body["items"][0] == {
+        "product_id": ids[0],
+        "quantity": 3,
+        "unit_price": 2.5,
+        "product_name": "Produit 0",
+    }
+
+    metrics = sql_metrics.snapshot()["POST /orders/"]
+    assert metrics["n_plus_one"] == 0
+    # dont deux requêtes de cumul quotidien (produits, catégories), une
+    # d'esquisses de percentiles et une de clients distincts, quel que soit
+    # le nombre de produits
+    assert metrics["statements"] <= 9
+
+
+def test_creer_commande_produits_introuvables_en_bloc(
+    client: TestClient, produit, override_get_current_client
+):
+    """
+    Vérifie que tous les produits introuvables sont signalés en une fois.
+    """
+    payload = {
+        "items": [
+            {"product_id": produit.id, "quantity": 1},
+            {"product_id": 9998, "quantity": 1},
+            {"product_id": 9999, "quantity": 1},
+        ]
+    }
+    resp = client.post("/orders/", json=payload)
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
+    assert resp.json()["detail"] == "Produits 9998, 9999 introuvables"
+
+
+def test_patch_commande_remplace_les_articles(
+    client: TestClient, session, client_user, produit, override_get_current_employee
+):
+    """
+    Vérifie que le patch des articles remplace les lignes et recalcule le total.
+    """
+    autre_id = _creer_produits(session, 1, prix=4.0)[0]
+    created = client.post(
+        "/orders/",
+        json={
+            "user_id": client_user.id,
+            "items": [{"product_id": produit.id, "quantity": 2}],
+        },
+    )
+    order_id = created.json()["id"]
+
+    patched = client.patch(
+        f"/orders/{order_id}",
+        json={"items": [{"product_id": autre_id, "quantity": 3}], "status": "Prete"},
+    )
+    assert patched.status_code == status.HTTP_200_OK, patched.text
+    body = patched.json()
+    assert body["total_amount"] == 12.0
+    assert body["status"] == "Prete"
+    attendu = [
+        {"product_id": autre_id, "quantity": 3, "unit_price": 4.0, "product_name": "Produit 0"}
+    ]
+    assert body["items"] == attendu
+
+    got = client.get(f"/orders/{order_id}")
+    assert got.json()["items"] == attendu
+
+
+def test_patch_commande_n_ecrit_que_l_ecart(
+    client: TestClient, session, client_user, employee_user, override_get_current_employee
+):
+    """
+    Vérifie que le patch d'une grosse commande n'écrit que les lignes modifiées.
+
+    Asserts:
+        - Une quantité modifiée sur 20 lignes : nombre de statements constant.
+        - Ajout, retrait et modification combinés : lignes et total corrects.
+    """
+    from app.instrumentation import sql_metrics
+
+    ids = _creer_produits(session, 22)
+    items = [{"product_id": pid, "quantity": 1} for pid in ids[:20]]
+    order_id = client.post(
+        "/orders/", json={"user_id": client_user.id, "items": items}
+    ).json()["id"]
+
+    items[0] = {"product_id": ids[0], "quantity": 4}
+    session.refresh(employee_user)
+    sql_metrics.reset()
+    patched = client.patch(f"/orders/{order_id}", json={"items": items})
+    assert patched.status_code == status.HTTP_200_OK, patched.text
+    assert patched.json()["total_amount"] == 57.5
+    metrics = sql_metrics.snapshot()["PATCH /orders/{order_id}"]
+    # commande, lignes existantes, UPDATE ligne, cumul, catégories, esquisses,
+    # UPDATE commande, UPDATE stock
+    assert metrics["statements"] <= 8
+
+    items = items[1:19] + [
+        {"product_id": ids[19], "quantity": 2},
+        {"product_id": ids[20], "quantity": 1},
+        {"product_id": ids[21], "quantity": 3},
+    ]
+    patched = client.patch(f"/orders/{order_id}", json={"items": items})
+    assert patched.status_code == status.HTTP_200_OK, patched.text
+    assert patched.json()["total_amount"] == 60.0
+
+    got = client.get(f"/orders/{order_id}").json()
+    assert sorted((i["product_id"], i["quantity"]) for i in got["items"]) == sorted(
+        (i["product_id"], i["quantity"]) for i in items
+    )
+
+
+# RÉSERVATION DU STOCK
+def test_creer_commande_reserve_le_stock(
+    client: TestClient, session, produit, override_get_current_client
+):
+    """
+    Vérifie que la création décrémente le stock du produit commandé.
+    """
+    resp = client.post(
+        "/orders/", json={"items": [{"product_id": produit.id, "quantity": 3}]}
+    )
+    assert resp.status_code == status.HTTP_201_CREATED, resp.text
+    session.refresh(produit)
+    assert produit.stock == 97
+
+
+def test_creer_commande_stock_insuffisant_409(
+    client: TestClient, session, produit, override_get_current_client
+):
+    """
+    Vérifie qu'une rupture renvoie 409 avec le détail des produits manquants
+    et que rien n'est réservé ni créé.
+    """
+    autre_id = _creer_produits(session, 1)[0]
+    resp = client.post(
+        "/orders/",
+        json={
+            "items": [
+                {"product_id": autre_id, "quantity": 1},
+                {"product_id": produit.id, "quantity": 101},
+            ]
+        },
+    )
+    assert resp.status_code == status.HTTP_409_CONFLICT, resp.text
+    detail = resp.json()["detail"]
+    assert detail["products"] == [
+        {
+            "product_id": produit.id,
+            "product_name": "Produit Test",
+            "requested": 101,
+            "available": 100,
+        }
+    ]
+
+    from app.models import Order, Product
+
+    assert session.get(Product, autre_id).stock == 100
+    assert session.exec(select(Order)).all() == []
+
+
+def test_patch_commande_ajuste_le_stock(
+    client: TestClient, session, client_user, produit, override_get_current_employee
+):
+    """
+    Vérifie que le patch ne réserve que l'écart de quantité (et rend le surplus).
+    """
+    created = client.post(
+        "/orders/",
+        json={
+            "user_id": client_user.id,
+            "items": [{"product_id": produit.id, "quantity": 5}],
+        },
+    )
+    order_id = created.json()["id"]
+
+    client.patch(
+        f"/orders/{order_id}", json={"items": [{"product_id": produit.id, "quantity": 8}]}
+    )
+    session.refresh(produit)
+    assert produit.stock == 92
+
+    client.patch(
+        f"/orders/{order_id}", json={"items": [{"product_id": produit.id, "quantity": 2}]}
+    )
+    session.refresh(produit)
+    assert produit.stock == 98
+
+
+def test_supprimer_commande_rend_le_stock(
+    client: TestClient, session, client_user, produit, override_get_current_employee
+):
+    """
+    Vérifie que la suppression d'une commande rend son stock réservé.
+    """
+    created = client.post(
+        "/orders/",
+        json={
+            "user_id": client_user.id,
+            "items": [{"product_id": produit.id, "quantity": 4}],
+        },
+    )
+    session.refresh(produit)
+    assert produit.stock == 96
+
+    deleted = client.delete(f"/orders/{created.json()['id']}")
+    assert deleted.status_code == status.HTTP_204_NO_CONTENT
+    session.refresh(produit)
+    assert produit.stock == 100
+
+
+# PAGINATION PAR CURSEUR
+def test_lister_les_commandes_pagination_keyset(
+    client: TestClient, client_user, produit, override_get_current_admin
+):
+    """
+    Vérifie le parcours complet des commandes page par page.
+
+    Asserts:
+        - Les pages sont triées de la plus récente à la plus ancienne.
+        - Chaque commande apparaît exactement une fois.
+        - La dernière page n'a pas de curseur suivant.
+    """
+    ids = [
+        client.post(
+            "/orders/",
+            json={
+                "user_id": client_user.id,
+                "items": [{"product_id": produit.id, "quantity": 1}],
+            },
+        ).json()["id"]
+        for _ in range(5)
+    ]
+
+    vus, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/orders/", params=params).json()
+        vus.extend(order["id"] for order in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert vus == sorted(ids, reverse=True)
+
+    par_user = client.get(f"/orders/user/{client_user.id}", params={"limit": 3}).json()
+    assert [o["id"] for o in par_user["items"]] == sorted(ids, reverse=True)[:3]
+    assert par_user["next_cursor"] is not None
+
+
+def test_lister_les_commandes_curseur_invalide(
+    client: TestClient, override_get_current_admin
+):
+    """
+    Vérifie qu'un curseur invalide renvoie 400 et qu'une limite trop grande est refusée.
+    """
+    assert client.get("/orders/", params={"cursor": "pas-un-curseur"}).status_code == 400
+    assert client.get("/orders/", params={"limit": 10_000}).status_code == 422
+
+
+# COMMANDES PAR DATE / PÉRIODE
+def test_lire_commandes_par_date_et_periode(
+    client: TestClient, client_user, produit, override_get_current_admin
+):
+    """
+    Vérifie le filtre par journée et par période semi-ouverte [from, to).
+
+    Asserts:
+        - La commande du jour est trouvée par date et par période l'englobant.
+        - Une période qui se termine avant la commande ne la renvoie pas.
+    """
+    from datetime import datetime, timedelta, timezone
+
+    created = client.post(
+        "/orders/",
+        json={
+            "user_id": client_user.id,
+            "items": [{"product_id": produit.id, "quantity": 1}],
+        },
+    )
+    order_id = created.json()["id"]
+    now = datetime.now(timezone.utc)
+
+    par_jour = client.get("/orders/by-date", params={"date": now.date().isoformat()})
+    assert par_jour.status_code == status.HTTP_200_OK, par_jour.text
+    assert [o["id"] for o in par_jour.json()["items"]] == [order_id]
+
+    periode = {
+        "from": (now - timedelta(hours=1)).isoformat(),
+        "to": (now + timedelta(hours=1)).isoformat(),
+    }
+    assert [o["id"] for o in client.get("/orders/by-date", params=periode).json()["items"]] == [order_id]
+
+    avant = {"to": (now - timedelta(hours=1)).isoformat()}
+    assert client.get("/orders/by-date", params=avant).json()["items"] == []
+
+
+def test_lire_commandes_par_date_parametres_invalides(
+    client: TestClient, override_get_current_admin
+):
+    """
+    Vérifie les erreurs 400 : aucun filtre, date et période mêlées, période inversée.
+    """
+    assert client.get("/orders/by-date").status_code == 400
+    mixte = {"date": "2025-08-20", "from": "2025-08-20T10:00:00+02:00"}
+    assert client.get("/orders/by-date", params=mixte).status_code == 400
+    inversee = {"from": "2025-08-21T00:00:00Z", "to": "2025-08-20T00:00:00Z"}
+    assert client.get("/orders/by-date", params=inversee).status_code == 400
+
+
+def test_exporter_les_commandes_ndjson_et_csv(
+    client: TestClient, session, client_user, override_get_current_admin, monkeypatch
+):
+    """
+    Vérifie l'export en flux, avec des paquets plus petits qu'une commande.
+
+    Asserts:
+        - NDJSON : une commande par ligne, articles regroupés, ordre chronologique.
+        - CSV : en-tête puis une ligne par article.
+    """
+    from app.services import order_export
+
+    monkeypatch.setattr(order_export, "EXPORT_CHUNK_SIZE", 2)
+    ids = _creer_produits(session, 3)
+    commandes = [
+        client.post(
+            "/orders/",
+            json={
+                "user_id": client_user.id,
+                "items": [{"product_id": pid, "quantity": 1} for pid in ids[:n]],
+            },
+        ).json()["id"]
+        for n in (3, 1, 2)
+    ]
+
+    resp = client.get("/orders/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lignes = [json.loads(ligne) for ligne in resp.text.splitlines()]
+    assert [o["id"] for o in lignes] == commandes
+    assert [len(o["items"]) for o in lignes] == [3, 1, 2]
+    assert lignes[0]["total_amount"] == 7.5
+
+    resp = client.get("/orders/export", params={"format": "csv"})
+    assert resp.status_code == 200
+    rows = resp.text.splitlines()
+    assert rows[0] == (
+        "order_id,user_id,status,created_at,total_amount,"
+        "product_id,quantity,unit_price,product_name"
+    )
+    assert len(rows) == 1 + 6
+
+
+def test_exporter_les_commandes_client_interdit(
+    client: TestClient, override_get_current_client
+):
+    """
+    Cas invalide : un client ne peut pas exporter les commandes.
+    """
+    resp = client.get("/orders/export")
+    assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_creer_des_commandes_par_lot_echecs_partiels(
+    client: TestClient, session, client_user, override_get_current_employee
+):
+    """
+    Vérifie la création d'un lot avec des commandes refusées.
+
+    Asserts:
+        - Les commandes valides sont créées, les autres portent leur motif.
+        - Le stock est décompté dans l'ordre du lot (la 3e commande dépasse).
+        - Le nombre de statements ne dépend pas de la taille du lot.
+    """
+    from app.instrumentation import sql_metrics
+    from app.models import Product
+
+    ids = _creer_produits(session, 2)
+    bon = {"user_id": client_user.id, "items": [{"product_id": ids[0], "quantity": 40}]}
+    orders = [
+        bon,
+        {"user_id": 9999, "items": [{"product_id": ids[0], "quantity": 1}]},
+        {"user_id": client_user.id, "items": [{"product_id": ids[0], "quantity": 70}]},
+        {"user_id": client_user.id, "items": [{"product_id": 9999, "quantity": 1}]},
+        {"items": [{"product_id": ids[1], "quantity": 1}]},
+    ] + [
+        {"user_id": client_user.id, "items": [{"product_id": ids[1], "quantity": 1}]}
+        for _ in range(20)
+    ] + [bon]
+
+    sql_metrics.reset()
+    resp = client.post("/orders/batch", json={"orders": orders})
+    assert resp.status_code == status.HTTP_200_OK, resp.text
+    body = resp.json()
+    assert body["created"] == 22
+    assert body["failed"] == 4
+    codes = [r["status_code"] for r in body["results"]]
+    assert codes[:5] == [201, 404, 409, 404, 400]
+    assert codes[5:] == [201] * 21
+    assert body["results"][2]["detail"]["products"][0]["available"] == 60
+    assert body["results"][0]["order"]["total_amount"] == 100.0
+
+    metrics = sql_metrics.snapshot()["POST /orders/batch"]
+    if session.get_bind().dialect.name == "sqlite":
+        # sans sentinelle, l'INSERT ordonné des commandes (RETURNING dans
+        # l'ordre du lot) est exécuté ligne à ligne ; le reste ne bouge pas
+        assert metrics["statements"] <= 9 + body["created"]
+    else:
+        assert metrics["n_plus_one"] == 0
+        assert metrics["statements"] <= 10
+
+    session.expire_all()
+    assert session.get(Product, ids[0]).stock == 20
+    assert session.get(Product, ids[1]).stock == 80
+
+
+def test_creer_des_commandes_par_lot_garde_l_heure_de_saisie(
+    client: TestClient, session, client_user, override_get_current_employee
+):
+    """
+    Vérifie que l'heure de saisie envoyée par la caisse est conservée.
+
+    Asserts:
+        - Chaque commande reçoit son identifiant et son heure, dans l'ordre du lot.
+        - Une heure avec fuseau est ramenée en UTC ; sans heure, la réception.
+    """
+    from app.models import Order
+
+    ids = _creer_produits(session, 1)
+    items = [{"product_id": ids[0], "quantity": 1}]
+    heures = ["2031-03-10T12:30:00+02:00", "2031-03-10T09:00:00", None]
+    orders = [
+        {"user_id": client_user.id, "items": items, "created_at": heure}
+        for heure in heures
+    ]
+
+    resp = client.post("/orders/batch", json={"orders": orders})
+    assert resp.status_code == status.HTTP_200_OK, resp.text
+    creees = [r["order"] for r in resp.json()["results"]]
+    assert creees[0]["created_at"].startswith("2031-03-10T10:30:00")
+    assert creees[1]["created_at"].startswith("2031-03-10T09:00:00")
+    assert not creees[2]["created_at"].startswith("2031-")
+
+    session.expire_all()
+    for commande in creees:
+        order = session.get(Order, commande["id"])
+        assert order.created_at.isoformat()[:19] == commande["created_at"][:19]
+
+
+def test_creer_des_commandes_par_lot_client_interdit(
+    client: TestClient, client_user, override_get_current_client
+):
+    """
+    Cas invalide : un client ne peut pas envoyer de lot.
+    """
+    resp = client.post(
+        "/orders/batch",
+        json={"orders": [{"items": [{"product_id": 1, "quantity": 1}]}]},
+    )
+    assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_creer_commande_idempotency_key(
+    client: TestClient, session, client_user, produit, override_get_current_client
+):
+    """
+    Vérifie qu'une création rejouée avec la même Idempotency-Key n'est pas refaite.
+
+    Asserts:
+        - Le rejeu renvoie la même commande (201) sans requête SQL (cache).
+        - Après vidage du cache, la réponse est relue depuis la table.
+        - Le stock n'est réservé qu'une fois ; un autre corps avec la clé → 422.
+    """
+    from app.instrumentation import sql_metrics
+    from app.models import Order, Product
+    from app.services import idempotency
+
+    idempotency.cache.clear()
+    payload = {"items": [{"product_id": produit.id, "quantity": 2}]}
+    headers = {"Idempotency-Key": "caisse-1-0001"}
+
+    premiere = client.post("/orders/", json=payload, headers=headers)
+    assert premiere.status_code == status.HTTP_201_CREATED, premiere.text
+    assert premiere.json()["user_id"] == client_user.id
+
+    sql_metrics.reset()
+    rejeu = client.post("/orders/", json=payload, headers=headers)
+    assert rejeu.status_code == status.HTTP_201_CREATED
+    assert rejeu.headers["Idempotent-Replayed"] == "true"
+    assert rejeu.json() == premiere.json()
+    assert sql_metrics.snapshot()["POST /orders/"]["statements"] == 0
+
+    idempotency.cache.clear()
+    rejeu = client.post("/orders/", json=payload, headers=headers)
+    assert rejeu.json()["id"] == premiere.json()["id"]
+
+    assert len(session.exec(select(Order)).all()) == 1
+    session.expire_all()
+    assert session.get(Product, produit.id).stock == 98
+
+    autre = {"items": [{"product_id": produit.id, "quantity": 3}]}
+    resp = client.post("/orders/", json=autre, headers=headers)
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+# STATUT ET FILE DE LA CUISINE
+def test_changer_le_statut_transitions(
+    client: TestClient, client_user, employee_user, produit, session, override_get_current_employee
+):
+    """
+    Vérifie les transitions de statut en une seule requête (plus l'esquisse
+    du temps de préparation au passage à « Prete »).
+
+    Asserts:
+        - En préparation → Prete → Servie : 200, un UPDATE par transition.
+        - Transition non autorisée : 409 ; commande inconnue : 404.
+    """
+    from app.instrumentation import sql_metrics
+
+    order_id = client.post(
+        "/orders/",
+        json={"user_id": client_user.id, "items": [{"product_id": produit.id, "quantity": 1}]},
+    ).json()["id"]
+
+    resp = client.patch(f"/orders/{order_id}/status", json={"status": "Servie"})
+    assert resp.status_code == status.HTTP_409_CONFLICT
+
+    # le refus a fait un rollback : recharge l'employé hors des requêtes comptées
+    session.refresh(employee_user)
+    sql_metrics.reset()
+    resp = client.patch(f"/orders/{order_id}/status", json={"status": "Prete"})
+    assert resp.status_code == status.HTTP_200_OK, resp.text
+    assert resp.json()["status"] == "Prete"
+    assert resp.json()["total_amount"] == 10.0
+    # UPDATE ... RETURNING, puis catégories et esquisse du temps de préparation
+    assert sql_metrics.snapshot()["PATCH /orders/{order_id}/status"]["statements"] == 3
+
+    resp = client.patch(f"/orders/{order_id}/status", json={"status": "Prete"})
+    assert resp.status_code == status.HTTP_409_CONFLICT
+    resp = client.patch(f"/orders/{order_id}/status", json={"status": "Servie"})
+    assert resp.json()["status"] == "Servie"
+
+    resp = client.patch("/orders/9999/status", json={"status": "Prete"})
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_lire_la_file_cuisine(
+    client: TestClient, client_user, produit, override_get_current_employee
+):
+    """
+    Vérifie que la file ne contient que les commandes non servies, par ancienneté.
+    """
+    ids = [
+        client.post(
+            "/orders/",
+            json={"user_id": client_user.id, "items": [{"product_id": produit.id, "quantity": 1}]},
+        ).json()["id"]
+        for _ in range(3)
+    ]
+    client.patch(f"/orders/{ids[1]}/status", json={"status": "Prete"})
+    client.patch(f"/orders/{ids[1]}/status", json={"status": "Servie"})
+    client.patch(f"/orders/{ids[2]}/status", json={"status": "Prete"})
+
+    resp = client.get("/orders/queue")
+    assert resp.status_code == status.HTTP_200_OK, resp.text
+    file = resp.json()
+    assert [o["id"] for o in file] == [ids[0], ids[2]]
+    assert file[0]["items"] == [
+        {"product_id": produit.id, "quantity": 1, "unit_price": 10.0, "product_name": "Produit Test"}
+    ]
+
+
+def test_commandes_publient_les_evenements(
+    client: TestClient, client_user, produit, override_get_current_employee, monkeypatch
+):
+    """
+    Vérifie que création, changement de statut et suppression sont publiés
+    pour le flux de la cuisine.
+    """
+    from app.routers import order as order_router
+
+    publies = []
+    monkeypatch.setattr(
+        order_router.hub, "publier", lambda type_, data: publies.append((type_, data))
+    )
+    order_id = client.post(
+        "/orders/",
+        json={"user_id": client_user.id, "items": [{"product_id": produit.id, "quantity": 1}]},
+    ).json()["id"]
+    client.patch(f"/orders/{order_id}/status", json={"status": "Prete"})
+    client.delete(f"/orders/{order_id}")
+
+    assert [type_ for type_, _ in publies] == [
+        "order.created",
+        "order.status",
+        "order.deleted",
+    ]
+    assert [i["product_id"] for i in publies[0][1]["items"]] == [produit.id]
+    assert publies[1][1]["status"] == "Prete"
+
+
+# LONG-POLL
+def test_lire_commande_long_poll(
+    client: TestClient, session, client_user, employee_user, produit, override_get_current_employee
+):
+    """
+    Vérifie le long-poll sur le statut d'une commande.
+
+    Asserts:
+        - Statut déjà différent de since_status : réponse immédiate.
+        - Aucun changement : la commande inchangée est renvoyée après le délai.
+        - Changement de statut pendant l'attente : réponse avant le délai.
+    """
+    import threading
+    import time
+
+    order_id = client.post(
+        "/orders/",
+        json={"user_id": client_user.id, "items": [{"product_id": produit.id, "quantity": 1}]},
+    ).json()["id"]
+    url = f"/orders/{order_id}"
+
+    resp = client.get(url, params={"wait_for_change": 5, "since_status": "Prete"})
+    assert resp.json()["status"] == "En préparation"
+
+    debut = time.perf_counter()
+    resp = client.get(url, params={"wait_for_change": 0.2})
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["status"] == "En préparation"
+    assert time.perf_counter() - debut >= 0.2
+
+    # la session de test est partagée : l'utilisateur est chargé avant les threads
+    session.refresh(employee_user)
+    reponses = []
+    attente = threading.Thread(
+        target=lambda: reponses.append(client.get(url, params={"wait_for_change": 5}))
+    )
+    debut = time.perf_counter()
+    attente.start()
+    time.sleep(0.3)
+    client.patch(f"{url}/status", json={"status": "Prete"})
+    attente.join()
+    assert time.perf_counter() - debut < 4
+    assert reponses[0].json()["status"] == "Prete"
+
+
+def test_patch_commande_garde_le_prix_a_la_commande(
+    client: TestClient, session, client_user, produit, override_get_current_employee
+):
+    """
+    Vérifie que le total d'une commande modifiée reste calculé au prix figé
+    à la commande, même si le prix du produit a changé depuis.
+    """
+    order_id = client.post(
+        "/orders/",
+        json={"user_id": client_user.id, "items": [{"product_id": produit.id, "quantity": 2}]},
+    ).json()["id"]
+
+    produit.unit_price = 12.0
+    session.add(produit)
+    session.commit()
+
+    patched = client.patch(
+        f"/orders/{order_id}", json={"items": [{"product_id": produit.id, "quantity": 3}]}
+    )
+    assert patched.json()["total_amount"] == 30.0
+    got = client.get(f"/orders/{order_id}").json()
+    assert got["items"][0]["unit_price"] == 10.0
+
+
+# PARTITIONNEMENT
+def test_lignes_datees_comme_leur_commande_partitionnement(
+    client: TestClient,
+    session,
+    client_user,
+    produit,
+    override_get_current_employee,
+    monkeypatch,
+):
+    """
+    Vérifie que les lignes portent la date de leur commande (clé de partition)
+    et que lectures et patch restent corrects avec ORDER_PARTITIONING.
+    """
+    from app.models import Order, OrderItem
+    from app.services import order_read, order_write
+
+    monkeypatch.setattr(order_read, "ORDER_PARTITIONING", True)
+    monkeypatch.setattr(order_write, "ORDER_PARTITIONING", True)
+    autre_id = _creer_produits(session, 1, prix=4.0)[0]
+    order_id = client.post(
+        "/orders/",
+        json={"user_id": client_user.id, "items": [{"product_id": produit.id, "quantity": 1}]},
+    ).json()["id"]
+
+    patched = client.patch(
+        f"/orders/{order_id}", json={"items": [{"product_id": autre_id, "quantity": 2}]}
+    )
+    assert patched.status_code == status.HTTP_200_OK, patched.text
+
+    commande = session.get(Order, order_id)
+    dates = session.exec(
+        select(OrderItem.created_at).where(OrderItem.order_id == order_id)
+    ).all()
+    assert dates == [commande.created_at]
+    got = client.get(f"/orders/{order_id}").json()
+    assert [(i["product_id"], i["quantity"]) for i in got["items"]] == [(autre_id, 2)]
+    listed = client.get("/orders/").json()["items"]
+    assert any(c["id"] == order_id and len(c["items"]) == 1 for c in listed)
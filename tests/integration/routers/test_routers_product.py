@@ -1,11 +1,12 @@
-from datetime import datetime, timezone
+from datetime import datetime, time, timedelta, timezone
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
-from app.enumerations import Category
-from app.models import Product
+from app.enumerations import Category, Status
+from app.models import Order, OrderItem, Product
+from app.services.daily_sales import jour_local
 
 # TEST LISTER LES PRODUITS
 def test_lister_les_produits_admin(client, produit, override_get_current_admin):
@@ -221,3 +222,83 @@ def test_supprimer_un_produit_client(
 
     response = client.delete(f"/product/{produit.id}")
     assert response.status_code == 403  # interdit pour le client
+
+
+# TEST SUGGESTIONS DE RÉAPPROVISIONNEMENT
+def test_suggestions_de_reapprovisionnement(
+    client: TestClient, session: Session, admin_user, override_get_current_admin
+):
+    """
+    Vérifie qu'un produit vendu la veille au-delà de son stock est suggéré,
+    avec une quantité couvrant la livraison.
+
+    Args:
+        client (TestClient): Client FastAPI pour faire les requêtes.
+        session (Session): Session SQLAlchemy/SQLModel pour la DB.
+        admin_user (User): Auteur de la commande de la veille.
+        override_get_current_admin: Fixture qui simule un utilisateur admin.
+
+    Assertions:
+        - Le status code de la réponse est 200.
+        - Le produit figure dans les suggestions, stock et prévision cohérents.
+        - Un paramètre invalide est refusé (422).
+    """
+    produit = Product(
+        name="Produit Rupture",
+        unit_price=1.0,
+        category="Plat principal",
+        description="Desc",
+        stock=1,
+    )
+    session.add(produit)
+    session.commit()
+    session.refresh(produit)
+    hier = jour_local(datetime.now(timezone.utc)) - timedelta(days=1)
+    order = Order(
+        user_id=admin_user.id,
+        total_amount=70,
+        status=Status.SERVIE,
+        created_at=datetime.combine(hier, time(12), tzinfo=timezone.utc),
+    )
+    session.add(order)
+    session.flush()
+    session.add(
+        OrderItem(
+            order_id=order.id,
+            product_id=produit.id,
+            quantity=70,
+            unit_price=1,
+            created_at=order.created_at,
+        )
+    )
+    session.commit()
+
+    response = client.get(
+        "/product/reorder-suggestions",
+        params={"method": "moving_average", "lead_days": 2, "cover_days": 5},
+    )
+    assert response.status_code == 200
+    suggestion = next(s for s in response.json() if s["product_id"] == produit.id)
+    assert suggestion["stock"] == 1
+    assert suggestion["daily_forecast"] == 10
+    assert suggestion["suggested_quantity"] == 69
+
+    response = client.get("/product/reorder-suggestions", params={"method": "naive"})
+    assert response.status_code == 422
+
+
+def test_suggestions_de_reapprovisionnement_client(
+    client: TestClient, override_get_current_client
+):
+    """
+    Vérifie qu'un client ne peut pas consulter les suggestions.
+
+    Args:
+        client (TestClient): Client FastAPI pour faire les requêtes.
+        override_get_current_client: Fixture qui simule un utilisateur client.
+
+    Assertions:
+        - Le status code de la réponse est 403 (interdit pour le client).
+    """
+    response = client.get("/product/reorder-suggestions")
+    assert response.status_code == 403
@@ -0,0 +1,435 @@
+from datetime import datetime
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.enumerations import Category, Status
+from app.models import (
+    DailyCategoryOrders,
+    DailyQuantiles,
+    DailySales,
+    Order,
+    OrderItem,
+    Product,
+)
+from app.services.daily_sales import reconstruire
+from app.services.distinct_customers import reconstruire_esquisses
+
+
+@pytest.fixture
+def ventes(session, client_user):
+    """
+    Crée trois commandes sur deux jours (dont une en septembre) :
+    un plat et une boisson, valorisés au prix figé à la commande.
+    """
+    plat = Product(
+        name="Plat", unit_price=12.0, category=Category.PLAT_PRINCIPAL, stock=100
+    )
+    boisson = Product(name="Soda", unit_price=3.0, category=Category.BOISSON, stock=100)
+    session.add_all([plat, boisson])
+    session.commit()
+
+    commandes = [
+        (datetime(2025, 9, 30, 12, 0), [(plat, 1, 10.0), (boisson, 2, 3.0)]),
+        (datetime(2025, 10, 1, 12, 0), [(plat, 2, 12.0)]),
+        (datetime(2025, 10, 1, 19, 0), [(boisson, 1, 3.0)]),
+    ]
+    for created_at, lignes in commandes:
+        order = Order(
+            user_id=client_user.id,
+            total_amount=sum(qty * prix for _, qty, prix in lignes),
+            status=Status.SERVIE,
+            created_at=created_at,
+        )
+        session.add(order)
+        session.flush()
+        for produit, qty, prix in lignes:
+            session.add(
+                OrderItem(
+                    order_id=order.id,
+                    product_id=produit.id,
+                    quantity=qty,
+                    unit_price=prix,
+                    product_name=produit.name,
+                    created_at=created_at,
+                )
+            )
+    session.commit()
+    # commandes insérées sans passer par l'API : reprise des cumuls quotidiens
+    reconstruire(session)
+    reconstruire_esquisses(session)
+
+
+def test_chiffre_affaires_par_jour_et_par_mois(
+    client: TestClient, ventes, override_get_current_admin
+):
+    """
+    Vérifie le chiffre d'affaires, le nombre de commandes et le ticket moyen
+    par jour puis par mois.
+    """
+    response = client.get("/stats/revenue", params={"granularity": "day"})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == [
+        {"period": "2025-09-30", "revenue": 16.0, "orders": 1, "average_ticket": 16.0},
+        {"period": "2025-10-01", "revenue": 27.0, "orders": 2, "average_ticket": 13.5},
+    ]
+
+    par_mois = client.get("/stats/revenue", params={"granularity": "month"}).json()
+    assert [(p["period"], p["orders"]) for p in par_mois] == [
+        ("2025-09-01", 1),
+        ("2025-10-01", 2),
+    ]
+    par_semaine = client.get("/stats/revenue", params={"granularity": "week"}).json()
+    assert par_semaine == [
+        {"period": "2025-09-29", "revenue": 43.0, "orders": 3, "average_ticket": 14.33}
+    ]
+
+
+def test_chiffre_affaires_filtre_par_periode(
+    client: TestClient, ventes, override_get_current_employee
+):
+    """
+    Vérifie le filtre [from, to) et le refus d'une période inversée.
+    """
+    response = client.get(
+        "/stats/revenue", params={"from": "2025-10-01T00:00:00", "to": "2025-10-02"}
+    )
+    assert [p["period"] for p in response.json()] == ["2025-10-01"]
+
+    response = client.get(
+        "/stats/revenue", params={"from": "2025-10-02", "to": "2025-10-01"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_chiffre_affaires_par_categorie(
+    client: TestClient, ventes, override_get_current_admin
+):
+    """
+    Vérifie les totaux par catégorie, puis par jour et par catégorie.
+    """
+    response = client.get("/stats/revenue/by-category")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    par_categorie = {c["category"]: c for c in response.json()}
+    assert par_categorie["Plat principal"]["revenue"] == 34.0
+    assert par_categorie["Plat principal"]["quantity"] == 3
+    assert par_categorie["Boisson"]["orders"] == 2
+    assert par_categorie["Boisson"]["average_ticket"] == 4.5
+
+    par_jour = client.get(
+        "/stats/revenue/by-category", params={"granularity": "day"}
+    ).json()
+    assert [(c["period"], c["category"], c["revenue"]) for c in par_jour] == [
+        ("2025-09-30", "Boisson", 6.0),
+        ("2025-09-30", "Plat principal", 10.0),
+        ("2025-10-01", "Boisson", 3.0),
+        ("2025-10-01", "Plat principal", 24.0),
+    ]
+
+
+def test_chiffre_affaires_par_categorie_identique_cumul_et_lignes(
+    client: TestClient, session, ventes, client_user, override_get_current_admin
+):
+    """
+    Vérifie que le cumul quotidien (bornes à minuit) et les lignes de commande
+    (borne en cours de journée) donnent le même résultat, y compris pour une
+    commande de deux produits de la même catégorie, comptée une fois.
+    """
+    plat = session.exec(select(Product).where(Product.name == "Plat")).one()
+    tajine = Product(
+        name="Tajine", unit_price=14.0, category=Category.PLAT_PRINCIPAL, stock=10
+    )
+    session.add(tajine)
+    session.commit()
+    resp = client.post(
+        "/orders/",
+        json={
+            "user_id": client_user.id,
+            "items": [
+                {"product_id": plat.id, "quantity": 1},
+                {"product_id": tajine.id, "quantity": 1},
+            ],
+        },
+    )
+    assert resp.status_code == status.HTTP_201_CREATED, resp.text
+
+    for granularite in ({"granularity": "day"}, {"granularity": "month"}, {}):
+        cumul = client.get(
+            "/stats/revenue/by-category", params={**granularite, "from": "2025-01-01"}
+        ).json()
+        lignes = client.get(
+            "/stats/revenue/by-category",
+            params={**granularite, "from": "2025-01-01T00:00:01"},
+        ).json()
+        assert cumul == lignes
+
+    plats = next(c for c in cumul if c["category"] == "Plat principal")
+    assert plats["orders"] == 3
+    assert plats["quantity"] == 5
+
+
+def test_statistiques_interdites_au_client(
+    client: TestClient, override_get_current_client
+):
+    """
+    Vérifie qu'un client ne peut pas consulter les statistiques.
+    """
+    assert client.get("/stats/revenue").status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_chiffre_affaires_par_categorie_bornes_en_cours_de_journee(
+    client: TestClient, ventes, override_get_current_admin
+):
+    """
+    Vérifie qu'une borne en cours de journée est servie par les lignes de
+    commande (le cumul quotidien ne peut pas couper une journée).
+    """
+    response = client.get(
+        "/stats/revenue/by-category", params={"from": "2025-10-01T18:00:00"}
+    )
+    assert response.json() == [
+        {
+            "period": None,
+            "category": "Boisson",
+            "revenue": 3.0,
+            "quantity": 1,
+            "orders": 1,
+            "average_ticket": 3.0,
+        }
+    ]
+
+
+def test_cumul_quotidien_tenu_par_les_commandes(
+    client: TestClient, session, client_user, produit, override_get_current_employee
+):
+    """
+    Vérifie que création, lot, modification et suppression tiennent le cumul
+    quotidien à jour, à l'identique d'une reconstruction complète.
+    """
+
+    def cumul():
+        session.expire_all()
+        return sorted(
+            (r.day, r.product_id, r.quantity, r.revenue, r.orders)
+            for r in session.exec(select(DailySales)).all()
+            if r.orders
+        )
+
+    def par_categorie():
+        return sorted(
+            (r.day, r.category, r.orders)
+            for r in session.exec(select(DailyCategoryOrders)).all()
+            if r.orders
+        )
+
+    autre = Product(name="Eau", unit_price=2.0, category=Category.BOISSON, stock=100)
+    session.add(autre)
+    session.commit()
+    order_id = client.post(
+        "/orders/",
+        json={
+            "user_id": client_user.id,
+            "items": [{"product_id": produit.id, "quantity": 2}],
+        },
+    ).json()["id"]
+    client.post(
+        "/orders/batch",
+        json={
+            "orders": [
+                {
+                    "user_id": client_user.id,
+                    "items": [{"product_id": autre.id, "quantity": 1}],
+                },
+                {
+                    "user_id": client_user.id,
+                    "items": [{"product_id": produit.id, "quantity": 1}],
+                },
+            ]
+        },
+    )
+    client.patch(
+        f"/orders/{order_id}",
+        json={
+            "items": [
+                {"product_id": produit.id, "quantity": 1},
+                {"product_id": autre.id, "quantity": 3},
+            ]
+        },
+    )
+    apres_ecritures = cumul()
+    assert [(q, r, o) for _, _, q, r, o in apres_ecritures] == [
+        (2, 20.0, 2),
+        (4, 8.0, 2),
+    ]
+    commandes = par_categorie()
+    assert [(c, o) for _, c, o in commandes] == [("Boisson", 2), ("Plat principal", 2)]
+    reconstruire(session)
+    assert cumul() == apres_ecritures
+    assert par_categorie() == commandes
+
+    client.delete(f"/orders/{order_id}")
+    assert [(q, o) for _, _, q, _, o in cumul()] == [(1, 1), (1, 1)]
+    assert [o for _, _, o in par_categorie()] == [1, 1]
+
+
+def test_meilleures_ventes_alimentees_par_les_commandes(
+    client: TestClient, session, client_user, produit, override_get_current_client
+):
+    """
+    Vérifie que les commandes créées alimentent le classement du jour,
+    lu sans requête SQL.
+    """
+    from app.instrumentation import sql_metrics
+    from app.services.bestsellers import classement
+
+    classement.vider()
+    autre = Product(name="Eau", unit_price=2.0, category=Category.BOISSON, stock=100)
+    session.add(autre)
+    session.commit()
+    for items in ([(produit.id, 1), (autre.id, 2)], [(autre.id, 1)]):
+        client.post(
+            "/orders/",
+            json={
+                "items": [{"product_id": pid, "quantity": qty} for pid, qty in items]
+            },
+        )
+
+    sql_metrics.reset()
+    response = client.get("/stats/bestsellers", params={"limit": 1})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == [
+        {"product_id": autre.id, "product_name": "Eau", "quantity": 3}
+    ]
+    assert sql_metrics.snapshot()["GET /stats/bestsellers"]["statements"] == 0
+
+
+def test_analyses_en_colonnes(client: TestClient, ventes, override_get_current_admin):
+    """
+    Vérifie les paniers, les créneaux horaires et l'élasticité-prix calculés
+    sur les colonnes NumPy (RESTAURANT_TZ = UTC dans les tests).
+    """
+    from app.services.analytics import colonnes
+
+    colonnes.vider()
+    paniers = client.get("/stats/basket-sizes").json()
+    assert paniers == [
+        {"size": 1, "orders": 1},
+        {"size": 2, "orders": 1},
+        {"size": 3, "orders": 1},
+    ]
+
+    creneaux = client.get(
+        "/stats/revenue/by-hour-of-week", params={"from": "2025-10-01T00:00:00"}
+    ).json()
+    assert creneaux == [
+        {"weekday": 2, "hour": 12, "revenue": 24.0, "quantity": 2, "orders": 1},
+        {"weekday": 2, "hour": 19, "revenue": 3.0, "quantity": 1, "orders": 1},
+    ]
+
+    # le plat : 1 vendu à 10 €, 2 vendus à 12 € (un jour de vente chacun)
+    elasticites = client.get("/stats/price-elasticity").json()
+    assert len(elasticites) == 1
+    assert elasticites[0]["price_levels"] == 2
+    assert elasticites[0]["elasticity"] == pytest.approx(3.802, abs=1e-3)
+
+    boissons = client.get("/stats/basket-sizes", params={"category": "Boisson"})
+    assert boissons.json() == [{"size": 1, "orders": 1}, {"size": 2, "orders": 1}]
+
+
+def test_clients_distincts_estimes(
+    client: TestClient, ventes, override_get_current_admin
+):
+    """
+    Vérifie l'estimation des clients distincts par mois, et le refus d'une
+    période inversée.
+    """
+    params = {"from": "2025-09-01", "to": "2025-11-01", "granularity": "month"}
+    response = client.get("/stats/customers/distinct", params=params)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [(p["period"], p["estimate"]) for p in response.json()] == [
+        ("2025-09-01", 1),
+        ("2025-10-01", 1),
+    ]
+
+    inverse = {"from": "2025-10-01", "to": "2025-09-01"}
+    response = client.get("/stats/customers/distinct", params=inverse)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_clients_distincts_comptent_les_commandes_de_caisse_tardives(
+    client: TestClient, ventes, admin_user, produit, override_get_current_employee
+):
+    """
+    Vérifie qu'une commande de caisse synchronisée après coup, datée d'un jour
+    déjà lu, est comptée sans reconstruction.
+    """
+    params = {"from": "2025-10-01", "to": "2025-10-02"}
+    avant = client.get("/stats/customers/distinct", params=params).json()
+    assert [p["estimate"] for p in avant] == [1]
+
+    lot = client.post(
+        "/orders/batch",
+        json={
+            "orders": [
+                {
+                    "user_id": admin_user.id,
+                    "created_at": "2025-10-01T15:00:00Z",
+                    "items": [{"product_id": produit.id, "quantity": 1}],
+                }
+            ]
+        },
+    )
+    assert lot.json()["created"] == 1, lot.text
+    apres = client.get("/stats/customers/distinct", params=params).json()
+    assert [p["estimate"] for p in apres] == [2]
+
+
+def test_percentiles_tenus_a_jour_par_les_ecritures(
+    client: TestClient, session, client_user, produit, override_get_current_admin
+):
+    """
+    Vérifie que création, passage à « Prete », modification et suppression
+    tiennent les esquisses à jour, à l'identique d'une reconstruction.
+    """
+    from app.services.quantiles import reconstruire_quantiles
+
+    def creer(quantite):
+        return client.post(
+            "/orders/",
+            json={
+                "user_id": client_user.id,
+                "items": [{"product_id": produit.id, "quantity": quantite}],
+            },
+        ).json()["id"]
+
+    ids = [creer(q) for q in (1, 2, 3, 4)]
+    client.patch(f"/orders/{ids[0]}/status", json={"status": "Prete"})
+    client.patch(
+        f"/orders/{ids[1]}", json={"items": [{"product_id": produit.id, "quantity": 6}]}
+    )
+    client.patch(f"/orders/{ids[2]}", json={"status": "Servie"})
+    client.delete(f"/orders/{ids[3]}")
+
+    montants = client.get("/stats/percentiles", params={"metric": "amount"})
+    assert montants.status_code == status.HTTP_200_OK, montants.text
+    (resultat,) = montants.json()
+    assert resultat["count"] == 3
+    assert abs(resultat["p50"] - 30.0) <= 0.3
+
+    preparation = client.get(
+        "/stats/percentiles",
+        params={"metric": "prep_time", "category": "Plat principal"},
+    ).json()
+    assert [p["count"] for p in preparation] == [2]
+    commande = session.get(Order, ids[0])
+    assert commande.ready_at is not None and commande.served_at is None
+
+    avant = session.exec(select(DailyQuantiles).where(DailyQuantiles.count != 0)).all()
+    avant = sorted((q.day, q.metric, q.category, q.bucket, q.count) for q in avant)
+    reconstruire_quantiles(session)
+    apres = session.exec(select(DailyQuantiles)).all()
+    assert avant == sorted(
+        (q.day, q.metric, q.category, q.bucket, q.count) for q in apres
+    )
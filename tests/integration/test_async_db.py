@@ -0,0 +1,87 @@
+import inspect
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import get_async_session
+from app.depend import to_async_endpoint
+from app.enumerations import Category, Role
+from app.models import Product, User
+from app.routers.product import lire_un_produit_id
+from app.schemas.product import ProductRead
+from app.security import get_current_user
+
+
+@pytest.fixture
+def async_app(tmp_path):
+    """
+    Construit une application exposant la version async d'un endpoint produit,
+    branchée sur une base SQLite fichier lue via aiosqlite.
+
+    Yield :
+        - (TestClient, Product) : le client et le produit inséré.
+    """
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(sync_engine)
+    with Session(sync_engine) as session:
+        produit = Product(
+            name="Tajine",
+            unit_price=14.5,
+            category=Category.PLAT_PRINCIPAL,
+            description="Tajine aux légumes",
+            stock=10,
+        )
+        session.add(produit)
+        session.commit()
+        session.refresh(produit)
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app = FastAPI()
+    app.get("/product/{product_id}", response_model=ProductRead)(
+        to_async_endpoint(lire_un_produit_id)
+    )
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    app.dependency_overrides[get_current_user] = lambda: User(
+        first_name="Admin",
+        last_name="Async",
+        email="admin.async@example.com",
+        role=Role.ADMIN,
+        password_hashed="x",
+    )
+    with TestClient(app) as client:
+        yield client, produit
+    sync_engine.dispose()
+
+
+def test_endpoint_async_est_une_coroutine():
+    """
+    Vérifie que la version async d'un endpoint est une coroutine dont la session
+    est injectée par get_async_session.
+    """
+    endpoint = to_async_endpoint(lire_un_produit_id)
+    assert inspect.iscoroutinefunction(endpoint)
+    param = inspect.signature(endpoint).parameters["session"]
+    assert param.default.dependency is get_async_session
+
+
+def test_endpoint_async_lit_la_base(async_app):
+    """
+    Vérifie qu'un endpoint servi en async lit correctement la base via aiosqlite.
+    """
+    client, produit = async_app
+    response = client.get(f"/product/{produit.id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "Tajine"
+
+    response = client.get("/product/9999")
+    assert response.status_code == 404
@@ -0,0 +1,71 @@
+import app.main as main
+from app.instrumentation import sql_metrics
+
+
+def test_entetes_sql_en_mode_debug(
+    client, produit, override_get_current_admin, monkeypatch
+):
+    """
+    En mode SQL_DEBUG, la réponse porte les en-têtes X-DB-*.
+    """
+    monkeypatch.setattr(main, "SQL_DEBUG", True)
+    response = client.get("/product/")
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Statements"]) >= 1
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+
+def test_metriques_sql_sans_entetes(client, produit, override_get_current_admin):
+    """
+    Hors debug, pas d'en-têtes : les compteurs sont agrégés sur /metrics/sql.
+    """
+    sql_metrics.reset()
+    response = client.get("/product/")
+    assert "X-DB-Statements" not in response.headers
+
+    metrics = client.get("/metrics/sql").json()
+    assert metrics["GET /product/"]["requests"] == 1
+    assert metrics["GET /product/"]["statements"] >= 1
+
+
+def test_metriques_sql_requetes_sans_route(client, override_get_current_admin):
+    """
+    Les URL sans route partagent une seule entrée : pas une par URL inconnue.
+    """
+    sql_metrics.reset()
+    for url in ("/inconnue", "/wp-admin/setup.php", "/product/x/y/z"):
+        assert client.get(url).status_code == 404
+
+    metrics = client.get("/metrics/sql").json()
+    assert metrics["GET <unmatched>"]["requests"] == 3
+    assert not [cle for cle in metrics if "wp-admin" in cle or "inconnue" in cle]
+
+
+def test_metriques_sql_client(client, override_get_current_client):
+    """
+    Les statistiques SQL (dont le texte des requêtes) ne sont pas exposées aux clients.
+    """
+    assert client.get("/metrics/sql").status_code == 403
+
+
+def test_etat_pool_sans_authentification(client):
+    """
+    L'état du pool n'est pas exposé sans authentification.
+    """
+    assert client.get("/health/db").status_code == 401
+
+
+def test_etat_pool_client(client, override_get_current_client):
+    """
+    L'état du pool n'est pas exposé aux clients.
+    """
+    assert client.get("/health/db").status_code == 403
+
+
+def test_etat_pool_admin(client, override_get_current_admin):
+    """
+    Un admin lit l'état du pool.
+    """
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    assert "checkouts" in response.json()
@@ -0,0 +1,123 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.enumerations import Category, Role, Status
+from app.models import Order, OrderItem, Product, User
+from app.services import partitions
+
+pytestmark = pytest.mark.postgres
+
+
+def _commande(session, user_id, product_id, created_at):
+    """Ajoute une commande d'un article à la date donnée."""
+    order = Order(
+        user_id=user_id,
+        total_amount=5.0,
+        status=Status.EN_PREPARATION,
+        created_at=created_at,
+    )
+    session.add(order)
+    session.flush()
+    session.add(
+        OrderItem(
+            order_id=order.id,
+            product_id=product_id,
+            quantity=1,
+            unit_price=5.0,
+            product_name="Flan",
+            created_at=created_at,
+        )
+    )
+    return order
+
+
+def _compter(session, table):
+    """Nombre de lignes d'une table (ou partition)."""
+    return session.execute(text(f"SELECT count(*) FROM {table}")).scalar_one()
+
+
+def test_conversion_puis_maintenance(engine_postgres):
+    """
+    Convertit les tables puis fait tourner la maintenance des partitions.
+
+    Asserts:
+        - La conversion crée un mois par partition, du plus ancien au mois à venir.
+        - Un mois à venir dont des lignes sont déjà dans la partition par défaut
+          est créé : ses lignes y sont déplacées, la partition par défaut se vide.
+        - Les mois hors rétention sont détachés vers le schéma d'archive.
+    """
+    with Session(engine_postgres) as session:
+        user = User(
+            first_name="Caisse",
+            last_name="Un",
+            email="caisse@example.com",
+            role=Role.EMPLOYEE,
+            password_hashed="x",
+            address_user="1 rue du Port",
+            phone="0333333333",
+        )
+        produit = Product(
+            name="Flan", unit_price=5.0, category=Category.DESSERT, stock=10
+        )
+        session.add_all([user, produit])
+        session.flush()
+        _commande(session, user.id, produit.id, datetime(2026, 8, 15, 12))
+        _commande(session, user.id, produit.id, datetime(2026, 10, 5, 12))
+        session.commit()
+
+        try:
+            assert partitions.partitionner(
+                session, mois_avance=1, aujourdhui=date(2026, 10, 17)
+            )
+            assert partitions.est_partitionnee(session)
+            assert partitions.partitions(session, "order") == [
+                date(2026, 8, 1),
+                date(2026, 9, 1),
+                date(2026, 10, 1),
+                date(2026, 11, 1),
+            ]
+            assert _compter(session, '"orderitem_p2026_10"') == 1
+
+            # janvier n'a pas encore de partition : la commande va par défaut
+            janvier = _commande(session, user.id, produit.id, datetime(2027, 1, 10, 12))
+            session.commit()
+            assert _compter(session, '"order_default"') == 1
+
+            creees, archivees = partitions.maintenir_partitions(
+                session,
+                mois_avance=2,
+                retention_mois=2,
+                schema_archive="archive_test",
+                aujourdhui=date(2026, 12, 3),
+            )
+            assert creees == [
+                f"{table}_p{mois}"
+                for mois in ("2026_12", "2027_01", "2027_02")
+                for table in ("order", "orderitem")
+            ]
+            assert _compter(session, '"order_default"') == 0
+            assert _compter(session, '"orderitem_default"') == 0
+            assert _compter(session, '"order_p2027_01"') == 1
+            assert _compter(session, '"orderitem_p2027_01"') == 1
+            assert (
+                session.execute(
+                    text('SELECT count(*) FROM "order" WHERE id = :id'),
+                    {"id": janvier.id},
+                ).scalar_one()
+                == 1
+            )
+
+            assert sorted(archivees) == [
+                f"{table}_p{mois}"
+                for table in ("order", "orderitem")
+                for mois in ("2026_08", "2026_09", "2026_10")
+            ]
+            assert _compter(session, 'archive_test."order_p2026_10"') == 1
+            assert partitions.partitions(session, "order")[0] == date(2026, 11, 1)
+        finally:
+            session.rollback()
+            session.execute(text("DROP SCHEMA IF EXISTS archive_test CASCADE"))
+            session.commit()
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.enumerations import Category
+from app.models import Product
+from app.services.order_write import reserver_stock
+
+STOCK_INITIAL = 50
+COMMANDES = 200
+THREADS = 32
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def engine_stock(request, tmp_path):
+    """
+    Base partagée entre threads (chaque thread a sa connexion), avec un plat.
+
+    - sqlite : base fichier ; son verrou d'écriture global sérialise toutes les
+      transactions, le test ne vérifie donc que la condition `stock >= delta`.
+    - postgresql : verrous de ligne réels, concurrence effective entre les
+      UPDATE (ignoré sans TEST_POSTGRES_URL, voir tests/conftest.py).
+
+    Yield :
+        - (Engine, int) : l'engine et l'ID du plat populaire.
+    """
+    if request.param == "postgresql":
+        engine = request.getfixturevalue("engine_postgres")
+    else:
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'stock.db'}",
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        plat = Product(
+            name="Couscous",
+            unit_price=13.0,
+            category=Category.PLAT_PRINCIPAL,
+            description="Plat populaire",
+            stock=STOCK_INITIAL,
+        )
+        session.add(plat)
+        session.commit()
+        plat_id = plat.id
+    yield engine, plat_id
+    engine.dispose()
+
+
+def test_reservation_concurrente_sans_survente(engine_stock):
+    """
+    Martèle le même produit depuis de nombreux threads.
+
+    Asserts:
+        - Exactement STOCK_INITIAL réservations réussissent, les autres reçoivent 409.
+        - Le stock final vaut 0 : aucune survente, aucun stock négatif.
+    """
+    engine, plat_id = engine_stock
+
+    def commander(_):
+        with Session(engine) as session:
+            try:
+                reserver_stock(session, {plat_id: 1})
+                session.commit()
+                return "ok"
+            except HTTPException as exc:
+                assert exc.status_code == 409
+                return "rupture"
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        resultats = list(pool.map(commander, range(COMMANDES)))
+
+    assert resultats.count("ok") == STOCK_INITIAL
+    assert resultats.count("rupture") == COMMANDES - STOCK_INITIAL
+    with Session(engine) as session:
+        assert session.get(Product, plat_id).stock == 0
+
+
+def test_liberation_produit_supprime(engine_stock):
+    """
+    Rendre le stock d'un produit supprimé depuis n'échoue pas ; une réservation
+    refusée liste le produit refusé.
+    """
+    engine, plat_id = engine_stock
+    with Session(engine) as session:
+        reserver_stock(session, {plat_id: -2, plat_id + 1000: -3})
+        session.commit()
+        assert session.get(Product, plat_id).stock == STOCK_INITIAL + 2
+
+        with pytest.raises(HTTPException) as exc:
+            reserver_stock(session, {plat_id: STOCK_INITIAL + 3})
+        assert exc.value.status_code == 409
+        assert [p["product_id"] for p in exc.value.detail["products"]] == [plat_id]
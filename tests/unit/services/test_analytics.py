@@ -0,0 +1,103 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.enumerations import Category, Status
+from app.models import Order, OrderItem, Product
+from app.services import analytics
+from app.services.analytics import Colonnes, chiffre_par_heure_semaine, tailles_paniers
+
+
+def _colonnes_aleatoires(n=5000, graine=0):
+    """Lignes de commande aléatoires (plusieurs lignes par commande)."""
+    rng = np.random.default_rng(graine)
+    order_id = np.sort(rng.integers(1, n // 3, n)).astype(np.int32)
+    _, premieres, commande = np.unique(order_id, return_index=True, return_inverse=True)
+    dates = rng.integers(1_700_000_000, 1_760_000_000, len(premieres))
+    return {
+        "order_id": order_id,
+        "product_id": rng.integers(1, 50, n).astype(np.int32),
+        "quantity": rng.integers(1, 4, n).astype(np.int32),
+        "unit_price": rng.choice([2.5, 4.0, 12.0], n),
+        "category": rng.integers(0, 6, n).astype(np.int8),
+        "created_at": dates[commande].astype(np.int64),
+    }
+
+
+def test_agregations_identiques_au_calcul_ligne_a_ligne(monkeypatch):
+    """
+    Vérifie les paniers et les créneaux horaires contre une boucle Python,
+    dans un fuseau à changement d'heure.
+    """
+    tz = ZoneInfo("Europe/Paris")
+    monkeypatch.setattr(analytics, "RESTAURANT_TZ", tz)
+    donnees = _colonnes_aleatoires()
+
+    paniers, creneaux, commandes = Counter(), defaultdict(float), defaultdict(set)
+    for oid, qty, prix, epoch in zip(
+        donnees["order_id"],
+        donnees["quantity"],
+        donnees["unit_price"],
+        donnees["created_at"],
+    ):
+        paniers[int(oid)] += int(qty)
+        local = datetime.fromtimestamp(int(epoch), timezone.utc).astimezone(tz)
+        creneaux[(local.weekday(), local.hour)] += int(qty) * prix
+        commandes[(local.weekday(), local.hour)].add(int(oid))
+
+    attendu = sorted(Counter(paniers.values()).items())
+    assert [(b.size, b.orders) for b in tailles_paniers(donnees)] == attendu
+
+    resultat = chiffre_par_heure_semaine(donnees)
+    assert {(r.weekday, r.hour) for r in resultat} == set(creneaux)
+    for r in resultat:
+        assert r.revenue == round(creneaux[(r.weekday, r.hour)], 2)
+        assert r.orders == len(commandes[(r.weekday, r.hour)])
+
+
+def test_rafraichissement_incremental_par_filigrane(session, client_user):
+    """
+    Vérifie que seules les commandes au-delà du filigrane sont chargées,
+    et qu'un rechargement complet reprend les modifications.
+    """
+    produit = Product(name="Tarte", unit_price=5.0, category=Category.DESSERT, stock=10)
+    session.add(produit)
+    session.commit()
+
+    def commander(quantite):
+        order = Order(
+            user_id=client_user.id, total_amount=5.0 * quantite, status=Status.SERVIE
+        )
+        session.add(order)
+        session.flush()
+        item = OrderItem(
+            order_id=order.id,
+            product_id=produit.id,
+            quantity=quantite,
+            unit_price=5.0,
+            created_at=order.created_at,
+        )
+        session.add(item)
+        session.commit()
+        return item
+
+    store = Colonnes()
+    premier = commander(1)
+    assert store.rafraichir(session) == 1
+    assert store.rafraichir(session) == 0
+
+    commander(2)
+    premier.quantity = 4
+    session.add(premier)
+    session.commit()
+    assert store.rafraichir(session) == 1
+    assert store.colonnes()["quantity"].tolist() == [1, 2]
+    assert (
+        store.colonnes()["category"].tolist()
+        == [list(Category).index(Category.DESSERT)] * 2
+    )
+
+    assert store.rafraichir(session, complet=True) == 2
+    assert store.colonnes()["quantity"].tolist() == [4, 2]
@@ -0,0 +1,154 @@
+import random
+from collections import Counter
+from datetime import date, datetime
+
+from app.enumerations import Category
+from app.models import DailySales, Product
+from app.schemas.order import OrderItemInOrderRead, OrderReadWithItems
+from app.services.bestsellers import Classement, TopK
+
+
+def test_topk_reste_exact_par_ajouts():
+    """
+    Vérifie que la liste des K premiers reste celle d'un tri complet,
+    égalités départagées par identifiant.
+    """
+    rng = random.Random(0)
+    topk, comptes = TopK(5), Counter()
+    for _ in range(2000):
+        pid, qty = rng.randint(1, 40), rng.randint(1, 3)
+        topk.ajouter(pid, qty)
+        comptes[pid] += qty
+    attendu = sorted(comptes.items(), key=lambda c: (-c[1], c[0]))[:5]
+    assert topk.premiers(5) == attendu
+    assert topk.premiers(2) == attendu[:2]
+
+
+def _commande(created_at, *articles):
+    return OrderReadWithItems(
+        id=1,
+        user_id=1,
+        total_amount=0,
+        status="En préparation",
+        created_at=created_at,
+        items=[
+            OrderItemInOrderRead(product_id=pid, quantity=qty, product_name=f"P{pid}")
+            for pid, qty in articles
+        ],
+    )
+
+
+def test_classement_du_jour_et_de_la_semaine():
+    """
+    Vérifie qu'un nouveau jour repart de zéro sans vider la semaine,
+    et qu'une nouvelle semaine repart de zéro.
+    """
+    classement = Classement(k=3)
+    classement.enregistrer(_commande(datetime(2025, 10, 6, 12), (1, 2), (2, 1)))
+    classement.enregistrer(_commande(datetime(2025, 10, 7, 12), (2, 3)))
+
+    mardi = date(2025, 10, 7)
+    assert [v.product_id for v in classement.premiers("today", 3, mardi)] == [2]
+    semaine = classement.premiers("week", 3, mardi)
+    assert [(v.product_id, v.quantity) for v in semaine] == [(2, 4), (1, 2)]
+    assert semaine[0].product_name == "P2"
+    assert classement.premiers("week", 3, date(2025, 10, 13)) == []
+
+
+def test_recharger_depuis_le_cumul_quotidien(session):
+    """
+    Vérifie le préchauffage depuis dailysales : jour courant et semaine.
+    """
+    produit = Product(name="Soupe", unit_price=4.0, category=Category.ENTREE, stock=1)
+    session.add(produit)
+    session.commit()
+    session.add_all(
+        [
+            DailySales(
+                day=date(2025, 10, 6),
+                product_id=produit.id,
+                category="Entrée",
+                quantity=5,
+                revenue=20,
+                orders=2,
+            ),
+            DailySales(
+                day=date(2025, 10, 7),
+                product_id=produit.id,
+                category="Entrée",
+                quantity=1,
+                revenue=4,
+                orders=1,
+            ),
+            DailySales(
+                day=date(2025, 10, 5),
+                product_id=produit.id,
+                category="Entrée",
+                quantity=9,
+                revenue=36,
+                orders=3,
+            ),
+        ]
+    )
+    session.commit()
+
+    classement = Classement(k=3)
+    classement.recharger(session, date(2025, 10, 7))
+    assert classement.premiers("week", 3, date(2025, 10, 7))[0].quantity == 6
+    today = classement.premiers("today", 3, date(2025, 10, 7))
+    assert [(v.product_name, v.quantity) for v in today] == [("Soupe", 1)]
+
+
+def test_recharger_garde_les_commandes_enregistrees_pendant_la_lecture(
+    session, monkeypatch
+):
+    """
+    Vérifie qu'une commande enregistrée pendant la lecture du cumul (validée
+    après elle) n'est pas effacée par le remplacement des classements.
+    """
+    classement = Classement(k=3)
+    lire = session.execute
+
+    def lire_puis_commander(*args, **kwargs):
+        rows = lire(*args, **kwargs)
+        classement.enregistrer(_commande(datetime(2025, 10, 7, 12), (4, 2)))
+        return rows
+
+    monkeypatch.setattr(session, "execute", lire_puis_commander)
+    classement.recharger(session, date(2025, 10, 7))
+    today = classement.premiers("today", 3, date(2025, 10, 7))
+    assert [(v.product_id, v.product_name, v.quantity) for v in today] == [(4, "P4", 2)]
+
+
+def test_demarrage_prechauffe_puis_arrete_la_reconciliation(monkeypatch):
+    """
+    Vérifie qu'avec BESTSELLERS_WARMUP le démarrage recharge le classement et
+    lance la réconciliation, et que l'arrêt attend la fin de la tâche annulée.
+    """
+    import asyncio
+
+    import app.main as main
+
+    etapes = []
+
+    async def reconcilier(engine):
+        etapes.append("reconciliation")
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            etapes.append("arret")
+
+    monkeypatch.setattr(main, "BESTSELLERS_WARMUP", True)
+    monkeypatch.setattr(
+        main, "recharger_classement", lambda engine: etapes.append("prechauffage")
+    )
+    monkeypatch.setattr(main, "reconcilier_classement", reconcilier)
+
+    async def demarrer_puis_arreter():
+        async with main.lifespan(main.app):
+            await asyncio.sleep(0)
+            assert etapes == ["prechauffage", "reconciliation"]
+        # la tâche est terminée quand l'arrêt rend la main
+        assert etapes == ["prechauffage", "reconciliation", "arret"]
+
+    asyncio.run(demarrer_puis_arreter())
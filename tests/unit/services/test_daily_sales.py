@@ -0,0 +1,98 @@
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+from app.services import daily_sales
+from app.services.daily_sales import Mouvement, mouvements
+from app.services.order_write import Ligne
+
+
+def test_mouvements_entre_deux_etats():
+    """
+    Vérifie les écarts par produit : ajout, retrait, quantité modifiée,
+    et aucune entrée pour une ligne inchangée.
+    """
+    avant = [
+        Ligne(1, 2, 10.0, "Plat"),
+        Ligne(2, 1, 3.0, "Soda"),
+        Ligne(3, 1, 5.0, "Tarte"),
+    ]
+    apres = [
+        Ligne(1, 3, 10.0, "Plat"),
+        Ligne(3, 1, 5.0, "Tarte"),
+        Ligne(4, 2, 1.5, "Eau"),
+    ]
+    assert mouvements(avant, apres) == {
+        1: Mouvement(1, 10.0, 0),
+        2: Mouvement(-1, -3.0, -1),
+        4: Mouvement(2, 3.0, 1),
+    }
+    assert mouvements([], avant)[1] == Mouvement(2, 20.0, 1)
+
+
+def test_jour_local_dans_le_fuseau_du_restaurant(monkeypatch):
+    """
+    Vérifie qu'une commande de 23h UTC compte pour le lendemain à Paris,
+    qu'elle vienne de la base (sans fuseau) ou d'une création (UTC).
+    """
+    monkeypatch.setattr(daily_sales, "RESTAURANT_TZ", ZoneInfo("Europe/Paris"))
+    assert daily_sales.jour_local(datetime(2025, 8, 20, 23, 0)) == date(2025, 8, 21)
+    moment = datetime(2025, 8, 20, 21, 0, tzinfo=timezone.utc)
+    assert daily_sales.jour_local(moment) == date(2025, 8, 20)
+
+
+def test_cumul_ignore_un_produit_supprime(session, produit, caplog):
+    """
+    Vérifie que l'écart d'un produit supprimé n'est pas cumulé, mais signalé.
+    """
+    from sqlmodel import select
+
+    from app.models import DailySales
+
+    jour = date(2031, 3, 10)
+    with caplog.at_level("WARNING", logger="app.services.daily_sales"):
+        daily_sales.cumuler(
+            session,
+            jour,
+            {produit.id: Mouvement(2, 20.0, 1), 9999: Mouvement(1, 5.0, 1)},
+        )
+    lignes = session.exec(select(DailySales).where(DailySales.day == jour)).all()
+    assert [(r.product_id, r.quantity) for r in lignes] == [(produit.id, 2)]
+    assert "[9999]" in caplog.text
+
+
+def test_commandes_par_categorie_comptees_une_fois(session, produit):
+    """
+    Vérifie qu'une commande compte une fois par catégorie (deux plats = une
+    commande), y compris quand une ligne inchangée garde sa catégorie.
+    """
+    from sqlmodel import select
+
+    from app.enumerations import Category
+    from app.models import DailyCategoryOrders, Order, Product
+
+    tajine = Product(
+        name="Tajine", unit_price=14.0, category=Category.PLAT_PRINCIPAL, stock=10
+    )
+    soda = Product(name="Soda", unit_price=3.0, category=Category.BOISSON, stock=10)
+    session.add_all([tajine, soda])
+    session.commit()
+    order = Order(user_id=1, total_amount=0, created_at=datetime(2031, 3, 10, 12))
+    plat = Ligne(produit.id, 1, 10.0, "Plat")
+
+    def commandes():
+        return {
+            r.category: r.orders
+            for r in session.exec(select(DailyCategoryOrders)).all()
+            if r.orders
+        }
+
+    creation = [plat, Ligne(tajine.id, 2, 14.0, "Tajine")]
+    daily_sales.cumuler_commandes(session, [(order, [], creation)])
+    assert commandes() == {"Plat principal": 1}
+
+    modification = [plat, Ligne(soda.id, 1, 3.0, "Soda")]
+    daily_sales.cumuler_commandes(session, [(order, creation, modification)])
+    assert commandes() == {"Plat principal": 1, "Boisson": 1}
+
+    daily_sales.cumuler_commandes(session, [(order, modification, [])])
+    assert commandes() == {}
@@ -0,0 +1,96 @@
+from datetime import date, datetime
+
+import numpy as np
+from sqlmodel import select
+
+from app.enumerations import Status
+from app.models import DailyCustomers, Order
+from app.services import distinct_customers
+from app.services.distinct_customers import (
+    ERREUR_RELATIVE,
+    clients_distincts,
+    cumuler_clients,
+    esquisse,
+    estimer,
+    reconstruire_esquisses,
+)
+
+
+def test_estimation_dans_la_borne_et_fusion_exacte():
+    """
+    Vérifie l'estimation (exacte pour de petits effectifs, dans la borne
+    d'erreur au-delà) et que la fusion vaut l'esquisse de l'union.
+    """
+    assert round(estimer(esquisse([]))) == 0
+    assert round(estimer(esquisse([7, 7, 8]))) == 2
+    for n in (1_000, 50_000):
+        assert abs(estimer(esquisse(range(n))) - n) <= 3 * ERREUR_RELATIVE * n
+
+    a, b = esquisse(range(0, 30_000)), esquisse(range(20_000, 50_000))
+    assert np.array_equal(np.maximum(a, b), esquisse(range(50_000)))
+
+
+def _commande(user, moment):
+    return Order(
+        user_id=user.id, total_amount=10, status=Status.SERVIE, created_at=moment
+    )
+
+
+def test_reconstruction_puis_lecture_sans_ecriture(
+    session, client_user, admin_user, monkeypatch
+):
+    """
+    Vérifie la reconstruction (aucune ligne pour un jour sans commande, par
+    LIGNES_PAR_INSERT registres), le découpage par jour, et que la lecture
+    n'écrit rien.
+    """
+    monkeypatch.setattr(distinct_customers, "LIGNES_PAR_INSERT", 2)
+    session.add_all(
+        [
+            _commande(client_user, datetime(2025, 10, 1, 9)),
+            _commande(client_user, datetime(2025, 10, 1, 18)),
+            _commande(admin_user, datetime(2025, 10, 1, 20)),
+            _commande(client_user, datetime(2025, 10, 3, 12)),
+        ]
+    )
+    session.commit()
+
+    assert reconstruire_esquisses(session) == 3
+    lignes = session.exec(select(DailyCustomers)).all()
+    assert sorted({r.day for r in lignes}) == [date(2025, 10, 1), date(2025, 10, 3)]
+
+    total = clients_distincts(session, date(1950, 1, 1), date(2025, 10, 5))
+    assert [(r.period, r.estimate) for r in total] == [(None, 2)]
+    assert total[0].error_bound >= 0
+    par_jour = clients_distincts(session, date(2025, 10, 1), date(2025, 10, 5), "day")
+    assert [(r.period, r.estimate) for r in par_jour] == [
+        (date(2025, 10, 1), 2),
+        (date(2025, 10, 3), 1),
+    ]
+    assert len(session.exec(select(DailyCustomers)).all()) == len(lignes)
+    assert not session.dirty and not session.new
+
+
+def test_commande_tardive_versee_dans_un_jour_deja_lu(session, client_user, admin_user):
+    """
+    Vérifie qu'une commande créée après coup pour un jour déjà lu (caisse
+    hors ligne) est comptée sans reconstruction, et qu'un client déjà compté
+    ne change rien.
+    """
+    jour = date(2025, 10, 1)
+    cumuler_clients(session, [_commande(client_user, datetime(2025, 10, 1, 9))])
+    session.commit()
+    assert clients_distincts(session, jour, date(2025, 10, 2))[0].estimate == 1
+
+    cumuler_clients(
+        session,
+        [
+            _commande(admin_user, datetime(2025, 10, 1, 21)),
+            _commande(client_user, datetime(2025, 10, 1, 22)),
+        ],
+    )
+    session.commit()
+    assert clients_distincts(session, jour, date(2025, 10, 2))[0].estimate == 2
+    registres = {r.bucket: r.rank for r in session.exec(select(DailyCustomers)).all()}
+    attendu = esquisse([client_user.id, admin_user.id])
+    assert registres == {int(i): int(attendu[i]) for i in np.flatnonzero(attendu)}
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+from app.services import events
+from app.services.events import EventHub, LocalBackend, flux_sse
+
+
+def test_hub_livre_depuis_un_autre_thread():
+    """
+    Vérifie qu'un événement publié depuis un thread (threadpool) est livré
+    dans la boucle de l'abonné.
+    """
+    hub = EventHub(LocalBackend())
+
+    async def scenario():
+        abonnement = hub.abonner()
+        thread = threading.Thread(
+            target=hub.publier, args=(events.ORDER_CREATED, {"id": 1})
+        )
+        thread.start()
+        thread.join()
+        message = await asyncio.wait_for(abonnement.queue.get(), 1)
+        hub.desabonner(abonnement)
+        return message
+
+    assert asyncio.run(scenario()) == {"type": "order.created", "data": {"id": 1}}
+    assert hub.nombre_abonnes() == 0
+
+
+def test_hub_file_bornee_perd_les_plus_anciens():
+    """
+    Vérifie qu'un abonné lent garde les derniers événements dans sa file bornée.
+    """
+    hub = EventHub(LocalBackend())
+
+    async def scenario():
+        abonnement = hub.abonner(taille=2)
+        for i in range(5):
+            hub.publier(events.ORDER_STATUS, {"id": i})
+        await asyncio.sleep(0)
+        recus = [abonnement.queue.get_nowait()["data"]["id"] for _ in range(2)]
+        return recus, abonnement.perdus
+
+    assert asyncio.run(scenario()) == ([3, 4], 3)
+
+
+def test_flux_sse_evenements_et_keepalive():
+    """
+    Vérifie le format SSE, le keep-alive et le désabonnement en fin de flux.
+    """
+    hub = events.hub
+
+    async def scenario():
+        abonnement = hub.abonner()
+        appels = iter([False, False, True])
+
+        async def deconnecte():
+            return next(appels)
+
+        hub.publier(events.ORDER_DELETED, {"id": 7})
+        return [
+            chunk async for chunk in flux_sse(abonnement, deconnecte, keepalive=0.01)
+        ]
+
+    chunks = asyncio.run(scenario())
+    assert chunks[0] == "retry: 10\n\n"
+    assert chunks[1] == 'event: order.deleted\ndata: {"id": 7}\n\n'
+    assert chunks[2] == ": keepalive\n\n"
+    assert hub.nombre_abonnes() == 0
+
+
+def test_attendre_changement_ignore_le_meme_statut():
+    """
+    Vérifie que l'attente d'une commande ignore les événements sans changement
+    de statut et s'arrête au premier statut différent.
+    """
+    hub = EventHub(LocalBackend())
+
+    async def scenario():
+        abonnement = hub.abonner_commande(3)
+        hub.publier(events.ORDER_UPDATED, {"id": 3, "status": "En préparation"})
+        hub.publier(events.ORDER_STATUS, {"id": 4, "status": "Prete"})
+        hub.publier(events.ORDER_STATUS, {"id": 3, "status": "Prete"})
+        message = await events.attendre_changement(abonnement, "En préparation", 1)
+        expire = await events.attendre_changement(abonnement, "Prete", 0.01)
+        hub.desabonner_commande(3, abonnement)
+        return message, expire
+
+    message, expire = asyncio.run(scenario())
+    assert message["data"] == {"id": 3, "status": "Prete"}
+    assert expire is None
@@ -0,0 +1,91 @@
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+
+from app.enumerations import Category, Status
+from app.models import Order, OrderItem, Product
+from app.services.forecast import (
+    lissage_exponentiel,
+    moyenne_mobile,
+    series_de_demande,
+    suggestions_reapprovisionnement,
+)
+
+
+def test_previsions_vectorisees_egales_au_calcul_par_produit():
+    """
+    Vérifie la moyenne mobile et le lissage exponentiel (forme récursive
+    normalisée) contre un calcul produit par produit.
+    """
+    rng = np.random.default_rng(0)
+    demande = rng.poisson(5, size=(50, 28)).astype(float)
+    alpha = 0.3
+
+    for ligne, mm, le in zip(
+        demande, moyenne_mobile(demande, 7), lissage_exponentiel(demande, alpha)
+    ):
+        assert mm == sum(ligne[-7:]) / 7
+        niveau, poids = 0.0, 0.0
+        for valeur in ligne:
+            niveau = (1 - alpha) * niveau + valeur
+            poids = (1 - alpha) * poids + 1
+        assert abs(le - niveau / poids) < 1e-9
+
+
+def test_suggestions_depuis_les_lignes_de_commande(session, client_user):
+    """
+    Vérifie la série de demande (lignes d'un même jour sommées, jours sans vente
+    à 0, jour courant exclu) et les produits suggérés : stock insuffisant
+    jusqu'à la livraison seulement.
+    """
+    produits = [
+        Product(name=nom, unit_price=4.0, category=Category.ENTREE, stock=stock)
+        for nom, stock in (("Velouté", 5), ("Tarte", 100), ("Gaspacho", 0))
+    ]
+    session.add_all(produits)
+    session.commit()
+    veloute, tarte, gaspacho = (p.id for p in produits)
+    jour = date(2031, 3, 10)
+
+    def commander(le_jour, lignes):
+        order = Order(
+            user_id=client_user.id,
+            total_amount=0,
+            status=Status.SERVIE,
+            created_at=datetime.combine(le_jour, time(12)),
+        )
+        session.add(order)
+        session.flush()
+        session.add_all(
+            OrderItem(
+                order_id=order.id,
+                product_id=pid,
+                quantity=quantite,
+                unit_price=4.0,
+                created_at=order.created_at,
+            )
+            for pid, quantite in lignes
+        )
+
+    for d in range(1, 8):
+        commander(jour - timedelta(days=d), [(veloute, 4), (tarte, 10)])
+        commander(jour - timedelta(days=d), [(veloute, 6)])
+    commander(jour, [(gaspacho, 50)])
+    session.commit()
+
+    ids, demande = series_de_demande(session, jour, 14)
+    ligne = demande[np.searchsorted(ids, veloute)]
+    assert ligne.tolist() == [0] * 7 + [10] * 7
+    assert gaspacho not in ids
+
+    suggestions = [
+        s
+        for s in suggestions_reapprovisionnement(
+            session, "moving_average", delai=2, couverture=7, jour=jour
+        )
+        if s.product_id in (veloute, tarte, gaspacho)
+    ]
+    assert [s.product_id for s in suggestions] == [veloute]
+    assert suggestions[0].daily_forecast == 10
+    assert suggestions[0].days_of_stock == 0.5
+    assert suggestions[0].suggested_quantity == 85
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from app.models import IdempotencyKey
+from app.schemas.order import OrderCreateWithItems
+from app.services import idempotency
+from app.services.idempotency import CacheLRU, ReponseEnregistree, requete_idempotente
+
+
+def _entree(expires_in=timedelta(hours=1)):
+    return ReponseEnregistree("h", 201, b"{}", idempotency._maintenant() + expires_in)
+
+
+def test_cache_lru_evince_la_moins_recente():
+    """
+    Vérifie que le cache garde les clés les plus récemment utilisées.
+    """
+    cache = CacheLRU(2)
+    cache.put("a", _entree())
+    cache.put("b", _entree())
+    assert cache.get("a") is not None
+    cache.put("c", _entree())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_cache_lru_ignore_les_cles_expirees():
+    """
+    Cas invalide : une clé expirée n'est plus servie par le cache.
+    """
+    cache = CacheLRU(2)
+    cache.put("a", _entree(expires_in=timedelta(seconds=-1)))
+    assert cache.get("a") is None
+
+
+def test_requete_idempotente_cle_par_utilisateur():
+    """
+    Vérifie que la même clé client donne des clés distinctes par utilisateur,
+    et que l'empreinte dépend du corps de la requête.
+    """
+    payload = OrderCreateWithItems(items=[{"product_id": 1, "quantity": 1}])
+    autre = OrderCreateWithItems(items=[{"product_id": 1, "quantity": 2}])
+
+    a = requete_idempotente("k", 1, "POST /orders/", payload)
+    b = requete_idempotente("k", 2, "POST /orders/", payload)
+    c = requete_idempotente("k", 1, "POST /orders/", autre)
+    assert requete_idempotente(None, 1, "POST /orders/", payload) is None
+    assert a.cle != b.cle
+    assert a.cle == c.cle
+    assert a.empreinte != c.empreinte
+
+
+def test_requete_idempotente_cle_invalide():
+    """
+    Cas invalide : une clé vide est refusée (400).
+    """
+    payload = OrderCreateWithItems(items=[{"product_id": 1, "quantity": 1}])
+    with pytest.raises(HTTPException) as exc:
+        requete_idempotente("", 1, "POST /orders/", payload)
+    assert exc.value.status_code == 400
+
+
+def test_enregistrer_conflit_sans_reponse_a_rejouer(session, monkeypatch):
+    """
+    Cas invalide : après un conflit de clé annulé, sans réponse concurrente à
+    rejouer, la requête est refusée (409) au lieu d'être validée à vide.
+    """
+    payload = OrderCreateWithItems(items=[{"product_id": 1, "quantity": 1}])
+    idem = requete_idempotente("k-conflit", 1, "POST /orders/", payload)
+
+    flush = session.flush
+
+    def conflit():
+        # la requête concurrente a pris la clé, puis sa ligne a disparu
+        if any(isinstance(obj, IdempotencyKey) for obj in session.new):
+            raise IntegrityError("INSERT", {}, Exception("clé en double"))
+        flush()
+
+    monkeypatch.setattr(session, "flush", conflit)
+    with pytest.raises(HTTPException) as exc:
+        idem.enregistrer(session, 201, payload)
+    assert exc.value.status_code == 409
+    assert idem._reponse is None
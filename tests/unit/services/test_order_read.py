@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import order_read
+from app.services.order_read import decode_cursor, encode_cursor, vers_utc
+
+
+def test_curseur_aller_retour():
+    """
+    Cas valide : un curseur encodé se décode en la même clé (created_at, id).
+    """
+    created_at = datetime(2025, 8, 20, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "WzEsMl0"])
+def test_curseur_invalide(cursor):
+    """
+    Cas invalide : un curseur altéré lève une erreur 400.
+    """
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_vers_utc_instant_avec_fuseau():
+    """
+    Un instant avec fuseau est converti en UTC naïf.
+    """
+    moment = datetime(2025, 8, 20, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert vers_utc(moment) == datetime(2025, 8, 20, 10, 0)
+
+
+def test_bornes_journee_fuseau_restaurant(monkeypatch):
+    """
+    Une journée locale à Paris (UTC+2 en été) commence à 22h UTC la veille.
+    """
+    monkeypatch.setattr(order_read, "RESTAURANT_TZ", ZoneInfo("Europe/Paris"))
+    debut, fin = order_read.bornes_journee(date(2025, 8, 20))
+    assert debut == datetime(2025, 8, 19, 22, 0, tzinfo=timezone.utc)
+    assert fin == datetime(2025, 8, 20, 22, 0, tzinfo=timezone.utc)
+    # filtrer_periode ne décale pas une seconde fois les bornes
+    assert vers_utc(debut) == datetime(2025, 8, 19, 22, 0)
+
+
+def test_assembler_regroupe_les_lignes_par_commande():
+    """
+    Les lignes jointes sont regroupées par commande, dans l'ordre de lecture ;
+    une commande sans article (jointure externe) a une liste vide.
+    """
+    created_at = datetime(2025, 8, 20, 12, 0)
+    rows = [
+        (2, 7, 30.0, "Prete", created_at, 10, 1, 10.0, "Soupe"),
+        (2, 7, 30.0, "Prete", created_at, 11, 2, 10.0, "Tarte"),
+        (1, 7, 0.0, "En préparation", created_at, None, None, None, None),
+    ]
+    commandes = order_read.assembler(rows)
+    assert [c.id for c in commandes] == [2, 1]
+    assert [(i.product_id, i.quantity) for i in commandes[0].items] == [
+        (10, 1),
+        (11, 2),
+    ]
+    assert commandes[0].items[1].product_name == "Tarte"
+    assert commandes[1].items == []
+
+
+def test_requete_page_json_postgres():
+    """
+    Vérifie que la page JSON est construite par PostgreSQL en une requête :
+    json_agg / json_build_object sur order et orderitem, tableau renvoyé en texte.
+    """
+    from sqlalchemy.dialects import postgresql
+
+    stmt = order_read.requete_page_json(order_read.select_commandes(), None, 10)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "json_agg" in sql
+    assert "json_build_object" in sql
+    assert "orderitem" in sql
+    assert "AS TEXT" in sql
+
+
+def test_json_sql_indisponible_sur_sqlite(session, monkeypatch):
+    """
+    Vérifie le repli sur le chemin Python hors PostgreSQL, même option activée.
+    """
+    monkeypatch.setattr(order_read, "ORDERS_JSON_SQL", True)
+    assert order_read.json_sql_disponible(session) is False
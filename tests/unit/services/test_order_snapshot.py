@@ -0,0 +1,60 @@
+from sqlmodel import select
+
+from app.enumerations import Category, Status
+from app.models import Order, OrderItem, Product
+from app.services.order_snapshot import reprendre_instantanes
+
+
+def test_reprendre_instantanes_par_lots(session, client_user):
+    """
+    Vérifie que les lignes sans instantané sont complétées par lots, que les
+    lignes déjà figées ne sont pas modifiées et qu'une ligne dont le produit
+    a été supprimé n'empêche pas la reprise de se terminer.
+    """
+    produit = Product(
+        name="Soupe",
+        unit_price=4.5,
+        category=Category.ENTREE,
+        description="d",
+        stock=10,
+    )
+    autre = Product(
+        name="Tarte",
+        unit_price=3.0,
+        category=Category.DESSERT,
+        description="d",
+        stock=10,
+    )
+    order = Order(user_id=client_user.id, total_amount=0, status=Status.EN_PREPARATION)
+    session.add_all([produit, autre, order])
+    session.commit()
+    orders = [order]
+    for _ in range(4):
+        o = Order(user_id=client_user.id, total_amount=0, status=Status.EN_PREPARATION)
+        session.add(o)
+        orders.append(o)
+    session.commit()
+    for o in orders:
+        session.add(OrderItem(order_id=o.id, product_id=produit.id, quantity=1))
+    session.add(
+        OrderItem(
+            order_id=order.id,
+            product_id=autre.id,
+            quantity=1,
+            unit_price=2.0,
+            product_name="Tarte (ancien prix)",
+        )
+    )
+    session.add(OrderItem(order_id=order.id, product_id=9999, quantity=1))
+    session.commit()
+
+    assert reprendre_instantanes(session, taille_lot=2) == 5
+    session.expire_all()
+    lignes = session.exec(select(OrderItem)).all()
+    figees = {(li.product_id, li.unit_price, li.product_name) for li in lignes}
+    assert figees == {
+        (produit.id, 4.5, "Soupe"),
+        (autre.id, 2.0, "Tarte (ancien prix)"),
+        (9999, None, None),
+    }
+    assert reprendre_instantanes(session, taille_lot=2) == 0
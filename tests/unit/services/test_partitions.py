@@ -0,0 +1,97 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import order_read, partitions
+
+
+def test_decaler_mois_change_d_annee():
+    """
+    Vérifie le calcul des mois voisins, en avant comme en arrière.
+    """
+    assert partitions.decaler_mois(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert partitions.decaler_mois(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partitions.debut_mois(date(2026, 10, 17)) == date(2026, 10, 1)
+
+
+def test_nom_de_partition_aller_retour():
+    """
+    Vérifie que le mois d'une partition se retrouve d'après son nom.
+    """
+    nom = partitions.nom_partition("order", date(2026, 10, 1))
+    assert nom == "order_p2026_10"
+    assert partitions.mois_de_partition("order", nom) == date(2026, 10, 1)
+    assert partitions.mois_de_partition("order", "order_default") is None
+    assert partitions.mois_de_partition("order", "orderitem_p2026_10") is None
+
+
+def test_ddl_conversion():
+    """
+    Vérifie le plan de conversion : un mois par partition et par table,
+    clés primaires et clé étrangère composites, index des modèles recréés.
+    """
+    ddl = partitions.ddl_conversion(date(2026, 9, 1), date(2026, 11, 1), "order_id_seq")
+    sql = "\n".join(ddl)
+    for table in ("order", "orderitem"):
+        for mois in ("2026_09", "2026_10", "2026_11"):
+            assert f'"{table}_p{mois}" PARTITION OF' in sql
+        assert f'"{table}_default" PARTITION OF' in sql
+    assert "FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')" in sql
+    assert 'ALTER TABLE "order" ADD PRIMARY KEY (id, created_at)' in ddl
+    assert 'REFERENCES "order" (id, created_at) ON DELETE CASCADE' in sql
+    assert "CREATE INDEX ix_order_open_created_at_id" in sql
+    assert ddl.index('DROP TABLE "order"') < ddl.index(
+        'ALTER TABLE order_partitioned RENAME TO "order"'
+    )
+
+
+def test_ddl_nouveau_mois_deplace_la_partition_par_defaut():
+    """
+    Vérifie le plan de création d'un mois : les lignes du mois déjà dans la
+    partition par défaut en sortent avant la création, puis y reviennent.
+    """
+    ddl = partitions.ddl_nouveau_mois(date(2027, 1, 1))
+    periode = "created_at >= '2027-01-01' AND created_at < '2027-02-01'"
+    copie = ddl.index(
+        'CREATE TEMP TABLE "_order_a_deplacer" AS '
+        f'SELECT * FROM "order_default" WHERE {periode}'
+    )
+    suppression = ddl.index(f'DELETE FROM "order_default" WHERE {periode}')
+    creation = ddl.index(partitions.ddl_partition("order", date(2027, 1, 1)))
+    retour = ddl.index('INSERT INTO "order" SELECT * FROM "_order_a_deplacer"')
+    assert copie < suppression < creation < retour
+    assert ddl.index(f'DELETE FROM "orderitem_default" WHERE {periode}') < suppression
+    assert ddl[-1] == 'DROP TABLE "_orderitem_a_deplacer"'
+
+
+def test_partitionnement_refuse_hors_postgresql(session):
+    """
+    Vérifie que la conversion est refusée sur SQLite.
+    """
+    with pytest.raises(ValueError):
+        partitions.partitionner(session)
+
+
+def test_curseur_borne_created_at_pour_l_elagage():
+    """
+    Vérifie que la page suivante borne created_at seul (élagage des partitions)
+    et que les articles sont joints sur la date avec ORDER_PARTITIONING.
+    """
+    cursor = order_read.encode_cursor(datetime(2026, 10, 1, 12, 0), 42)
+    stmt = order_read.paginer(order_read.select_commandes(), cursor, 10)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert '"order".created_at <= ' in sql
+
+    commandes = order_read.select_commandes().subquery()
+    assert "created_at" not in str(order_read.jointure_articles(commandes))
+
+
+def test_jointure_articles_partitionnee(monkeypatch):
+    """
+    Vérifie l'ajout de la clé de partition à la jointure des articles.
+    """
+    monkeypatch.setattr(order_read, "ORDER_PARTITIONING", True)
+    commandes = order_read.select_commandes().subquery()
+    condition = str(order_read.jointure_articles(commandes))
+    assert "orderitem.created_at = anon_1.created_at" in condition
@@ -0,0 +1,80 @@
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from app.services.quantiles import (
+    PRECISION_RELATIVE,
+    Mesure,
+    _quantiles,
+    cumuler_mesures,
+    duree_preparation,
+    percentiles,
+    seau,
+    valeur_du_seau,
+)
+
+
+def test_valeur_du_seau_a_moins_de_la_precision_relative():
+    """
+    Vérifie que toute valeur est restituée à α près, et le seau des zéros.
+    """
+    for valeur in np.geomspace(0.01, 1e6, 500):
+        assert abs(valeur_du_seau(seau(valeur)) - valeur) <= PRECISION_RELATIVE * valeur
+    assert valeur_du_seau(seau(0)) == 0.0
+
+
+def test_percentiles_proches_des_percentiles_exacts():
+    """
+    Vérifie p50 / p95 / p99 d'un échantillon contre un tri exact.
+    """
+    rng = np.random.default_rng(0)
+    valeurs = rng.lognormal(3, 0.8, 20_000)
+    indices, comptes = np.unique([seau(v) for v in valeurs], return_counts=True)
+    total, estimes = _quantiles(indices, comptes)
+    assert total == len(valeurs)
+    trie = np.sort(valeurs)
+    for q, estime in zip((0.5, 0.95, 0.99), estimes):
+        exact = trie[int(q * (len(valeurs) - 1))]
+        assert abs(estime - exact) <= PRECISION_RELATIVE * exact + 0.01
+
+
+def test_duree_preparation_fuseaux_melanges():
+    """
+    Vérifie le temps de préparation entre une date lue en base (sans fuseau)
+    et une date avec fuseau.
+    """
+    creee = datetime(2025, 10, 1, 12, 0)
+    prete = datetime(2025, 10, 1, 12, 12, 30, tzinfo=timezone.utc)
+    assert duree_preparation(creee, prete) == 750
+    assert duree_preparation(creee, None) is None
+
+
+def test_fusion_des_jours_et_annulation_des_ecarts(session):
+    """
+    Vérifie la fusion de deux jours, le découpage par jour, et qu'une
+    commande créée puis supprimée ne laisse aucune trace.
+    """
+    lundi, mardi = date(2025, 10, 6), date(2025, 10, 7)
+    cumuler_mesures(
+        session,
+        [
+            (None, Mesure(lundi, 10.0, 600.0, frozenset({"Dessert"}))),
+            (None, Mesure(lundi, 20.0, None, frozenset())),
+            (None, Mesure(mardi, 30.0, 900.0, frozenset({"Dessert"}))),
+        ],
+    )
+    passagere = Mesure(mardi, 500.0, 60.0, frozenset({"Boisson"}))
+    cumuler_mesures(session, [(None, passagere)])
+    cumuler_mesures(session, [(passagere, None)])
+    session.commit()
+
+    total = percentiles(session, "amount", lundi, date(2025, 10, 8))
+    assert [r.count for r in total] == [3]
+    assert abs(total[0].p50 - 20) <= 20 * PRECISION_RELATIVE
+    assert total[0].p99 <= 30 * (1 + PRECISION_RELATIVE)
+
+    desserts = percentiles(
+        session, "prep_time", lundi, date(2025, 10, 8), "Dessert", "day"
+    )
+    assert [(r.period, r.count) for r in desserts] == [(lundi, 1), (mardi, 1)]
+    assert percentiles(session, "prep_time", lundi, mardi, "Boisson") == []
@@ -0,0 +1,25 @@
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from app.services import stats
+
+
+class _SessionPostgres:
+    """Session minimale exposant le dialecte PostgreSQL."""
+
+    class _Bind:
+        dialect = postgresql.dialect()
+
+    def get_bind(self):
+        return self._Bind()
+
+
+def test_tranche_postgres_identique_dans_le_group_by():
+    """
+    Vérifie que la période PostgreSQL (date_trunc dans le fuseau du restaurant)
+    est écrite en littéraux : même texte dans le SELECT et le GROUP BY.
+    """
+    periode = stats.tranche(_SessionPostgres(), "week").label("period")
+    sql = str(select(periode).group_by(periode).compile(dialect=postgresql.dialect()))
+    assert "date_trunc('week', timezone(" in sql
+    assert "%(" not in sql
@@ -0,0 +1,79 @@
+import pytest
+
+from app import db
+
+
+def test_engine_options_sqlite_sans_taille_de_pool():
+    """
+    Cas SQLite : seuls pre-ping et recycle sont transmis (pas de pool_size).
+    """
+    options = db.engine_options("sqlite:///./test.db")
+    assert "pool_size" not in options
+    assert "max_overflow" not in options
+    assert options["pool_pre_ping"] == db.DB_POOL_PRE_PING
+    assert options["pool_recycle"] == db.DB_POOL_RECYCLE
+
+
+def test_engine_options_postgres_avec_pool():
+    """
+    Cas PostgreSQL : taille, overflow et timeout du pool sont configurés.
+    """
+    options = db.engine_options("postgresql+psycopg2://u:p@localhost/restau")
+    assert options["pool_size"] == db.DB_POOL_SIZE
+    assert options["max_overflow"] == db.DB_MAX_OVERFLOW
+    assert options["pool_timeout"] == db.DB_POOL_TIMEOUT
+
+
+def test_get_session_ferme_la_session():
+    """
+    Vérifie que la session est fermée et la connexion rendue au pool
+    une fois la dépendance terminée, et que l'attente est mesurée.
+    """
+    db.pool_stats.reset()
+    gen = db.get_session()
+    session = next(gen)
+    assert session.in_transaction()
+    with pytest.raises(StopIteration):
+        next(gen)
+    assert not session.in_transaction()
+    assert db.pool_stats.snapshot()["checkouts"] == 1
+
+
+def test_get_session_rollback_sur_exception():
+    """
+    Vérifie qu'une exception levée pendant la requête annule la transaction
+    avant de fermer la session.
+    """
+    gen = db.get_session()
+    session = next(gen)
+    with pytest.raises(RuntimeError):
+        gen.throw(RuntimeError("boom"))
+    assert not session.in_transaction()
+
+
+@pytest.mark.parametrize(
+    "url, attendu",
+    [
+        (
+            "postgresql+psycopg2://u:p@db:5432/restau",
+            "postgresql+asyncpg://u:p@db:5432/restau",
+        ),
+        ("postgresql://u:p@db/restau", "postgresql+asyncpg://u:p@db/restau"),
+        ("sqlite:///./restau.db", "sqlite+aiosqlite:///./restau.db"),
+    ],
+)
+def test_async_database_url(url, attendu, monkeypatch):
+    """
+    Vérifie la conversion de l'URL sync vers le driver async correspondant.
+    """
+    monkeypatch.delenv("DATABASE_URL_ASYNC", raising=False)
+    assert db.async_database_url(url) == attendu
+
+
+def test_async_database_url_base_inconnue(monkeypatch):
+    """
+    Cas invalide : aucune conversion connue pour la base (ex: MySQL).
+    """
+    monkeypatch.delenv("DATABASE_URL_ASYNC", raising=False)
+    with pytest.raises(RuntimeError):
+        db.async_database_url("mysql://u:p@localhost/restau")
@@ -0,0 +1,63 @@
+from sqlalchemy import create_engine, text
+
+from app import instrumentation
+from app.instrumentation import RequestStats, SqlMetrics, start_request
+
+
+def test_request_stats_compte_et_garde_le_plus_lent():
+    """
+    Vérifie le comptage des statements, du temps cumulé et du plus lent.
+    """
+    stats = RequestStats()
+    stats.record("SELECT 1", 0.002)
+    stats.record("SELECT 2", 0.010)
+    stats.record("SELECT 1", 0.001)
+    assert stats.statements == 3
+    assert abs(stats.total_time - 0.013) < 1e-9
+    assert stats.slowest_sql == "SELECT 2"
+    assert stats.by_statement["SELECT 1"] == 2
+
+
+def test_request_stats_detecte_n_plus_un():
+    """
+    Un même statement répété au-delà du seuil est signalé comme N+1.
+    """
+    stats = RequestStats()
+    for _ in range(instrumentation.SQL_N_PLUS_ONE_THRESHOLD):
+        stats.record("SELECT * FROM product WHERE id = ?", 0.001)
+    stats.record("SELECT * FROM user", 0.001)
+    assert stats.n_plus_one() == [
+        (
+            "SELECT * FROM product WHERE id = ?",
+            instrumentation.SQL_N_PLUS_ONE_THRESHOLD,
+        )
+    ]
+
+
+def test_evenements_engine_alimentent_la_requete_courante():
+    """
+    Les statements exécutés par un engine sont rattachés à la requête courante.
+    """
+    engine = create_engine("sqlite://")
+    stats = start_request()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+    assert stats.statements == 2
+    assert stats.total_time > 0
+
+
+def test_sql_metrics_agrege_par_route():
+    """
+    Vérifie l'agrégation par route et le compteur de requêtes N+1.
+    """
+    metrics = SqlMetrics()
+    stats = RequestStats()
+    for _ in range(instrumentation.SQL_N_PLUS_ONE_THRESHOLD):
+        stats.record("SELECT * FROM product WHERE id = ?", 0.001)
+    metrics.add("POST /orders/", stats)
+    metrics.add("POST /orders/", RequestStats())
+    snapshot = metrics.snapshot()["POST /orders/"]
+    assert snapshot["requests"] == 2
+    assert snapshot["statements"] == instrumentation.SQL_N_PLUS_ONE_THRESHOLD
+    assert snapshot["n_plus_one"] == 1